@@ -7,7 +7,13 @@ DEMAND FORECASTING DASHBOARD - OLIST
 """
 
 import streamlit as st
-import pandas as pd
+
+from dashboard.aggregates import load_aggregates
+from dashboard.artifacts import load_evaluation, metrics_table
+from dashboard.data import load_data
+from dashboard.diagnostics import render as render_diagnostics
+from dashboard.profiling import end_page, start_page
+from dashboard.ui import time_filter
 
 st.set_page_config(
     page_title="Demand Forecasting Dashboard",
@@ -39,12 +45,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('demand_features_final.csv')
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    return df
-
 def main():
     # Sidebar
     with st.sidebar:
@@ -72,12 +72,16 @@ def main():
         **🎓 Academic Project**
         
         Demand Forecasting using:
-        - XGBoost
-        - LightGBM
-        - Prophet
-        - LSTM
+        - Gradient Boosting
+        - Ridge (Linear)
+        - Seasonal Naive
+        - Additive Seasonality
         """)
     
+    # Date range / granularity: set here or on any EDA page, kept across pages
+    timeline = load_aggregates()['timeline']
+    rows, _ = time_filter(timeline)
+    
     # Main Content
     st.title("📊 Demand Forecasting Dashboard")
     st.markdown("### Olist E-commerce Platform Analysis")
@@ -95,19 +99,20 @@ def main():
     > **Data Cleaning → EDA → Feature Engineering → Feature Selection → Modeling → Explainability**
     """)
     
-    # Load data for metrics
+    # Load data for metrics (sums over the selected window from prefix sums)
     df = load_data()
+    summary = timeline.summary(rows)
     
     # Key Metrics
     st.markdown("### 📈 Dataset Overview")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📅 Total Days", len(df))
+        st.metric("📅 Total Days", summary['days'])
     with col2:
-        st.metric("📦 Total Orders", f"{df['daily_orders'].sum():,.0f}")
+        st.metric("📦 Total Orders", f"{summary['sum']:,.0f}")
     with col3:
-        st.metric("📊 Avg Daily Orders", f"{df['daily_orders'].mean():.1f}")
+        st.metric("📊 Avg Daily Orders", f"{summary['mean']:.1f}")
     with col4:
         st.metric("🔢 Total Features", len(df.columns))
     
@@ -138,7 +143,7 @@ def main():
         st.markdown("""
         <div class="metric-card">
         <h4>🏆 Model Comparison</h4>
-        <p>XGBoost, LightGBM, Prophet, LSTM</p>
+        <p>Gradient Boosting, Ridge, Seasonal Naive, Additive Seasonality</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -155,37 +160,41 @@ def main():
     # Model Results Summary
     st.markdown("### 🏆 Model Performance Summary")
     
-    metrics_df = pd.DataFrame({
-        'Model': ['XGBoost', 'LightGBM', 'Prophet', 'LSTM'],
-        'RMSE': [32.45, 31.62, 89.23, 45.67],
-        'MAE': [27.12, 26.82, 72.45, 38.91],
-        'R2': [0.845, 0.853, -0.172, 0.693]
-    })
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        st.dataframe(
-            metrics_df.style.format({
-                'RMSE': '{:.2f}',
-                'MAE': '{:.2f}',
-                'R2': '{:.3f}'
-            }).highlight_min(subset=['RMSE', 'MAE'], color='lightgreen')
-            .highlight_max(subset=['R2'], color='lightgreen'),
-            use_container_width=True
-        )
-    
-    with col2:
-        st.success("""
-        **🏆 Champion Model**
-        
-        **LightGBM**
-        
-        - RMSE: 31.62
-        - R²: 0.853
-        
-        *Selected based on lowest RMSE*
-        """)
+    evaluation = load_evaluation()
+    if evaluation is None:
+        st.warning("No model evaluation yet: run `python -m dashboard.evaluation`.")
+    else:
+        metrics_df = metrics_table(evaluation)
+        champion = metrics_df.iloc[0]
+
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            st.dataframe(
+                metrics_df.style.format({
+                    'RMSE': '{:.2f}',
+                    'MAE': '{:.2f}',
+                    'R2': '{:.3f}'
+                }).highlight_min(subset=['RMSE', 'MAE'], color='lightgreen')
+                .highlight_max(subset=['R2'], color='lightgreen'),
+                use_container_width=True
+            )
+
+        with col2:
+            st.success(f"""
+            **🏆 Champion Model**
+
+            **{champion['Model']}**
+
+            - RMSE: {champion['RMSE']:.2f}
+            - R²: {champion['R2']:.3f}
+
+            *Selected based on lowest RMSE*
+            """)
+
+        config = evaluation['config']
+        st.caption(f"Rolling-origin CV: {config['folds']} folds × {config['horizon']} days, "
+                   f"data version {evaluation['data_version']}, {evaluation['created_at']}")
     
     st.markdown("---")
     
@@ -208,4 +217,10 @@ def main():
     )
 
 if __name__ == "__main__":
-    main()
+    # Hidden diagnostics page: app.py?diagnostics=1
+    if st.query_params.get("diagnostics") == "1":
+        render_diagnostics()
+    else:
+        start_page(__file__)
+        main()
+        end_page()
@@ -0,0 +1,81 @@
+"""
+Backtesting throughput and worker start-up.
+
+Runs the full model set over every 7-day fold of the real table (expanding
+and sliding window) and reports fits per second. ``--rows`` also times
+handing a synthetic (rows x 38) feature matrix to fresh ``spawn`` workers,
+once through shared memory (``dashboard.backtest``) and once pickled into
+every worker's initializer.
+
+    python -m benchmarks.bench_backtest --workers 2 --rows 1000000
+"""
+
+import argparse
+import concurrent.futures as cf
+import multiprocessing
+import time
+
+import numpy as np
+
+from benchmarks.common import print_table
+from dashboard.backtest import backtest_folds, run_backtest
+from dashboard.data import DATA_PATH, read_feature_table_cached
+from dashboard.evaluation import INPUT_COLUMNS, MODELS, evaluate
+
+
+def bench_folds(window, workers):
+    df = read_feature_table_cached(DATA_PATH)
+    payload = evaluate(df, n_folds=None, horizon=7, window=window, budget=None, max_workers=workers)
+    fits = sum(row["folds_completed"] for row in payload["summary"])
+    return ["sliding" if window else "expanding", payload["config"]["folds"], len(MODELS), fits,
+            payload["wall_seconds"], fits / payload["wall_seconds"]]
+
+
+def _first_value(name, arrays, train, test):
+    return arrays["X"][test, 0]
+
+
+def _keep(X):
+    global _COPY
+    _COPY = X
+
+
+def _copied_first_value(fold):
+    return _COPY[fold, 0]
+
+
+def bench_startup(n_rows, workers):
+    X = np.random.default_rng(0).random((n_rows, len(INPUT_COLUMNS)))
+    period = np.arange(n_rows)
+    folds = backtest_folds(n_rows, horizon=1, n_folds=workers)
+    context = multiprocessing.get_context("spawn")
+
+    start = time.perf_counter()
+    run_backtest(_first_value, {"X": X}, period, folds, ["noop"], max_workers=workers,
+                 mp_context=context)
+    shared = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with cf.ProcessPoolExecutor(workers, mp_context=context, initializer=_keep,
+                                initargs=(X,)) as pool:
+        list(pool.map(_copied_first_value, range(workers)))
+    copied = time.perf_counter() - start
+    return [n_rows, X.nbytes / 2**20, workers, shared, copied]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--window", type=int, default=365, help="sliding window in days")
+    parser.add_argument("--rows", type=int, nargs="*", default=[], help="start-up benchmark sizes")
+    args = parser.parse_args()
+
+    print_table([bench_folds(None, args.workers), bench_folds(args.window, args.workers)],
+                ["window", "folds", "models", "fits", "wall_s", "fits_per_s"])
+    if args.rows:
+        print_table([bench_startup(n, args.workers) for n in args.rows],
+                    ["rows", "matrix_mb", "workers", "shared_s", "pickled_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start and page-switch latency of the feature table loader.
+
+"before" reproduces the old layout: app.py and pages 1-5 each had their own
+``@st.cache_data load_data()``, so a cold session parsed the CSV once per
+page and every page switch unpickled a private copy. "after" is the shared
+``dashboard.data.load_data``. "restart" is a new process that finds the
+binary sidecar written by the first load and memory-maps it.
+
+    python -m benchmarks.bench_data_loading --rows 611 100000 1000000
+"""
+
+import argparse
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from benchmarks.common import print_table, timed, write_synthetic_csv
+from dashboard import data
+
+N_PAGES = 6
+
+
+def legacy_loaders(path):
+    """One independently cached loader per page, as before."""
+    def load_data(path):
+        df = pd.read_csv(path)
+        df['order_date'] = pd.to_datetime(df['order_date'])
+        return df
+
+    loaders = []
+    for page in range(N_PAGES):
+        # Streamlit keys the cache on the qualified name, like the per-page copies.
+        load_data.__qualname__ = f"page_{page}.load_data"
+        cached = st.cache_data(load_data)
+        loaders.append(lambda cached=cached: cached(str(path)))
+    return loaders
+
+
+def bench(n_rows, directory):
+    path = write_synthetic_csv(n_rows, directory)
+
+    loaders = legacy_loaders(path)
+    before_cold = sum(timed(load)[0] for load in loaders)
+    before_switch, before_df = timed(loaders[0], repeat=5)
+
+    st.cache_resource.clear()
+    after_cold, _ = timed(data.load_data, path)
+    after_switch, after_df = timed(data.load_data, path, repeat=5)
+
+    st.cache_resource.clear()
+    restart, _ = timed(data.load_data, path)
+
+    return [
+        n_rows,
+        before_cold * 1e3, after_cold * 1e3,
+        before_switch * 1e3, after_switch * 1e3,
+        restart * 1e3,
+        before_df.memory_usage(deep=True).sum() / 2**20,
+        after_df.memory_usage(deep=True).sum() / 2**20,
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[611, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = [bench(n, directory) for n in args.rows]
+    print_table(rows, ["rows", "cold_before_ms", "cold_after_ms",
+                       "switch_before_ms", "switch_after_ms", "restart_ms",
+                       "frame_before_mb", "frame_after_mb"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Feature generation throughput: batch build vs. the incremental state.
+
+Builds the 38 derived columns from synthetic daily orders with
+``dashboard.features.build_features`` at 10^5-10^7 rows, and reports the
+per-row cost of appending days with ``dashboard.incremental.FeatureState``.
+``--series`` also builds a long multi-series table in one grouped pass.
+
+    python -m benchmarks.bench_features --rows 100000 1000000 10000000
+    python -m benchmarks.bench_features --rows --series 10000 --days 700
+"""
+
+import argparse
+
+from benchmarks.common import print_table, synthetic_orders, synthetic_series_orders, timed
+from dashboard.data import SERIES_COLUMN, TARGET_COLUMN
+from dashboard.features import build_features
+from dashboard.incremental import FeatureState
+
+APPEND_DAYS = 1_000
+
+
+def bench(n_rows):
+    raw = synthetic_orders(n_rows)
+    seconds, _ = timed(build_features, raw)
+
+    state = FeatureState.from_history(raw[TARGET_COLUMN].to_numpy()[None, -APPEND_DAYS:])
+    appended = raw[TARGET_COLUMN].to_numpy()[:APPEND_DAYS]
+    append_seconds, _ = timed(lambda: [state.step(v) for v in appended])
+    return [n_rows, seconds, n_rows / seconds / 1e6, append_seconds / APPEND_DAYS * 1e6]
+
+
+def bench_series(n_series, n_days):
+    raw = synthetic_series_orders(n_series, n_days)
+    seconds, _ = timed(build_features, raw, by=SERIES_COLUMN, compact=True)
+    return [n_series, n_days, len(raw), seconds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="*", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--series", type=int, help="number of series for the grouped build")
+    parser.add_argument("--days", type=int, default=700, help="days per series")
+    args = parser.parse_args()
+    if args.rows:
+        print_table([bench(n) for n in args.rows],
+                    ["rows", "build_s", "million_rows_per_s", "append_us_per_row"])
+    if args.series:
+        print_table([bench_series(args.series, args.days)],
+                    ["series", "days", "rows", "build_s"])
+
+
+if __name__ == "__main__":
+    main()
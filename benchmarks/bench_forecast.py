@@ -0,0 +1,82 @@
+"""
+Load test for the forecast service.
+
+Concurrent clients request random horizons (1-30 days) from a warm
+``ForecastService``, in process and over HTTP, with micro-batching on and
+off (``max_batch=1``). Reports p50 / p99 latency, requests per second and
+the mean batch size.
+
+    python -m benchmarks.bench_forecast --clients 32 --requests 50
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from benchmarks.common import print_table
+from dashboard.forecast import Forecaster, ForecastService, make_server
+
+
+def run_clients(call, clients, requests, seed=0):
+    latencies = [[] for _ in range(clients)]
+
+    def client(i):
+        rng = np.random.default_rng(seed + i)
+        for horizon in rng.integers(1, 31, requests):
+            start = time.perf_counter()
+            call(int(horizon))
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return np.concatenate(latencies), elapsed
+
+
+def bench(forecaster, transport, max_batch, clients, requests):
+    service = ForecastService(forecaster, max_batch=max_batch)
+    server = None
+    if transport == "http":
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/forecast?horizon="
+
+        def call(horizon):
+            with urllib.request.urlopen(url + str(horizon)) as response:
+                json.load(response)
+    else:
+        call = service.forecast
+
+    latencies, elapsed = run_clients(call, clients, requests)
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+    service.close()
+    total = clients * requests
+    return [transport, max_batch, total, np.percentile(latencies, 50) * 1e3,
+            np.percentile(latencies, 99) * 1e3, total / elapsed, total / service.batcher.batches]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    args = parser.parse_args()
+
+    forecaster = Forecaster.load()
+    rows = [bench(forecaster, transport, max_batch, args.clients, args.requests)
+            for transport in ("inprocess", "http") for max_batch in (1, 64)]
+    print_table(rows, ["transport", "max_batch", "requests", "p50_ms", "p99_ms",
+                       "requests_per_s", "mean_batch"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Rerun cost of the tabbed / expandable pages with lazy and eager sections.
+
+Each page is run headless (``streamlit.testing``) with one tab or expander
+open, once to warm the caches and then ``--repeat`` times; the best rerun
+time, the number of charts and the serialized size of everything sent to
+the browser are reported with ``DASHBOARD_EAGER_SECTIONS`` off and on.
+
+    python -m benchmarks.bench_lazy_sections --repeat 5
+"""
+
+import argparse
+import os
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.common import payload_bytes, print_table
+from dashboard.data import ROOT
+from dashboard.ui import EAGER_ENV
+
+# (page script, session-state key, value that opens the section)
+CASES = [
+    ("pages/4_🛠️_Feature_Engineering.py", "page4_lag", True),
+    ("pages/5_🎯_Feature_Selection_SHAP.py", "page5_tab", "📊 Feature Selection"),
+    ("pages/5_🎯_Feature_Selection_SHAP.py", "page5_tab", "🔍 SHAP Analysis"),
+    ("pages/5_🎯_Feature_Selection_SHAP.py", "page5_tab", "🔗 Korelasyon"),
+    ("pages/6_🏆_Model_Comparison.py", "page6_search", "Gradient Boosting"),
+]
+
+
+def bench(script, key, value, eager, repeat):
+    os.environ[EAGER_ENV] = "1" if eager else "0"
+    app = AppTest.from_file(str(ROOT / script), default_timeout=600)
+    app.session_state[key] = value
+    app.run()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app.run()
+        best = min(best, time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(f"{script}: {app.exception[0].value}")
+    return [script.split("_", 1)[1][:-3], f"{key}={value}", "eager" if eager else "lazy",
+            best, len(app.get("plotly_chart")), payload_bytes(app._tree)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rows = [bench(script, key, value, eager, args.repeat)
+            for script, key, value in CASES for eager in (True, False)]
+    os.environ.pop(EAGER_ENV, None)
+    print_table(rows, ["page", "open", "sections", "rerun_s", "charts", "payload_bytes"])
+
+
+if __name__ == "__main__":
+    main()
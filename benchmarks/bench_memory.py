@@ -0,0 +1,91 @@
+"""
+Bytes per row of the feature table: naive parse vs the compact schema.
+
+"naive" is ``pd.read_csv`` with default dtypes (int64 / float64, as the
+pages used to load it). "compact" is ``dashboard.data.read_feature_table``
+(``SCHEMA``: int8 flags and calendar fields, float32 features). "sidecar"
+is what its memory-mapped columns take on disk (dates as int32 day
+offsets). The second table breaks the compact row down by column group,
+and the last line projects the store for ``--series`` x ``--days``.
+
+    python -m benchmarks.bench_memory --rows 611 100000 1000000 --series 5000 --days 730
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.common import print_table, write_synthetic_csv
+from dashboard.data import (
+    CALENDAR_COLUMNS,
+    DATE_COLUMN,
+    FLAG_COLUMNS,
+    TARGET_COLUMN,
+    memory_report,
+    read_feature_table,
+    read_feature_table_cached,
+)
+
+GROUPS = {
+    "date": ["Index", DATE_COLUMN],
+    "target": [TARGET_COLUMN],
+    "calendar": [c for c in CALENDAR_COLUMNS if c != "is_weekend"],
+    "flags": ["is_weekend"] + FLAG_COLUMNS,
+}
+
+
+def naive_frame(path):
+    df = pd.read_csv(path)
+    df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+    return df.set_index(pd.DatetimeIndex(df[DATE_COLUMN], name="date"))
+
+
+def sidecar_bytes(path):
+    cache = Path(path).parent / ".cache"
+    return sum(f.stat().st_size for f in cache.glob(f"{Path(path).stem}-*/*.npy"))
+
+
+def bench(n_rows, directory):
+    path = write_synthetic_csv(n_rows, directory)
+    naive = naive_frame(path).memory_usage(deep=True).sum() / n_rows
+    compact = memory_report(read_feature_table(path))
+    read_feature_table_cached(path)  # writes the sidecar
+    return compact, [
+        n_rows,
+        Path(path).stat().st_size / n_rows,
+        naive,
+        compact["bytes_per_row"].sum(),
+        sidecar_bytes(path) / n_rows,
+        2**30 / compact["bytes_per_row"].sum() / 1e6,
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[611, 100_000, 1_000_000])
+    parser.add_argument("--series", type=int, default=5_000, help="series count for the projection")
+    parser.add_argument("--days", type=int, default=730, help="days per series for the projection")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [bench(n, directory) for n in args.rows]
+    print_table([row for _, row in results],
+                ["rows", "csv_B/row", "naive_B/row", "compact_B/row", "sidecar_B/row", "M_rows/GiB"])
+
+    report = results[-1][0]
+    grouped = {name: report.loc[[c for c in cols if c in report.index], "bytes_per_row"].sum()
+               for name, cols in GROUPS.items()}
+    grouped["features"] = report["bytes_per_row"].sum() - sum(grouped.values())
+    print()
+    print_table([[name, b] for name, b in grouped.items()], ["group", "compact_B/row"])
+
+    rows = args.series * args.days
+    per_row = report["bytes_per_row"].sum()
+    print(f"\n{args.series:,} series x {args.days} days = {rows:,} rows: "
+          f"{rows * per_row / 2**30:.2f} GiB compact, {rows * results[-1][1][2] / 2**30:.2f} GiB naive")
+
+
+if __name__ == "__main__":
+    main()
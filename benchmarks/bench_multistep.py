@@ -0,0 +1,74 @@
+"""
+Multi-step forecasting over many series: recursive vs. direct.
+
+Restores an ``Origin`` for ``--series`` synthetic series and forecasts
+``--horizon`` days for all of them at once. The recursive rows split the
+wall time into the forecasting engine (feature state, calendar, input
+assembly) and the model's own ``predict``, which the engine cannot speed up.
+
+    python -m benchmarks.bench_multistep --series 10000 --horizon 365
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import print_table, synthetic_series_orders, timed
+from dashboard.data import SERIES_COLUMN
+from dashboard.evaluation import MODELS, model_inputs
+from dashboard.features import build_features
+from dashboard.multistep import DirectForecaster, Origin, recursive_forecast
+
+FIT_ROWS = 50_000
+
+
+class TimedModel:
+    """Wraps a fitted model and accumulates the time spent in ``predict``."""
+
+    def __init__(self, model):
+        self.model = model
+        self.seconds = 0.0
+
+    def predict(self, X):
+        start = time.perf_counter()
+        values = self.model.predict(X)
+        self.seconds += time.perf_counter() - start
+        return values
+
+
+def fit_sample(table, name, seed=0):
+    X, y, _ = model_inputs(table)
+    rows = np.random.default_rng(seed).choice(len(y), min(FIT_ROWS, len(y)), replace=False)
+    return MODELS[name]["factory"]().fit(X.to_numpy()[rows], y[rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--series", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=400, help="history per series")
+    parser.add_argument("--horizon", type=int, default=365)
+    args = parser.parse_args()
+
+    table = build_features(synthetic_series_orders(args.series, args.days),
+                           by=SERIES_COLUMN, compact=True)
+    origin_seconds, origin = timed(Origin.from_table, table, by=SERIES_COLUMN)
+    print(f"origin for {args.series} series: {origin_seconds:.2f}s")
+
+    rows = []
+    for name in ("Ridge (Linear)", "Gradient Boosting"):
+        model = TimedModel(fit_sample(table, name))
+        seconds, _ = timed(recursive_forecast, model, origin, args.horizon)
+        rows.append(["recursive", name, seconds - model.seconds, model.seconds, seconds])
+
+    direct = DirectForecaster(max_horizon=args.horizon).fit(table, by=SERIES_COLUMN)
+    direct.model = TimedModel(direct.model)
+    seconds, _ = timed(direct.predict, origin, args.horizon)
+    rows.append(["direct", "Gradient Boosting", seconds - direct.model.seconds,
+                 direct.model.seconds, seconds])
+
+    print_table(rows, ["strategy", "model", "engine_s", "predict_s", "total_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Headless benchmark of every dashboard script, with a regression gate.
+
+``app.py`` and ``pages/1..8`` are run with ``streamlit.testing`` against
+synthetic feature tables (the schema of ``demand_features_final.csv``) of
+each ``--rows`` size, dated within what Streamlit's date widgets accept.
+Every (size, page) runs in a fresh process. The table's binary sidecar and
+forecast model are built beforehand, as after a server restart.
+
+Pages 3 and 5..8 read stored artifacts (evaluation, feature selection, SHAP,
+intervals). The harness builds them once per run, on a small synthetic
+table, into a temporary ``DASHBOARD_ARTIFACTS_DIR``. Every size then serves
+them as the newest stored artifacts (the pages' fallback while a run for the
+current data is pending). So every page renders its full content whether or
+not the checkout has an ``artifacts/`` directory. Background jobs are
+disabled.
+Reported per page:
+
+- ``cold_s``: the first run (imports, loads, cache fills, model fits),
+- ``warm_s``: median of ``--repeat`` reruns in the same session,
+- ``peak_mb``: the process's peak RSS,
+- ``elements`` / ``payload_kb``: what the warm run emitted,
+- ``artifacts``: the artifact kinds the page could read.
+
+With ``--check`` the results are compared with ``benchmarks/baselines/
+pages.json``. The script exits with status 1 when a time or the peak memory
+grows by more than ``--threshold`` (relative), with a small absolute slack
+for noise, when a page raises, or when it read other artifacts than its
+baseline (a different code path). ``--update`` rewrites the baseline.
+
+    python -m benchmarks.bench_pages --rows 600 100000 1000000 --check
+    python -m benchmarks.bench_pages --rows 600 --pages app 5 --update
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import print_table, synthetic_feature_table
+from dashboard.data import DATE_COLUMN
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baselines" / "pages.json"
+SCRIPTS = ["app.py"] + sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py"))
+DEFAULT_ROWS = [600, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.5
+# Differences below these never count as regressions (timer and allocator noise).
+SLACK = {"cold_s": 0.25, "warm_s": 0.05, "peak_mb": 50.0}
+# Date widgets only take dates in Streamlit's representable range (1684..2255).
+FIRST_DAY, LAST_DAY = pd.Timestamp("1700-01-01"), pd.Timestamp("2250-12-31")
+# Table the artifacts are built on: past the 360-day feature history, with
+# room for the interval backtest's minimum number of weekly origins.
+ARTIFACT_ROWS = 1000
+# The cheapest feature model for the 90-day recursive interval backtest.
+INTERVALS_MODEL = "Ridge (Linear)"
+
+
+def write_page_table(n_rows, directory):
+    """Synthetic feature CSV whose dates fit the pages' date widgets.
+
+    Up to ~200k rows this is one row per day; longer tables share days
+    (several rows per date), which the pages' groupbys take as is.
+    """
+    table = synthetic_feature_table(n_rows)
+    span = (LAST_DAY - FIRST_DAY).days + 1
+    offsets = np.arange(n_rows) * min(span, n_rows) // n_rows
+    table[DATE_COLUMN] = FIRST_DAY + pd.to_timedelta(offsets, unit="D")
+    path = Path(directory) / f"features_{n_rows}.csv"
+    table.to_csv(path, index=False, date_format="%Y-%m-%d")
+    return path
+
+
+def build_artifacts(path):
+    """Store the evaluation, feature selection, SHAP and intervals of the table at ``path``."""
+    from dashboard import evaluation, explain, intervals, selection
+
+    evaluation.run(path)
+    selection.run(path)
+    explain.run(path)
+    intervals.run(path, INTERVALS_MODEL)
+
+
+def prepare_table(path):
+    """Build the sidecar and the champion's fitted model of the table at ``path``."""
+    from dashboard.data import read_feature_table_cached
+    from dashboard.forecast import load_model
+
+    read_feature_table_cached(path)
+    load_model(path)
+
+
+def stored_artifacts():
+    """Artifact kinds with at least one stored artifact, as the pages see them."""
+    from dashboard.artifacts import ARTIFACTS_DIR
+
+    return sorted(p.name for p in ARTIFACTS_DIR.glob("*") if any(p.glob("*.json")))
+
+
+def page_id(script):
+    """``app`` or the page number, e.g. ``5``."""
+    name = Path(script).stem
+    return name if name == "app" else name.split("_", 1)[0]
+
+
+# ---------------------------------------------------------------------------
+# Child: one page on one table
+# ---------------------------------------------------------------------------
+
+def run_page(script, repeat):
+    """Measurements of ``script`` in this (fresh) process."""
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.common import app_elements, payload_bytes
+
+    app = AppTest.from_file(str(ROOT / script), default_timeout=3600)
+    start = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - start
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - start)
+    return {
+        "cold_s": cold,
+        "warm_s": statistics.median(warm) if warm else None,
+        # ru_maxrss is in KiB on Linux.
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "elements": len(app_elements(app._tree)),
+        "payload_kb": payload_bytes(app._tree) / 1024,
+        "artifacts": stored_artifacts(),
+        "error": str(app.exception[0].value) if app.exception else None,
+    }
+
+
+def child(args, path, artifacts_dir, **kwargs):
+    """Run this script with ``args`` on the table at ``path`` in a subprocess."""
+    env = {**os.environ, "DASHBOARD_DATA_PATH": str(path), "DASHBOARD_ARTIFACTS_DIR": str(artifacts_dir),
+           "DASHBOARD_BACKGROUND_JOBS": "0", "PYTHONPATH": str(ROOT)}
+    return subprocess.run([sys.executable, "-m", "benchmarks.bench_pages", *args],
+                          cwd=ROOT, env=env, text=True, **kwargs)
+
+
+def measure(script, path, artifacts_dir, repeat):
+    """Run ``script`` on the table at ``path`` in a subprocess."""
+    done = child(["--child", script, "--repeat", str(repeat)], path, artifacts_dir, capture_output=True)
+    if done.returncode != 0:
+        return {"error": done.stderr.strip().splitlines()[-1] if done.stderr.strip() else "crashed"}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------------------------
+# Regression gate
+# ---------------------------------------------------------------------------
+
+def regressions(results, baseline, threshold):
+    """Human-readable list of the measurements that got worse than ``baseline``."""
+    found = []
+    for key, result in results.items():
+        if result.get("error"):
+            found.append(f"{key}: {result['error']}")
+            continue
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if before.get("artifacts") != result.get("artifacts"):
+            found.append(f"{key}: read artifacts {result.get('artifacts')}, "
+                         f"baseline {before.get('artifacts')}; not comparable")
+            continue
+        for metric, slack in SLACK.items():
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > slack:
+                found.append(f"{key} {metric}: {old:.3f} -> {new:.3f} (+{new / old - 1:.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--pages", nargs="+", help="app and/or page numbers (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="warm reruns per page")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative growth (default: 0.5)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--prepare", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--build-artifacts", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_page(args.child, args.repeat)))
+        return
+    if args.prepare or args.build_artifacts:
+        from dashboard.data import DATA_PATH
+
+        (prepare_table if args.prepare else build_artifacts)(DATA_PATH)
+        return
+
+    scripts = [s for s in SCRIPTS if not args.pages or page_id(s) in args.pages]
+    results, rows = {}, []
+    with tempfile.TemporaryDirectory() as directory:
+        artifacts_dir = Path(directory) / "artifacts"
+        started = time.perf_counter()
+        child(["--build-artifacts"], write_page_table(ARTIFACT_ROWS, directory), artifacts_dir,
+              check=True, stdout=subprocess.DEVNULL)
+        print(f"artifacts built in {time.perf_counter() - started:.0f}s")
+        for n_rows in args.rows:
+            path = write_page_table(n_rows, directory)
+            # Build the sidecar and the model once so every page starts like after a restart.
+            child(["--prepare"], path, artifacts_dir, check=True, stdout=subprocess.DEVNULL)
+            for script in scripts:
+                result = measure(script, path, artifacts_dir, args.repeat)
+                results[f"{n_rows}/{page_id(script)}"] = result
+                rows.append([n_rows, Path(script).stem, result.get("cold_s"), result.get("warm_s"),
+                             result.get("peak_mb"), result.get("elements"), result.get("payload_kb"),
+                             result.get("error") or ""])
+    print_table(rows, ["rows", "page", "cold_s", "warm_s", "peak_mb", "elements", "payload_kb", "error"])
+
+    if args.update:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update({k: {m: v if m == "artifacts" else round(v, 3) for m, v in r.items() if m != "error"}
+                         for k, r in results.items() if not r.get("error")})
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(dict(sorted(baseline.items())), indent=1) + "\n")
+        print(f"baseline -> {args.baseline}")
+    if args.check:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        found = regressions(results, baseline, args.threshold)
+        for line in found:
+            print("REGRESSION", line)
+        if found:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} "
+              f"({sum(k in baseline for k in results)} of {len(results)} pages have a baseline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Capacity percentiles: separate np.percentile calls vs. one selection pass
+vs. the streaming digest.
+
+Reports the time for the page-3 percentiles (50/75/90/95/99 plus the peak
+threshold) and the digest's worst rank error, both when fed day by day in
+chunks and when merged from independently built shards.
+
+    python -m benchmarks.bench_quantiles --rows 100000 1000000 10000000
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.common import print_table, synthetic_orders, timed
+from dashboard.aggregates import PEAK_PERCENTILE, PERCENTILES
+from dashboard.data import TARGET_COLUMN
+from dashboard.quantiles import TDigest, percentiles
+
+PS = list(PERCENTILES) + [PEAK_PERCENTILE]
+CHUNKS = 100
+SHARDS = 8
+
+
+def rank_error(sorted_values, estimates):
+    ranks = np.searchsorted(sorted_values, estimates) / len(sorted_values)
+    return float(np.abs(ranks - np.asarray(PS) / 100).max())
+
+
+def bench(n_rows):
+    y = synthetic_orders(n_rows)[TARGET_COLUMN].to_numpy(dtype=float)
+    separate_s, expected = timed(lambda: [np.percentile(y, p) for p in PS])
+    single_s, got = timed(percentiles, y, PS)
+    assert np.array_equal(expected, got)
+
+    def streamed():
+        digest = TDigest()
+        for chunk in np.array_split(y, CHUNKS):
+            digest.update(chunk)
+        return digest
+
+    def merged():
+        shards = [TDigest().update(part) for part in np.array_split(y, SHARDS)]
+        for shard in shards[1:]:
+            shards[0].merge(shard)
+        return shards[0]
+
+    stream_s, digest = timed(streamed)
+    merge_s, combined = timed(merged)
+    ordered = np.sort(y)
+    return [n_rows, separate_s, single_s, stream_s, rank_error(ordered, digest.percentiles(PS)),
+            merge_s, rank_error(ordered, combined.percentiles(PS)), len(digest.means)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+    print_table([bench(n) for n in args.rows],
+                ["rows", "separate_s", "single_pass_s", "digest_s", "digest_rank_err",
+                 "merge_s", "merged_rank_err", "centroids"])
+
+
+if __name__ == "__main__":
+    main()
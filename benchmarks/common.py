@@ -0,0 +1,83 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks are plain scripts, run from the repository root:
+
+    python -m benchmarks.bench_data_loading --rows 611 100000 1000000
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+from dashboard.data import DATE_COLUMN, SERIES_COLUMN, TARGET_COLUMN
+from dashboard.features import build_features
+
+# Streamlit caches work outside `streamlit run` but log a warning per call.
+streamlit.logger.set_log_level("error")
+
+
+def synthetic_orders(n_rows, seed=0):
+    """Daily order counts with trend, weekly seasonality and Poisson noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_rows)
+    # Second resolution keeps multi-millennium daily ranges representable.
+    dates = pd.date_range("1990-01-01", periods=n_rows, freq="D", unit="s")
+    level = 150 + 50 * np.sin(2 * np.pi * t / 365.25) + 20 * (dates.dayofweek < 5)
+    return pd.DataFrame({DATE_COLUMN: dates, TARGET_COLUMN: rng.poisson(level)})
+
+
+def synthetic_series_orders(n_series, n_days, seed=0):
+    """Long table of ``n_series`` series with random levels and phases."""
+    rng = np.random.default_rng(seed)
+    t = np.tile(np.arange(n_days), n_series)
+    scale = np.repeat(rng.uniform(1, 50, n_series), n_days)
+    phase = np.repeat(rng.uniform(0, 2 * np.pi, n_series), n_days)
+    dates = pd.date_range("2016-10-01", periods=n_days, freq="D")
+    level = scale * (1.2 + np.sin(2 * np.pi * t / 365.25 + phase))
+    return pd.DataFrame({
+        SERIES_COLUMN: np.repeat([f"S{i:05d}" for i in range(n_series)], n_days),
+        DATE_COLUMN: np.tile(dates, n_series),
+        TARGET_COLUMN: rng.poisson(level),
+    })
+
+
+def synthetic_feature_table(n_rows, seed=0):
+    """Feature table with the schema of ``demand_features_final.csv``."""
+    return build_features(synthetic_orders(n_rows, seed))
+
+
+def write_synthetic_csv(n_rows, directory):
+    path = Path(directory) / f"features_{n_rows}.csv"
+    synthetic_feature_table(n_rows).to_csv(path, index=False, date_format="%Y-%m-%d")
+    return path
+
+
+def timed(func, *args, repeat=1, **kwargs):
+    """Run ``func`` and return (best seconds, last result)."""
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_table(rows, columns):
+    print(pd.DataFrame(rows, columns=columns).to_string(index=False))
+
+
+def app_elements(node):
+    """Leaf elements under a ``streamlit.testing`` node (what a page run emitted)."""
+    children = getattr(node, "children", None)
+    if children:
+        return [leaf for child in children.values() for leaf in app_elements(child)]
+    return [node] if getattr(node, "proto", None) is not None else []
+
+
+def payload_bytes(node):
+    """Serialized size of the elements under ``node`` (what the browser receives)."""
+    return sum(leaf.proto.ByteSize() for leaf in app_elements(node))
@@ -0,0 +1,7 @@
+"""
+============================================
+DEMAND FORECASTING DASHBOARD - SHARED CODE
+============================================
+Helpers shared by ``app.py`` and the scripts in ``pages/``.
+============================================
+"""
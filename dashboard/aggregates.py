@@ -0,0 +1,103 @@
+"""
+Materialised summaries for the EDA pages (1-3).
+
+``compute_aggregates()`` does every groupby / rolling / percentile the EDA
+pages draw from in one go. ``load_aggregates()`` memoises the result per
+dataset version (and series key) on disk, so it is computed once and
+then served to every page, session and worker process; a page rerun is a
+lookup. The ``timeline`` entry answers the sidebar date-range and
+granularity filter by slicing (see ``dashboard.timeline``).
+
+The capacity percentiles of the aggregate table come from its persisted
+t-digest (``dashboard.quantiles.table_digest``), which ``dashboard.ingest``
+updates with the appended days only. A series is summarised with the
+exact single-pass ``percentiles()``.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from dashboard.data import (
+    DATA_PATH,
+    DATE_COLUMN,
+    SERIES_PATH,
+    TARGET_COLUMN,
+    dataset_version,
+    load_data,
+    load_series,
+)
+from dashboard.profiling import section, tracked_cache
+from dashboard.quantiles import percentiles, table_digest
+from dashboard.timeline import Timeline
+
+PERCENTILES = (50, 75, 90, 95, 99)
+PEAK_PERCENTILE = 90
+# Part of the disk cache key: bump whenever compute_aggregates() changes shape.
+LAYOUT = 4
+
+
+def compute_aggregates(df, digest=None):
+    """All summaries used by pages 1-3, keyed by name.
+
+    ``digest`` (a ``TDigest`` of the target) answers the percentiles instead
+    of a selection pass over ``df``.
+    """
+    y = df[TARGET_COLUMN].astype(float)
+    ordered = df.sort_values(DATE_COLUMN)
+    y_sorted = ordered[TARGET_COLUMN].astype(float).reset_index(drop=True)
+
+    weekday = y.groupby(df['dayofweek']).agg(['mean', 'std', 'min', 'max']).reset_index()
+
+    trend = pd.DataFrame({
+        DATE_COLUMN: ordered[DATE_COLUMN].to_numpy(),
+        TARGET_COLUMN: ordered[TARGET_COLUMN].to_numpy(),
+        'rolling_7': y_sorted.rolling(window=7).mean(),
+        'rolling_30': y_sorted.rolling(window=30).mean(),
+    })
+
+    rolling_std = y_sorted.rolling(window=14).std()
+    rolling_mean = y_sorted.rolling(window=14).mean()
+    volatility = pd.DataFrame({
+        DATE_COLUMN: ordered[DATE_COLUMN].to_numpy(),
+        'rolling_std': rolling_std,
+        'rolling_mean': rolling_mean,
+        'cv': rolling_std / rolling_mean * 100,
+    })
+
+    # Capacity percentiles and the peak threshold from the digest or one selection pass.
+    ps = list(PERCENTILES) + [PEAK_PERCENTILE]
+    levels = digest.percentiles(ps) if digest is not None else percentiles(y.to_numpy(), ps)
+    threshold = levels[-1]
+    peak_days = df.loc[(y >= threshold).to_numpy(), 'dayofweek']
+
+    return {
+        'summary': {
+            'days': len(df), 'sum': y.sum(), 'mean': y.mean(), 'std': y.std(),
+            'min': y.min(), 'max': y.max(),
+            'start': ordered[DATE_COLUMN].iloc[0], 'end': ordered[DATE_COLUMN].iloc[-1],
+        },
+        'weekday': weekday,
+        'trend': trend,
+        'volatility': volatility,
+        'timeline': Timeline.from_frame(ordered),
+        'percentiles': dict(zip(PERCENTILES, levels[:-1])),
+        'peaks': {
+            'threshold': threshold,
+            'count': len(peak_days),
+            'by_dayofweek': peak_days.value_counts().sort_index(),
+        },
+    }
+
+
+@tracked_cache(st.cache_data, show_spinner="Özetler hesaplanıyor...", persist="disk")
+def _cached_aggregates(version, series, layout):
+    if series is None:
+        return compute_aggregates(load_data(), table_digest(DATA_PATH))
+    return compute_aggregates(load_series(series))
+
+
+def load_aggregates(series=None):
+    """Summaries for the aggregate table or one series, computed once per version."""
+    with section("load_aggregates", "aggregate"):
+        version = dataset_version(DATA_PATH if series is None else SERIES_PATH)
+        return _cached_aggregates(version, series, LAYOUT)
@@ -0,0 +1,94 @@
+"""
+Versioned result artifacts (evaluation runs, explanations, ...).
+
+Offline jobs write one JSON file per dataset version under
+``artifacts/<kind>/<version>.json``; the pages only ever read them. When no
+artifact exists for the current data yet, the most recent one is served so
+the pages keep working while a new run is pending (``background_job()``
+starts that run).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from dashboard.data import ROOT, dataset_version
+from dashboard.profiling import tracked_cache
+
+# DASHBOARD_ARTIFACTS_DIR keeps another table's artifacts apart (benchmarks use a temporary one).
+ARTIFACTS_DIR = Path(os.environ.get("DASHBOARD_ARTIFACTS_DIR", ROOT / "artifacts"))
+
+
+def artifact_path(kind, version, root=ARTIFACTS_DIR):
+    return Path(root) / kind / f"{version}.json"
+
+
+def write_artifact(kind, version, payload, root=ARTIFACTS_DIR):
+    """Atomically write ``payload`` as the ``kind`` artifact of ``version``."""
+    target = artifact_path(kind, version, root)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".json")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(payload, fh, indent=1)
+    os.chmod(tmp, 0o644)  # mkstemp creates owner-only files
+    os.replace(tmp, target)
+    return target
+
+
+def find_artifact(kind, version=None, root=ARTIFACTS_DIR):
+    """Path of the artifact for ``version``, else the newest one, else None."""
+    if version is not None and artifact_path(kind, version, root).exists():
+        return artifact_path(kind, version, root)
+    candidates = sorted((Path(root) / kind).glob("*.json"), key=lambda p: p.stat().st_mtime)
+    return candidates[-1] if candidates else None
+
+
+def read_artifact(kind, version=None, root=ARTIFACTS_DIR):
+    path = find_artifact(kind, version, root)
+    return None if path is None else json.loads(path.read_text())
+
+
+@tracked_cache(st.cache_data, kind="load", show_spinner=False, max_entries=16)
+def _cached_artifact(path, mtime_ns):
+    return json.loads(Path(path).read_text())
+
+
+def load_artifact(kind, version=None):
+    """``read_artifact`` memoised per file version, for the pages."""
+    path = find_artifact(kind, version)
+    if path is None:
+        return None
+    return _cached_artifact(str(path), path.stat().st_mtime_ns)
+
+
+@tracked_cache(st.cache_resource, max_entries=8)
+def background_job(module, version):
+    """Run ``python -m module`` once per (module, version) and server process.
+
+    A separate interpreter, so offline jobs never run inside (or fork) the
+    server; the page keeps serving the previous artifact until it lands.
+    ``DASHBOARD_BACKGROUND_JOBS=0`` disables them (returns None).
+    """
+    if os.environ.get("DASHBOARD_BACKGROUND_JOBS") == "0":
+        return None
+    return subprocess.Popen([sys.executable, "-m", module], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def load_evaluation():
+    """Latest model evaluation (``python -m dashboard.evaluation``), or None."""
+    return load_artifact("evaluation", dataset_version())
+
+
+def metrics_table(evaluation):
+    """Model / RMSE / MAE / R2 frame of an evaluation, best RMSE first."""
+    return (pd.DataFrame(evaluation["summary"])
+            .rename(columns={"model": "Model", "rmse": "RMSE", "mae": "MAE", "r2": "R2"})
+            [["Model", "RMSE", "MAE", "R2"]]
+            .sort_values("RMSE", ignore_index=True))
@@ -0,0 +1,225 @@
+"""
+Rolling-origin backtesting engine.
+
+A backtest is a set of folds over a time axis of ``n_periods`` steps (the
+rows of a single daily table, or the distinct days of a long multi-series
+table). Each fold is a ``(train_start, train_stop, test_stop)`` triple of
+period indices: the model is fitted on periods [train_start, train_stop)
+and scored on [train_stop, test_stop). ``backtest_folds()`` generates them
+for an expanding window (``train_start`` always 0) or a sliding one of
+fixed length, with any horizon and step.
+
+``run_backtest()`` fits every (model, fold) pair in a process pool
+(``fold_pool()``, also used by the tuner to schedule folds itself). The
+input arrays are copied once into ``multiprocessing.shared_memory`` and
+every worker maps them instead of receiving its own pickled copy, so the
+start-up cost does not grow with the number of workers. Rows are sorted by
+period, so the train and test rows of a fold are contiguous slices (views,
+not copies) of the shared arrays. ``budget`` caps the wall time: when it
+runs out, the fits still running are terminated and reported as unfinished.
+
+``fold_metrics()`` scores all folds at once from the concatenated test
+predictions.
+"""
+
+import concurrent.futures as cf
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_HORIZON = 30
+
+
+# ---------------------------------------------------------------------------
+# Folds
+# ---------------------------------------------------------------------------
+
+def backtest_folds(n_periods, horizon=DEFAULT_HORIZON, step=None, n_folds=None,
+                   window=None, min_train=None):
+    """(k, 3) int array of ``(train_start, train_stop, test_stop)`` folds.
+
+    The last fold ends at ``n_periods``; earlier ones start ``step``
+    (default: ``horizon``) periods apart. Without ``n_folds`` every fold with
+    at least ``min_train`` (default: ``2 * horizon``) training periods is
+    kept. ``window`` switches from an expanding to a sliding training window
+    of that many periods.
+    """
+    step = step or horizon
+    min_train = min_train or (window or 2 * horizon)
+    if window is not None and window < min_train:
+        raise ValueError(f"a sliding window of {window} is shorter than min_train={min_train}")
+    available = (n_periods - horizon - min_train) // step + 1
+    if available < 1 or (n_folds is not None and n_folds > available):
+        raise ValueError(f"{n_periods} periods are too few for "
+                         f"{n_folds or 1} folds of {horizon} (step {step}, min_train {min_train})")
+    k = available if n_folds is None else n_folds
+    test_stop = n_periods - step * np.arange(k)[::-1]
+    train_stop = test_stop - horizon
+    train_start = np.zeros(k, dtype=np.int64) if window is None else train_stop - window
+    return np.column_stack([train_start, train_stop, test_stop]).astype(np.int64)
+
+
+def period_index(dates):
+    """(period of every row, sorted distinct dates) for a table of any row order."""
+    unique, period = np.unique(np.asarray(dates), return_inverse=True)
+    return period.astype(np.int64), unique
+
+
+# ---------------------------------------------------------------------------
+# Shared memory
+# ---------------------------------------------------------------------------
+
+class SharedArrays:
+    """Numpy arrays copied once into shared memory, attachable by name from workers."""
+
+    def __init__(self, **arrays):
+        self._segments = []
+        self.specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+            self._segments.append(segment)
+            self.specs[name] = (segment.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(specs):
+        """(arrays by name, segments to keep alive) in the calling process."""
+        arrays, segments = {}, []
+        for name, (segment_name, shape, dtype) in specs.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            segments.append(segment)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=segment.buf)
+        return arrays, segments
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_WORKER = {}
+
+
+def _init_worker(task, specs):
+    arrays, segments = SharedArrays.attach(specs)
+    _WORKER.update(task=task, arrays=arrays, segments=segments)
+
+
+def _run_fold(model, fold, train, test):
+    start, cpu_start = time.perf_counter(), time.process_time()
+    predicted = np.asarray(_WORKER["task"](model, _WORKER["arrays"], train, test), dtype=float)
+    return model, fold, predicted, time.perf_counter() - start, time.process_time() - cpu_start
+
+
+def fold_pool(task, shared, max_workers=None, mp_context=None):
+    """Process pool whose workers map ``shared`` and run ``task`` via ``submit_fold()``."""
+    return cf.ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=mp_context,
+                                  initializer=_init_worker, initargs=(task, shared.specs))
+
+
+def stop_pool(pool, terminate=False):
+    """Shut ``pool`` down; with ``terminate``, kill the workers still fitting instead of waiting."""
+    if terminate:
+        # ProcessPoolExecutor cannot cancel a running call and its processes are
+        # not public API: without them this degrades to a waiting shutdown.
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def submit_fold(pool, model, fold, train, test):
+    """Future of ``(model, fold, predictions, seconds, cpu seconds)``.
+
+    ``model`` is passed to the task as is (a name, or a name plus params).
+    """
+    return pool.submit(_run_fold, model, fold, train, test)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def row_slices(period, folds):
+    """(train, test) row slices of every fold, for rows sorted by ``period``."""
+    bounds = np.searchsorted(period, folds)
+    return [(slice(a, b), slice(b, c)) for a, b, c in bounds]
+
+
+def run_backtest(task, arrays, period, folds, models, budget=None, max_workers=None,
+                 mp_context=None):
+    """Fit ``models`` on every fold in a process pool over shared arrays.
+
+    ``task(name, arrays, train, test)`` is a module-level function that fits
+    model ``name`` on the ``train`` rows of ``arrays`` and returns its
+    predictions for the ``test`` rows. ``period`` (sorted, one entry per
+    row) maps rows to the time axis of ``folds``.
+
+    Returns ``{(name, fold): (predictions, fit seconds)}`` for the fits that
+    finished within ``budget`` seconds and the number that did not. Fits
+    still running at the deadline are terminated, so the call returns
+    shortly after ``budget`` seconds.
+    ``mp_context`` selects the start method (default: the platform's).
+    """
+    started = time.perf_counter()
+    period = np.asarray(period)
+    if np.any(period[1:] < period[:-1]):
+        raise ValueError("rows must be sorted by period")
+    slices = row_slices(period, folds)
+    results = {}
+    with SharedArrays(**arrays) as shared:
+        pool = fold_pool(task, shared, max_workers, mp_context)
+        pending = set()
+        try:
+            pending = {submit_fold(pool, name, k, train, test)
+                       for name in models for k, (train, test) in enumerate(slices)}
+            timeout = None if budget is None else max(budget - (time.perf_counter() - started), 0)
+            done, pending = cf.wait(pending, timeout=timeout)
+            for future in done:
+                name, k, predicted, seconds, _ = future.result()
+                results[(name, k)] = (predicted, seconds)
+        finally:
+            # Workers must be gone before the segments are unlinked.
+            stop_pool(pool, terminate=bool(pending))
+    return results, len(pending)
+
+
+def scores(actual, predicted):
+    error = predicted - actual
+    ss_tot = ((actual - actual.mean()) ** 2).sum()
+    return {
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "mae": float(np.mean(np.abs(error))),
+        "r2": float(1 - (error ** 2).sum() / ss_tot) if ss_tot > 0 else float("nan"),
+    }
+
+
+def fold_metrics(actual, predicted, lengths):
+    """RMSE / MAE / R2 / bias of consecutive folds of ``lengths`` rows, in one pass.
+
+    ``actual`` and ``predicted`` are the test rows of all folds concatenated.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    error = np.asarray(predicted, dtype=float) - np.asarray(actual, dtype=float)
+    n = lengths.astype(float)
+    mean_actual = np.add.reduceat(actual, starts) / n
+    ss_res = np.add.reduceat(error ** 2, starts)
+    ss_tot = np.add.reduceat((actual - np.repeat(mean_actual, lengths)) ** 2, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.nan)
+    return {
+        "rmse": np.sqrt(ss_res / n),
+        "mae": np.add.reduceat(np.abs(error), starts) / n,
+        "r2": r2,
+        "bias": np.add.reduceat(error, starts) / n,
+    }
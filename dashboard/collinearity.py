@@ -0,0 +1,116 @@
+"""
+Multicollinearity analysis for the correlation heatmap.
+
+The lag / rolling / ewma families of the feature table move together, so
+``collinearity()`` measures and prunes that redundancy:
+
+- ``variance_inflation()`` gives every column's VIF at once as the diagonal
+  of the inverse correlation matrix of the complete rows (no per-column
+  regressions),
+- the columns are clustered hierarchically (average linkage on
+  ``1 - |r|``); the dendrogram's leaf order is the heatmap order,
+- ``reduced_features()`` keeps the column most correlated with the target
+  from each cluster of ``|r| >= CLUSTER_THRESHOLD`` and then drops the
+  highest-VIF survivor until every VIF is below ``VIF_THRESHOLD``.
+
+``cached_collinearity()`` memoises the result per dataset version.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+from dashboard.correlation import correlation_matrix, target_correlations
+from dashboard.data import DATE_COLUMN, TARGET_COLUMN, load_data, load_series
+from dashboard.profiling import tracked_cache
+
+CLUSTER_THRESHOLD = 0.9
+VIF_THRESHOLD = 10.0
+
+
+def variance_inflation(X):
+    """VIF of each column of X over its complete rows.
+
+    Columns in an exact linear dependence get inf, constant columns NaN.
+    """
+    X = np.asarray(X, dtype=float)
+    X = X[~np.isnan(X).any(axis=1)]
+    std = X.std(axis=0)
+    varying = std > 0
+    vif = np.full(X.shape[1], np.nan)
+    Z = (X[:, varying] - X[:, varying].mean(axis=0)) / std[varying]
+    # diag(R^-1) from the eigendecomposition; null directions make it infinite.
+    w, V = np.linalg.eigh(Z.T @ Z / max(len(Z), 1))
+    null = w <= max(w.max(initial=0.0), 1.0) * 1e-10
+    inverse_diag = (V[:, ~null] ** 2 / w[~null]).sum(axis=1)
+    inverse_diag[(V[:, null] ** 2).sum(axis=1) > 1e-8] = np.inf
+    vif[varying] = np.maximum(inverse_diag, 1.0)
+    return vif
+
+
+def cluster_columns(corr, threshold=CLUSTER_THRESHOLD):
+    """(cluster label per column, dendrogram leaf order) of a correlation matrix."""
+    distance = 1.0 - np.abs(np.nan_to_num(np.asarray(corr, dtype=float), nan=0.0))
+    np.fill_diagonal(distance, 0.0)
+    tree = linkage(squareform(np.clip(distance, 0.0, 1.0), checks=False), method="average")
+    return fcluster(tree, t=1.0 - threshold, criterion="distance"), leaves_list(tree)
+
+
+def reduced_features(X, columns, clusters, relevance, vif_threshold=VIF_THRESHOLD):
+    """(kept columns, {dropped column: (reason, detail)}) after cluster and VIF pruning.
+
+    ``relevance`` ranks the columns within a cluster (higher is kept). A
+    column dropped for its cluster gets ``("cluster", kept column)``, one
+    dropped for its VIF ``("vif", value)``.
+    """
+    columns = list(columns)
+    relevance = pd.Series(relevance, index=columns).fillna(-np.inf)
+    dropped = {}
+    kept = []
+    for label in pd.unique(clusters):
+        members = [c for c, k in zip(columns, clusters) if k == label]
+        best = relevance[members].idxmax()
+        kept.append(best)
+        dropped.update({c: ("cluster", best) for c in members if c != best})
+
+    X = pd.DataFrame(np.asarray(X, dtype=float), columns=columns)
+    while len(kept) > 1:
+        vif = pd.Series(variance_inflation(X[kept].to_numpy()), index=kept)
+        worst = vif.idxmax()
+        if not vif[worst] >= vif_threshold:
+            break
+        kept.remove(worst)
+        dropped[worst] = ("vif", float(vif[worst]))
+    return [c for c in columns if c in kept], dropped
+
+
+def collinearity(df, columns=None, target=TARGET_COLUMN, threshold=CLUSTER_THRESHOLD,
+                 vif_threshold=VIF_THRESHOLD):
+    """VIF, clusters, heatmap order and reduced feature set of the numeric feature columns."""
+    if columns is None:
+        columns = df.select_dtypes(include="number").columns.drop([target, DATE_COLUMN], errors="ignore")
+    columns = list(columns)
+    X = df[columns].to_numpy(dtype=float)
+    corr = correlation_matrix(df, columns)
+    clusters, order = cluster_columns(corr.to_numpy(), threshold)
+    relevance = target_correlations(df, target, columns).abs()
+    kept, dropped = reduced_features(X, columns, clusters, relevance.to_numpy(), vif_threshold)
+    ordered = [columns[i] for i in order]
+    return {
+        "vif": pd.Series(variance_inflation(X), index=columns, name="vif"),
+        "clusters": pd.Series(clusters, index=columns, name="cluster"),
+        "order": ordered,
+        "correlation": corr.loc[ordered, ordered],
+        "kept": kept,
+        "dropped": dropped,
+        "kept_vif": pd.Series(variance_inflation(df[kept].to_numpy(dtype=float)), index=kept, name="vif"),
+    }
+
+
+@tracked_cache(st.cache_data, show_spinner=False, max_entries=32)
+def cached_collinearity(version, threshold=CLUSTER_THRESHOLD, vif_threshold=VIF_THRESHOLD, series=None):
+    """``collinearity`` memoised per dataset version and thresholds."""
+    df = load_data() if series is None else load_series(series)
+    return collinearity(df, threshold=threshold, vif_threshold=vif_threshold)
@@ -0,0 +1,96 @@
+"""
+Correlation service for the feature pages.
+
+``target_correlations()`` correlates every feature with the target in a
+single vectorised pass over pairwise-complete rows (the same NaN handling as
+``DataFrame.corr``) without building the N x N matrix. The full matrix is
+only computed by ``correlation_matrix()`` for the heatmap. Both accept
+``method="pearson"`` or ``"spearman"``; the ``cached_*`` wrappers memoise
+results per dataset version.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.data import TARGET_COLUMN, load_data, load_series
+from dashboard.profiling import tracked_cache
+
+METHODS = ("pearson", "spearman")
+
+
+def _pearson_against(X, y):
+    """Pearson r of each column of X with y over rows where both are present."""
+    mask = ~np.isnan(X) & ~np.isnan(y)[:, None]
+    n = mask.sum(axis=0)
+    # Centering first keeps the sums well conditioned; r is shift-invariant.
+    Xc = np.where(mask, X - np.nanmean(X, axis=0), 0.0)
+    Yc = np.where(mask, (y - np.nanmean(y))[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sx, sy = Xc.sum(axis=0), Yc.sum(axis=0)
+        cov = (Xc * Yc).sum(axis=0) - sx * sy / n
+        var_x = (Xc * Xc).sum(axis=0) - sx * sx / n
+        var_y = (Yc * Yc).sum(axis=0) - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    r[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def _spearman_against(X, y):
+    """Spearman rho per column, ranking within each column's complete rows."""
+    mask = ~np.isnan(X) & ~np.isnan(y)[:, None]
+    rho = np.full(X.shape[1], np.nan)
+    # Lag / momentum columns share a handful of NaN layouts; rank once per layout.
+    patterns, group = np.unique(np.packbits(mask, axis=0).T, axis=0, return_inverse=True)
+    for g in range(len(patterns)):
+        cols = np.flatnonzero(group.ravel() == g)
+        rows = mask[:, cols[0]]
+        if rows.sum() < 2:
+            continue
+        ranked_x = pd.DataFrame(X[rows][:, cols]).rank().to_numpy()
+        ranked_y = pd.Series(y[rows]).rank().to_numpy()
+        rho[cols] = _pearson_against(ranked_x, ranked_y)
+    return rho
+
+
+def target_correlations(df, target=TARGET_COLUMN, columns=None, method="pearson"):
+    """Series of correlations between ``target`` and each numeric column."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    if columns is None:
+        columns = df.select_dtypes(include="number").columns.drop(target, errors="ignore")
+    X = df[list(columns)].to_numpy(dtype=float)
+    y = df[target].to_numpy(dtype=float)
+    compute = _pearson_against if method == "pearson" else _spearman_against
+    return pd.Series(compute(X, y), index=columns, name=target)
+
+
+def correlation_matrix(df, columns, method="pearson"):
+    """Full correlation matrix of ``columns`` (pairwise-complete)."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    data = df[list(columns)]
+    values = data.to_numpy(dtype=float)
+    if np.isnan(values).any():
+        return data.astype(float).corr(method=method)
+    if method == "spearman":
+        values = data.rank().to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = np.corrcoef(values, rowvar=False)
+    return pd.DataFrame(matrix, index=data.columns, columns=data.columns)
+
+
+def _table(series):
+    return load_data() if series is None else load_series(series)
+
+
+@tracked_cache(st.cache_data, show_spinner=False, max_entries=32)
+def cached_target_correlations(version, method="pearson", target=TARGET_COLUMN, series=None):
+    """``target_correlations`` memoised per dataset version."""
+    return target_correlations(_table(series), target, method=method)
+
+
+@tracked_cache(st.cache_data, show_spinner=False, max_entries=32)
+def cached_correlation_matrix(version, columns, method="pearson", series=None):
+    """``correlation_matrix`` memoised per dataset version and column set."""
+    return correlation_matrix(_table(series), list(columns), method=method)
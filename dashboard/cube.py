@@ -0,0 +1,280 @@
+"""
+Time-hierarchy rollup cube for drill-downs over one or many series.
+
+A ``RollupCube`` stores one cell per series and period at each grain (day →
+week → month → year), plus month × weekday cells. Each cell holds the count,
+sum, mean and M2 (sum of squared deviations from the mean) of the target.
+Day cells are built from the rows. Every coarser level is combined from
+the day cells with Chan's parallel formula. ``update()`` merges the cells of
+appended rows the same way. Cells are ordered by period, so appended days
+only regroup the last periods of each level.
+
+``cells()`` cuts a level to a series and date range with ``searchsorted``.
+Periods that the range cuts through are rebuilt from the day cells inside
+it, so a window is exact without touching the rows. ``combine()`` /
+``frame()`` merge cells over any keys::
+
+    cube.frame("month")                                     # year-month (Jan 2017 != Jan 2018)
+    cube.frame("month", split="dayofweek", by=("period", "dayofweek"))   # weekday by month
+    cube.frame("week", by=("series", "period"))             # category by week
+
+The cube of a table version is persisted next to its sidecar
+(``.cache/<table>-cube.pkl``). ``dashboard.ingest`` keeps it current with
+the appended days only.
+"""
+
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.data import (
+    CACHE_DIR_NAME,
+    DATA_PATH,
+    DATE_COLUMN,
+    SERIES_COLUMN,
+    SERIES_PATH,
+    TARGET_COLUMN,
+    dataset_version,
+    read_feature_table_cached,
+)
+from dashboard.profiling import tracked_cache
+from dashboard.timeline import period_starts
+
+TOTAL = "total"  # series label of a table without a series column
+LEVELS = (("day", None), ("week", None), ("month", None), ("year", None), ("month", "dayofweek"))
+STATS = ("count", "sum", "mean", "m2")
+DAY = np.timedelta64(1, "D")
+
+
+def _weekday(days):
+    """Monday = 0 ... Sunday = 6 of datetime64 days."""
+    return ((np.asarray(days, dtype="datetime64[D]").astype(np.int64) + 3) % 7).astype(np.int8)
+
+
+def next_period_start(starts, grain):
+    """Start of the period after each period start."""
+    starts = np.asarray(starts, dtype="datetime64[ns]")
+    if grain == "day":
+        return starts + DAY
+    if grain == "week":
+        return starts + 7 * DAY
+    unit = {"month": "M", "year": "Y"}[grain]
+    return (starts.astype(f"datetime64[{unit}]") + 1).astype("datetime64[ns]")
+
+
+def _group(keys, count, total, m2):
+    """Merge cells with equal ``keys`` (first key most significant) into sorted cells."""
+    n = len(count)
+    if n == 0:
+        return [k[:0] for k in keys], count[:0], total[:0], np.zeros(0), m2[:0]
+    order = np.lexsort(keys[::-1])
+    keys = [k[order] for k in keys]
+    count, total, m2 = count[order], total[order], m2[order]
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for k in keys:
+        change[1:] |= k[1:] != k[:-1]
+    starts = np.flatnonzero(change)
+    sizes = np.diff(np.r_[starts, n])
+
+    group_count = np.add.reduceat(count, starts)
+    group_total = np.add.reduceat(total, starts)
+    group_mean = group_total / group_count
+    # Chan et al.: M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+    spread = count * (total / count - np.repeat(group_mean, sizes)) ** 2
+    group_m2 = np.add.reduceat(m2 + spread, starts)
+    return [k[starts] for k in keys], group_count, group_total, group_mean, group_m2
+
+
+class RollupCube:
+    """Count / sum / mean / M2 per (series, period[, weekday]) at every grain."""
+
+    def __init__(self, series, levels):
+        self.series = list(series)
+        self.levels = levels
+
+    @classmethod
+    def from_frame(cls, df):
+        cube = cls([], {level: None for level in LEVELS})
+        cube.update(df)
+        return cube
+
+    # -- building / updating ------------------------------------------------
+
+    def _codes(self, df):
+        labels = df[SERIES_COLUMN].astype(str).to_numpy() if SERIES_COLUMN in df else np.full(len(df), TOTAL)
+        uniques, inverse = np.unique(labels, return_inverse=True)
+        known = {label: i for i, label in enumerate(self.series)}
+        for label in uniques:
+            if label not in known:
+                known[label] = len(self.series)
+                self.series.append(label)
+        return np.array([known[label] for label in uniques], dtype=np.int32)[inverse]
+
+    def update(self, df):
+        """Merge the rows of ``df`` (order_date, target[, series]) into every level."""
+        if not len(df):
+            return self
+        series = self._codes(df)
+        days = df[DATE_COLUMN].to_numpy().astype("datetime64[D]").astype("datetime64[ns]")
+        y = df[TARGET_COLUMN].to_numpy(dtype=float)
+        new_day = _group([days, series], np.ones(len(y), dtype=np.int64), y, np.zeros(len(y)))
+
+        for grain, split in LEVELS:
+            (periods, codes), count, total, _, m2 = new_day
+            keys = [period_starts(periods, grain), codes]
+            if split:
+                keys.append(_weekday(periods))
+            new = _group(keys, count, total, m2)
+            self.levels[(grain, split)] = self._merge(self.levels[(grain, split)], new, split)
+        return self
+
+    @staticmethod
+    def _merge(level, new, split):
+        keys, count, total, mean, m2 = new
+        fresh = {"period": keys[0], "series": keys[1], "count": count, "sum": total,
+                 "mean": mean, "m2": m2}
+        if split:
+            fresh[split] = keys[2]
+        if level is None:
+            return fresh
+        # Appends only reach the last periods: regroup that suffix, keep the rest.
+        cut = np.searchsorted(level["period"], keys[0].min(), "left")
+        head = {k: v[:cut] for k, v in level.items()}
+        tail = {k: np.r_[v[cut:], fresh[k]] for k, v in level.items()}
+        tail_keys = [tail["period"], tail["series"]] + ([tail[split]] if split else [])
+        keys, count, total, mean, m2 = _group(tail_keys, tail["count"], tail["sum"], tail["m2"])
+        merged = {"period": keys[0], "series": keys[1], "count": count, "sum": total,
+                  "mean": mean, "m2": m2}
+        if split:
+            merged[split] = keys[2]
+        return {k: np.r_[head[k], merged[k]] for k in head}
+
+    # -- queries ------------------------------------------------------------
+
+    def _select(self, level, lo, hi, series):
+        cells = {k: v[lo:hi] for k, v in level.items()}
+        if series is not None:
+            mask = cells["series"] == self.series.index(series)
+            cells = {k: v[mask] for k, v in cells.items()}
+        return cells
+
+    def cells(self, grain="month", split=None, series=None, start=None, end=None):
+        """Cells of the (``grain``, ``split``) level for one series (or all) in [start, end].
+
+        Periods cut by the range only count its days.
+        """
+        level = self.levels[(grain, split)]
+        periods = level["period"]
+        if (start is None and end is None) or grain == "day":
+            lo = 0 if start is None else np.searchsorted(
+                periods, np.datetime64(pd.Timestamp(start).normalize()), "left")
+            hi = len(periods) if end is None else np.searchsorted(
+                periods, np.datetime64(pd.Timestamp(end).normalize()), "right")
+            return self._frame(self._select(level, lo, hi, series), split)
+
+        first_day = np.datetime64(pd.Timestamp(start if start is not None else periods[0]).normalize(), "ns")
+        stop_day = (np.datetime64(pd.Timestamp(end).normalize(), "ns") + DAY if end is not None
+                    else next_period_start(periods[-1:], grain)[0])
+        # Whole periods: [first full start, first start after the range's last full period).
+        first_start = period_starts([first_day], grain)[0]
+        full_from = first_start if first_start == first_day else next_period_start([first_start], grain)[0]
+        full_to = max(period_starts([stop_day], grain)[0], full_from)
+
+        parts = [self._select(level, np.searchsorted(periods, full_from, "left"),
+                              np.searchsorted(periods, full_to, "left"), series)]
+        day_periods = self.levels[("day", None)]["period"]
+        for a, b in ((first_day, min(full_from, stop_day)), (max(full_to, first_day), stop_day)):
+            if a < b:
+                edge = self._select(self.levels[("day", None)], np.searchsorted(day_periods, a, "left"),
+                                    np.searchsorted(day_periods, b, "left"), series)
+                keys = [period_starts(edge["period"], grain), edge["series"]]
+                if split:
+                    keys.append(_weekday(edge["period"]))
+                keys, count, total, mean, m2 = _group(keys, edge["count"], edge["sum"], edge["m2"])
+                parts.append({"period": keys[0], "series": keys[1], "count": count, "sum": total,
+                              "mean": mean, "m2": m2, **({split: keys[2]} if split else {})})
+        frame = pd.concat([self._frame(p, split) for p in parts], ignore_index=True)
+        return frame.sort_values(["period", "series"], kind="stable", ignore_index=True)
+
+    def _frame(self, cells, split):
+        columns = ["period", "series"] + ([split] if split else []) + list(STATS)
+        frame = pd.DataFrame({c: cells[c] for c in columns})
+        frame["series"] = pd.Categorical.from_codes(frame["series"], categories=self.series)
+        return frame
+
+    def frame(self, grain="month", by=("period",), split=None, series=None, start=None, end=None):
+        """``combine(cells(...), by)``: e.g. one row per period, or per series and period."""
+        return combine(self.cells(grain, split, series, start, end), by)
+
+
+def combine(cells, by):
+    """Merge cell statistics over the columns ``by``; adds the sample ``std``."""
+    by = list(by)
+    keys = [cells[c].cat.codes.to_numpy() if c == "series" else cells[c].to_numpy() for c in by]
+    keys, count, total, mean, m2 = _group(keys, cells["count"].to_numpy(), cells["sum"].to_numpy(dtype=float),
+                                          cells["m2"].to_numpy(dtype=float))
+    frame = pd.DataFrame(dict(zip(by, keys)))
+    if "series" in by:
+        frame["series"] = pd.Categorical.from_codes(frame["series"], cells["series"].cat.categories)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(m2 / (count - 1))
+    return frame.assign(count=count, sum=total, mean=mean, m2=m2, std=std)
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+def _cube_path(path):
+    path = Path(path)
+    return path.parent / CACHE_DIR_NAME / f"{path.stem}-cube.pkl"
+
+
+def load_cube_file(path=DATA_PATH, version=None):
+    """Persisted cube of the table at ``path``, or None if missing / stale."""
+    try:
+        with open(_cube_path(path), "rb") as fh:
+            state = pickle.load(fh)
+        if version is not None and state.get("version") != version:
+            return None
+        return state["cube"]
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        return None
+
+
+def save_cube(cube, path=DATA_PATH, version=None):
+    target = _cube_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "wb") as fh:
+        pickle.dump({"version": version, "cube": cube}, fh)
+
+
+def table_cube(path=DATA_PATH):
+    """Cube of the current table version, built once and persisted next to the sidecar."""
+    version = dataset_version(path)
+    cube = load_cube_file(path, version)
+    if cube is None:
+        cube = RollupCube.from_frame(read_feature_table_cached(path))
+        try:
+            save_cube(cube, path, version)
+        except OSError:
+            pass
+    return cube
+
+
+@tracked_cache(st.cache_resource, kind="load", show_spinner="Zaman küpü yükleniyor...", max_entries=4)
+def _cached_cube(path, version):
+    return table_cube(path)
+
+
+def load_cube(series=None):
+    """Cube for the pages: of the aggregate table, or of the series table when ``series`` is set.
+
+    Query it with ``series=series`` (None covers the aggregate table's one series).
+    """
+    path = DATA_PATH if series is None else SERIES_PATH
+    return _cached_cube(str(path), dataset_version(path))
@@ -0,0 +1,414 @@
+"""
+Shared data access for the dashboard pages.
+
+Every page gets the feature table through ``load_data()``. The CSV is parsed
+once per process into a compact, typed frame that all pages and sessions
+share, so the returned frame must be treated as read-only.
+
+Every column has a fixed storage type (``SCHEMA``): 0/1 flags and calendar
+fields are narrow ints, features are float32. A parsed CSV is validated
+against it (``validate_table()``), including the value ranges that narrow
+ints cannot hold, so a bad row fails loudly instead of wrapping around.
+Tables built with holiday / event features (``dashboard.events``) carry the
+extra ``OPTIONAL_SCHEMA`` columns, which are checked the same way.
+``memory_report()`` gives the resulting bytes per row.
+
+The first parse also writes a binary sidecar to ``.cache/`` next to the CSV:
+one ``.npy`` file per column (dates as int32 day offsets) plus a small JSON
+manifest. Later processes memory-map those columns instead of parsing the
+CSV, which also lets several Streamlit workers share the same physical
+pages. The sidecar is rebuilt whenever the CSV's size, mtime or SHA-256 no
+longer match the manifest, or its layout is from an older format.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.profiling import section, tracked_cache
+
+ROOT = Path(__file__).resolve().parent.parent
+# DASHBOARD_DATA_PATH points every page at another table (benchmarks use synthetic ones).
+DATA_PATH = Path(os.environ.get("DASHBOARD_DATA_PATH", ROOT / "demand_features_final.csv"))
+CACHE_DIR_NAME = ".cache"
+# Bumped whenever the sidecar layout changes; older sidecars are rebuilt.
+SIDECAR_FORMAT = 2
+
+SERIES_PATH = ROOT / "demand_series_features.csv"
+
+DATE_COLUMN = "order_date"
+TARGET_COLUMN = "daily_orders"
+SERIES_COLUMN = "series"
+WINDOWS = (15, 30, 90, 180, 360)
+
+# Regime flags: above the short / long rolling mean, or a long-window peak.
+HIGH_SHORT_WINDOW = 30
+HIGH_LONG_WINDOW = 180
+PEAK_STD = 1.5
+VOLATILITY_WINDOW = 30
+TREND_PAIRS = tuple(zip(WINDOWS[:-1], WINDOWS[1:]))
+
+CALENDAR_COLUMNS = ["dayofweek", "is_weekend", "month", "year"]
+FLAG_COLUMNS = ["is_high_short", "is_high_long", "is_peak_long"]
+FEATURE_COLUMNS = (
+    [DATE_COLUMN, TARGET_COLUMN]
+    + CALENDAR_COLUMNS
+    + [f"lag_{w}" for w in WINDOWS]
+    + [f"rolling_{stat}_{w}" for w in WINDOWS for stat in ("mean", "std")]
+    + [f"ewma_{w}" for w in WINDOWS]
+    + [f"momentum_{w}" for w in WINDOWS]
+    + FLAG_COLUMNS
+    + [f"volatility_{VOLATILITY_WINDOW}"]
+    + [f"trend_{a}_{b}" for a, b in TREND_PAIRS]
+)
+# Optional holiday / retail-event columns (``dashboard.events``), one flag per event kind.
+EVENT_FLAG_COLUMNS = ["is_holiday", "is_retail_event", "is_payday", "is_campaign"]
+EVENT_COLUMNS = EVENT_FLAG_COLUMNS + ["days_to_next_holiday", "days_since_last_event"]
+
+# 0/1 indicators and small calendar integers are stored as narrow ints,
+# everything else (lags, rolling stats, ewma, ...) as float32.
+INT_COLUMNS = {
+    "daily_orders": "int32",
+    "dayofweek": "int8",
+    "is_weekend": "int8",
+    "month": "int8",
+    "year": "int16",
+    "is_high_short": "int8",
+    "is_high_long": "int8",
+    "is_peak_long": "int8",
+    **{col: "int8" for col in EVENT_FLAG_COLUMNS},
+    "days_to_next_holiday": "int16",
+    "days_since_last_event": "int16",
+}
+FLOAT_DTYPE = "float32"
+# Dates are whole days; the sidecar stores them as days since 1970-01-01.
+DAY_OFFSET_DTYPE = "int32"
+
+SCHEMA = {
+    DATE_COLUMN: "datetime64",
+    **{col: INT_COLUMNS.get(col, FLOAT_DTYPE) for col in FEATURE_COLUMNS if col != DATE_COLUMN},
+}
+# Columns a table may carry (built with ``--events``); checked only when present.
+OPTIONAL_SCHEMA = {col: INT_COLUMNS[col] for col in EVENT_COLUMNS}
+# Allowed values of the integer columns; float columns must be finite or NaN.
+INT_RANGES = {
+    "daily_orders": (0, np.iinfo(np.int32).max),
+    "dayofweek": (0, 6),
+    "is_weekend": (0, 1),
+    "month": (1, 12),
+    "year": (1, np.iinfo(np.int16).max),
+    **{col: (0, 1) for col in FLAG_COLUMNS + EVENT_FLAG_COLUMNS},
+    "days_to_next_holiday": (0, 366),
+    "days_since_last_event": (0, 366),
+}
+
+
+class SchemaError(ValueError):
+    """The feature table does not match ``SCHEMA``."""
+
+
+def column_dtypes(columns):
+    """Return the compact dtype for each column of the feature table."""
+    return {
+        col: "category" if col == SERIES_COLUMN else {**SCHEMA, **OPTIONAL_SCHEMA}.get(col, FLOAT_DTYPE)
+        for col in columns
+        if col != DATE_COLUMN
+    }
+
+
+def _missing_columns(df):
+    missing = [col for col in SCHEMA if col not in df]
+    return [f"missing columns: {', '.join(missing)}"] if missing else []
+
+
+def _dtype_problems(df):
+    problems = _missing_columns(df)
+    for col, dtype in {**SCHEMA, **OPTIONAL_SCHEMA}.items():
+        if col not in df:
+            continue
+        actual = df[col].dtype
+        ok = (np.issubdtype(actual, np.datetime64) if col == DATE_COLUMN
+              else actual == np.dtype(dtype))
+        if not ok:
+            problems.append(f"{col} is {actual}, expected {dtype}")
+    return problems
+
+
+def _value_problems(df):
+    problems = []
+    dates = df[DATE_COLUMN]
+    if dates.isna().any():
+        problems.append(f"{DATE_COLUMN} has missing dates")
+    elif (dates != dates.dt.normalize()).any():
+        problems.append(f"{DATE_COLUMN} has times of day; only whole days are stored")
+    elif SERIES_COLUMN not in df and not dates.is_monotonic_increasing:
+        problems.append(f"{DATE_COLUMN} is not sorted")
+    for col, (lo, hi) in INT_RANGES.items():
+        if col not in df:
+            continue
+        values = df[col].to_numpy()
+        if len(values) and (values.min() < lo or values.max() > hi):
+            problems.append(f"{col} outside [{lo}, {hi}] (min {values.min()}, max {values.max()})")
+    infinite = [c for c, dtype in SCHEMA.items() if dtype == FLOAT_DTYPE
+                and np.isinf(df[c].to_numpy()).any()]
+    if infinite:
+        problems.append(f"infinite values (float32 overflow?) in {', '.join(infinite)}")
+    return problems
+
+
+def validate_table(df, values=True):
+    """Check columns and dtypes against ``SCHEMA`` and, with ``values``, the value ranges.
+
+    Raises ``SchemaError`` listing every problem; returns ``df`` otherwise.
+    """
+    problems = _dtype_problems(df)
+    if values and not problems:
+        problems = _value_problems(df)
+    if problems:
+        raise SchemaError("Feature table does not match the schema: " + "; ".join(problems))
+    return df
+
+
+def memory_report(df):
+    """Dtype and bytes per row of the index and every column, largest first.
+
+    The date index normally shares its buffer with the date column and is
+    then counted once (as 0 bytes).
+    """
+    usage = df.memory_usage(deep=True, index=True)
+    if DATE_COLUMN in df and np.shares_memory(df.index.to_numpy(), df[DATE_COLUMN].to_numpy()):
+        usage.iloc[0] = 0
+    dtypes = [df.index.dtype] + [df[col].dtype for col in df.columns]
+    report = pd.DataFrame({"dtype": [str(d) for d in dtypes],
+                           "bytes_per_row": usage.to_numpy() / max(len(df), 1)},
+                          index=usage.index)
+    return report.sort_values("bytes_per_row", ascending=False, kind="stable")
+
+
+def _with_date_index(df):
+    df.index = pd.DatetimeIndex(df[DATE_COLUMN], name="date")
+    return df
+
+
+def read_feature_table(path=DATA_PATH):
+    """Parse the feature CSV into a typed frame indexed by date, validated against ``SCHEMA``."""
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = column_dtypes(header)
+    # Integers are parsed wide and checked first: read_csv wraps 300 into an int8 silently.
+    wide = {col: "int64" if col in INT_COLUMNS else dtype for col, dtype in dtypes.items()}
+    try:
+        df = pd.read_csv(path, dtype=wide)
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], format="%Y-%m-%d")
+    except (ValueError, OverflowError) as exc:
+        raise SchemaError(f"{Path(path).name}: {exc}") from exc
+    problems = _missing_columns(df) or _value_problems(df)
+    if problems:
+        raise SchemaError(f"{Path(path).name} does not match the schema: " + "; ".join(problems))
+    df = df.astype({col: dtype for col, dtype in dtypes.items() if col in INT_COLUMNS})
+    return _with_date_index(validate_table(df, values=False))
+
+
+# ---------------------------------------------------------------------------
+# Binary sidecar
+# ---------------------------------------------------------------------------
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_dir(path, cache_dir=None):
+    return Path(cache_dir) if cache_dir else Path(path).parent / CACHE_DIR_NAME
+
+
+def _manifest_path(path, cache_dir):
+    return Path(cache_dir) / f"{Path(path).stem}.json"
+
+
+def _read_manifest(path, cache_dir):
+    try:
+        return json.loads(_manifest_path(path, cache_dir).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(path, cache_dir, manifest):
+    target = _manifest_path(path, cache_dir)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".json")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, target)
+
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_sidecar(path=DATA_PATH, cache_dir=None):
+    """Memory-map the sidecar for ``path``, or return None if it is stale."""
+    cache_dir = _cache_dir(path, cache_dir)
+    manifest = _read_manifest(path, cache_dir)
+    if manifest is None or manifest.get("format") != SIDECAR_FORMAT:
+        return None
+    stat = _source_stat(path)
+    if {k: manifest.get(k) for k in stat} != stat:
+        # Touched or rewritten: only a content change invalidates the sidecar.
+        if file_digest(path) != manifest.get("sha256"):
+            return None
+        _write_manifest(path, cache_dir, {**manifest, **stat})
+
+    column_dir = Path(cache_dir) / manifest["directory"]
+    try:
+        columns = {
+            col: np.load(column_dir / f"{i}.npy", mmap_mode="r")
+            for i, col in enumerate(manifest["columns"])
+        }
+    except OSError:
+        return None
+    for col, categories in manifest.get("categories", {}).items():
+        columns[col] = pd.Categorical.from_codes(columns[col], categories)
+    for col, dtype in manifest.get("dates", {}).items():
+        columns[col] = columns[col].astype("datetime64[D]").astype(dtype)
+    df = pd.DataFrame(columns, copy=False)
+    # Values were validated when the sidecar was written; a layout mismatch means rebuild.
+    if _dtype_problems(df):
+        return None
+    return _with_date_index(df)
+
+
+def write_sidecar(df, path=DATA_PATH, cache_dir=None, sha256=None):
+    """Write ``df`` as the sidecar of ``path`` and return its manifest."""
+    cache_dir = _cache_dir(path, cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    stat = _source_stat(path)
+    sha256 = sha256 or file_digest(path)
+
+    # Categorical columns (series keys) are stored as codes + manifest labels,
+    # date columns as int32 day offsets + their in-memory dtype.
+    categories = {
+        col: df[col].cat.categories.tolist()
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    dates = {col: str(df[col].dtype) for col in df.columns
+             if np.issubdtype(df[col].dtype, np.datetime64)}
+    directory = f"{Path(path).stem}-{sha256[:16]}-v{SIDECAR_FORMAT}"
+    column_dir = cache_dir / directory
+    if not column_dir.exists():
+        tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir))
+        for i, col in enumerate(df.columns):
+            if col in categories:
+                values = df[col].cat.codes.to_numpy()
+            elif col in dates:
+                values = df[col].to_numpy().astype("datetime64[D]").astype(np.int64).astype(DAY_OFFSET_DTYPE)
+            else:
+                values = df[col].to_numpy()
+            np.save(tmp_dir / f"{i}.npy", values)
+        try:
+            os.rename(tmp_dir, column_dir)
+        except OSError:
+            # Another worker finished the same sidecar first.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    manifest = {"format": SIDECAR_FORMAT, "source": Path(path).name, **stat, "sha256": sha256,
+                "directory": directory, "columns": list(df.columns),
+                "categories": categories, "dates": dates}
+    _write_manifest(path, cache_dir, manifest)
+
+    for old in cache_dir.glob(f"{Path(path).stem}-*"):
+        if old.name != directory:
+            shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def read_feature_table_cached(path=DATA_PATH, cache_dir=None):
+    """Read the feature table through its sidecar, building it if needed."""
+    df = read_sidecar(path, cache_dir)
+    if df is None:
+        df = read_feature_table(path)
+        try:
+            write_sidecar(df, path, cache_dir)
+        except OSError:
+            pass  # read-only checkout: keep serving from the CSV
+    return df
+
+
+def dataset_version(path=DATA_PATH, cache_dir=None):
+    """Short content hash of the feature table, used as a cache key."""
+    cache_dir = _cache_dir(path, cache_dir)
+    manifest = _read_manifest(path, cache_dir)
+    if manifest and {k: manifest.get(k) for k in ("mtime_ns", "size")} == _source_stat(path):
+        return manifest["sha256"][:12]
+    return file_digest(path)[:12]
+
+
+# ---------------------------------------------------------------------------
+# Streamlit entry points
+# ---------------------------------------------------------------------------
+
+@tracked_cache(st.cache_resource, kind="load", show_spinner="Veri yükleniyor...", max_entries=4)
+def _load_feature_table(path, mtime_ns, size):
+    return read_feature_table_cached(path)
+
+
+def load_data(path=DATA_PATH):
+    """Return the shared feature table (one load per process and file version)."""
+    with section("load_data", "load"):
+        stat = _source_stat(path)
+        return _load_feature_table(str(path), stat["mtime_ns"], stat["size"])
+
+
+def _series_runs(df):
+    """(key -> (start, stop)) row ranges of a series-sorted long table."""
+    codes = df[SERIES_COLUMN].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    keys = df[SERIES_COLUMN].cat.categories[codes[starts]]
+    return {key: (start, stop) for key, start, stop in zip(keys, starts, stops)}
+
+
+@tracked_cache(st.cache_resource, kind="load", show_spinner="Seri verisi yükleniyor...", max_entries=2)
+def _load_series_table(path, mtime_ns, size):
+    df = read_feature_table_cached(path)
+    runs = _series_runs(df)
+    if len(runs) != df[SERIES_COLUMN].nunique():
+        # Not grouped by series on disk: sort once so each series is a slice.
+        df = df.sort_values([SERIES_COLUMN, DATE_COLUMN], kind="stable")
+        runs = _series_runs(df)
+    return df, runs
+
+
+def load_series_data(path=SERIES_PATH):
+    """Return (long table, key -> row range), or None if no multi-series table exists.
+
+    The table is built with ``python -m dashboard.features ... --by series``.
+    """
+    if not Path(path).exists():
+        return None
+    stat = _source_stat(path)
+    return _load_series_table(str(path), stat["mtime_ns"], stat["size"])
+
+
+def series_keys(path=SERIES_PATH):
+    loaded = load_series_data(path)
+    return [] if loaded is None else list(loaded[1])
+
+
+def load_series(key, path=SERIES_PATH):
+    """Feature rows of one series (a zero-copy slice of the long table)."""
+    with section("load_series", "load"):
+        df, runs = load_series_data(path)
+        start, stop = runs[key]
+        return df.iloc[start:stop]
@@ -0,0 +1,98 @@
+"""
+Hidden diagnostics view (``app.py?diagnostics=1``).
+
+Renders what ``dashboard.profiling`` has recorded in this server process:
+per-page render times, where the time goes by section kind, the heaviest
+sections, cache hit rates, chart payloads and memory, plus the same data
+as JSON lines and Prometheus text for download.
+"""
+
+import json
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from dashboard.profiling import KINDS, cache_counts, payload_sizes, prometheus_text, recent_runs
+
+
+def runs_frame(runs):
+    """One row per page run."""
+    return pd.DataFrame([{
+        "ts": pd.Timestamp(run["ts"]), "page": run["page"], "seconds": run["seconds"],
+        "payload_bytes": run["payload_bytes"], "rss_mb": run["rss_bytes"] / 2**20,
+        "cache_hits": sum(c["hit"] for c in run["caches"]),
+        "cache_misses": sum(not c["hit"] for c in run["caches"]),
+    } for run in runs])
+
+
+def sections_frame(runs):
+    """One row per recorded section of every run."""
+    return pd.DataFrame([{"page": run["page"], **s} for run in runs for s in run["sections"]])
+
+
+def render():
+    st.title("🩺 Diagnostics")
+    st.caption("Bu sunucu sürecinde kaydedilen sayfa çalıştırmaları (gizli sayfa).")
+    if not payload_sizes():
+        st.caption("Grafik boyutları ölçülmüyor; ölçmek için `DASHBOARD_PROFILE=1` ile başlatın.")
+    runs = recent_runs()
+    if not runs:
+        st.info("Henüz profil kaydı yok: önce dashboard sayfalarını açın.")
+        return
+
+    runs_df = runs_frame(runs)
+    sections_df = sections_frame(runs)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Çalıştırma", len(runs_df))
+    col2.metric("Medyan süre", f"{runs_df['seconds'].median() * 1000:.0f} ms")
+    hits, misses = runs_df["cache_hits"].sum(), runs_df["cache_misses"].sum()
+    col3.metric("Cache isabeti", f"{hits / max(hits + misses, 1):.0%}")
+    col4.metric("RSS", f"{runs_df['rss_mb'].iloc[-1]:.0f} MB")
+
+    st.subheader("Sayfa başına süre")
+    pages = runs_df.groupby("page").agg(
+        runs=("seconds", "size"), mean_s=("seconds", "mean"),
+        p95_s=("seconds", lambda s: s.quantile(0.95)), max_s=("seconds", "max"),
+        payload_kb=("payload_bytes", lambda b: b.mean() / 1024),
+    ).sort_values("mean_s", ascending=False)
+    st.dataframe(pages.round(3), use_container_width=True)
+
+    by_kind = (sections_df.groupby(["page", "kind"])["seconds"].sum()
+               / runs_df.groupby("page").size()).rename("seconds").reset_index()
+    fig_kind = px.bar(by_kind, x="seconds", y="page", color="kind", orientation="h",
+                      category_orders={"kind": list(KINDS)},
+                      title="Çalıştırma başına ortalama süre, bölüm türüne göre")
+    st.plotly_chart(fig_kind, use_container_width=True)
+
+    st.subheader("En ağır bölümler")
+    heaviest = (sections_df.groupby(["page", "section", "kind"])
+                .agg(calls=("seconds", "size"), mean_ms=("seconds", lambda s: s.mean() * 1000),
+                     total_s=("seconds", "sum"), payload_kb=("bytes", lambda b: b.mean() / 1024))
+                .sort_values("total_s", ascending=False).head(25))
+    st.dataframe(heaviest.round(2), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Cache")
+        caches = pd.DataFrame([{"cache": name, "hits": h, "misses": m, "hit_rate": h / max(h + m, 1)}
+                               for name, (h, m) in cache_counts().items()])
+        if len(caches):
+            st.dataframe(caches.sort_values("misses", ascending=False).round(3),
+                         use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader("Bellek")
+        fig_rss = px.line(runs_df, x="ts", y="rss_mb", markers=True,
+                          title="Süreç RSS (MB), çalıştırma sonunda")
+        st.plotly_chart(fig_rss, use_container_width=True)
+
+    st.subheader("Dışa aktarım")
+    metrics = prometheus_text()
+    col1, col2 = st.columns(2)
+    col1.download_button("Prometheus metrikleri (.prom)", metrics, file_name="dashboard.prom")
+    col2.download_button("Çalıştırma kayıtları (.jsonl)",
+                         "\n".join(json.dumps(run, default=str) for run in runs),
+                         file_name="dashboard-profile.jsonl")
+    with st.expander("Prometheus metin formatı"):
+        st.code(metrics, language="text")
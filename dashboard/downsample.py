@@ -0,0 +1,104 @@
+"""
+Server-side downsampling for the long time-series charts.
+
+``downsample()`` returns the row positions to plot, never more than the
+point budget:
+
+* ``"minmax"`` keeps the lowest and highest point of every bucket, so every
+  peak and trough survives (the default for spiky daily orders);
+* ``"lttb"`` is Largest-Triangle-Three-Buckets, which keeps the visual shape
+  with one point per bucket.
+
+``downsample_frame()`` first cuts the frame to the visible date range with
+``searchsorted`` and then downsamples only that window, so narrowing the
+range brings back full detail.
+"""
+
+import numpy as np
+
+DEFAULT_POINTS = 2_000
+METHODS = ("minmax", "lttb")
+
+
+def _bucket_edges(start, stop, n_buckets):
+    return np.linspace(start, stop, n_buckets + 1).astype(np.int64)
+
+
+def _first_match_per_bucket(values, extreme, bucket):
+    hit = np.flatnonzero(values == extreme[bucket])
+    _, first = np.unique(bucket[hit], return_index=True)
+    return hit[first]
+
+
+def minmax(y, max_points):
+    """Positions of each bucket's min and max (plus both ends)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max((max_points - 2) // 2, 1)
+    edges = _bucket_edges(0, n, n_buckets)
+    starts = np.unique(edges[:-1])
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+
+    nan = np.isnan(y)
+    high = np.where(nan, -np.inf, y)
+    low = np.where(nan, np.inf, y)
+    top = _first_match_per_bucket(high, np.maximum.reduceat(high, starts), bucket)
+    bottom = _first_match_per_bucket(low, np.minimum.reduceat(low, starts), bucket)
+    return np.unique(np.concatenate([[0, n - 1], top, bottom]))
+
+
+def lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets selection of ``max_points`` positions."""
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    n = len(y)
+    n_buckets = max_points - 2
+    edges = _bucket_edges(1, n - 1, n_buckets)
+    # Average of each bucket (the "third" vertex for the previous bucket).
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y, edges[:-1]) / sizes
+    avg_x = np.r_[avg_x[1:], x[-1]]
+    avg_y = np.r_[avg_y[1:], y[-1]]
+
+    picked = np.empty(max_points, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(x, y, max_points=DEFAULT_POINTS, method="minmax"):
+    """Row positions to plot; all rows if they already fit the budget."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    if method == "minmax":
+        return minmax(y, max_points)
+    return lttb(x, y, max_points)
+
+
+def visible_rows(dates, start=None, end=None):
+    """Slice of date-sorted ``dates`` falling inside [start, end]."""
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "ns"), side="left")
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "ns"), side="right")
+    return slice(lo, hi)
+
+
+def downsample_frame(frame, x, y, max_points=DEFAULT_POINTS, method="minmax", x_range=None):
+    """Rows of ``frame`` (sorted by ``x``) to draw for the visible range.
+
+    Positions are chosen from column ``y``; other columns (moving averages
+    drawn on the same chart) are taken at the same positions.
+    """
+    window = frame.iloc[visible_rows(frame[x], *(x_range or (None, None)))]
+    dates = window[x].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return window.iloc[downsample(dates, window[y].to_numpy(dtype=float), max_points, method)]
@@ -0,0 +1,363 @@
+"""
+Model training and evaluation.
+
+Scores the candidate models on the feature table with rolling-origin
+time-series cross-validation (``dashboard.backtest``: expanding or sliding
+window, any horizon and step) and writes the results as the ``evaluation``
+artifact of the current dataset version, which the model pages (app, 6, 7,
+8) read.
+
+Every prediction for day t uses only what is known at the end of day t-1:
+the derived features of the previous row plus the calendar of day t. The
+(model, fold) fits run in a process pool over shared memory under a
+wall-clock budget; fits that do not finish in time are reported as such
+instead of stalling the run.
+
+    python -m dashboard.evaluation --folds 5 --horizon 30 --budget 120
+    python -m dashboard.evaluation --horizon 7 --step 7 --window 365
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dashboard.artifacts import read_artifact, write_artifact
+from dashboard.backtest import backtest_folds, fold_metrics, period_index, run_backtest, scores
+from dashboard.data import (
+    CALENDAR_COLUMNS,
+    DATA_PATH,
+    DATE_COLUMN,
+    EVENT_FLAG_COLUMNS,
+    FEATURE_COLUMNS,
+    TARGET_COLUMN,
+    dataset_version,
+    read_feature_table_cached,
+)
+from dashboard.events import event_columns
+
+ARTIFACT = "evaluation"
+SEASON = 7
+DEFAULT_FOLDS = 5
+DEFAULT_HORIZON = 30
+DEFAULT_BUDGET = 120.0
+FALLBACK_MODEL = "Gradient Boosting"
+
+DERIVED_COLUMNS = [c for c in FEATURE_COLUMNS if c not in (DATE_COLUMN, TARGET_COLUMN, *CALENDAR_COLUMNS)]
+INPUT_COLUMNS = CALENDAR_COLUMNS + ["lag_1"] + DERIVED_COLUMNS
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def target_rows(df, by=None):
+    """Mask of the rows that have a previous day (all but the first of each series)."""
+    if not by:
+        return np.arange(len(df)) > 0
+    keys = df[by].to_numpy()
+    return np.r_[False, keys[1:] == keys[:-1]]
+
+
+def model_inputs(df, by=None):
+    """(X, y, dates) for one-step-ahead models, one row per target day.
+
+    The derived columns are taken from the previous row, so nothing in X
+    depends on the day being predicted; ``lag_1`` is yesterday's orders.
+    With ``by``, ``df`` is a long table sorted by series and the previous
+    row is taken within each series.
+    """
+    previous = df[[TARGET_COLUMN] + DERIVED_COLUMNS].astype(float).shift(1)
+    X = pd.concat(
+        [df[CALENDAR_COLUMNS].astype(float), previous.rename(columns={TARGET_COLUMN: "lag_1"})],
+        axis=1,
+    )
+    keep = target_rows(df, by)
+    y = df[TARGET_COLUMN].to_numpy(dtype=float)[keep]
+    dates = df[DATE_COLUMN].to_numpy()[keep]
+    return X[keep].reset_index(drop=True), y, dates
+
+
+def seasonal_lag(y, season=SEASON, groups=None):
+    """Value ``season`` rows earlier in the same series (NaN where there is none)."""
+    lagged = np.full(len(y), np.nan)
+    lagged[season:] = y[:-season]
+    if groups is not None:
+        groups = np.asarray(groups)
+        lagged[season:][groups[season:] != groups[:-season]] = np.nan
+    return lagged
+
+
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
+
+class SeasonalNaive:
+    """Forecast = the value one season (week) earlier."""
+
+    def __init__(self, season=SEASON):
+        self.season = season
+
+    def fit(self, y_history):
+        self.history = np.asarray(y_history, dtype=float)
+        return self
+
+    def predict(self, lagged):
+        # One-step-ahead: ``lagged`` already holds the observed value one
+        # season before each target row (``seasonal_lag``).
+        return np.asarray(lagged, dtype=float)
+
+
+class AdditiveSeasonality:
+    """Piecewise-linear trend + weekly + yearly (Fourier) seasonality + holidays.
+
+    A Prophet-style additive model fitted by ridge-penalised least squares
+    on the dates alone; it ignores the engineered features. With
+    ``holidays`` every event kind of ``dashboard.events`` (holiday, retail
+    day, payday, campaign) adds a shift on its days.
+    """
+
+    def __init__(self, n_changepoints=10, yearly_order=4, penalty=1.0, holidays=True):
+        self.n_changepoints = n_changepoints
+        self.yearly_order = yearly_order
+        self.penalty = penalty
+        self.holidays = holidays
+
+    def _design(self, dates):
+        t = (pd.DatetimeIndex(dates) - self.origin).days.to_numpy(dtype=float) / self.scale
+        hinges = np.maximum(t[:, None] - self.changepoints[None, :], 0.0)
+        dow = pd.DatetimeIndex(dates).dayofweek.to_numpy()
+        weekly = (dow[:, None] == np.arange(1, 7)[None, :]).astype(float)
+        angle = 2 * np.pi * pd.DatetimeIndex(dates).dayofyear.to_numpy()[:, None] / 365.25
+        k = np.arange(1, self.yearly_order + 1)[None, :]
+        yearly = np.hstack([np.sin(angle * k), np.cos(angle * k)])
+        parts = [np.ones((len(t), 1)), t[:, None], hinges, weekly, yearly]
+        if self.holidays:
+            events = event_columns(dates)
+            parts.append(np.column_stack([events[c] for c in EVENT_FLAG_COLUMNS]).astype(float))
+        return np.hstack(parts)
+
+    def fit(self, dates, y):
+        dates = pd.DatetimeIndex(dates)
+        self.origin = dates[0]
+        self.scale = max((dates[-1] - dates[0]).days, 1)
+        # Trend changes are allowed in the first 80% of the history.
+        self.changepoints = np.linspace(0, 0.8, self.n_changepoints + 2)[1:-1]
+        A = self._design(dates)
+        penalty = np.full(A.shape[1], self.penalty)
+        penalty[:2] = 0.0  # intercept and base slope are not shrunk
+        self.coef = np.linalg.solve(A.T @ A + np.diag(penalty), A.T @ np.asarray(y, dtype=float))
+        return self
+
+    def predict(self, dates):
+        return self._design(dates) @ self.coef
+
+
+def gradient_boosting():
+    return HistGradientBoostingRegressor(max_iter=300, learning_rate=0.05, max_leaf_nodes=15,
+                                        min_samples_leaf=10, l2_regularization=1.0, random_state=0)
+
+
+def linear_baseline():
+    return make_pipeline(SimpleImputer(strategy="median"), StandardScaler(), Ridge(alpha=10.0))
+
+
+MODELS = {
+    "Gradient Boosting": {
+        "kind": "features", "factory": gradient_boosting,
+        "description": "HistGradientBoostingRegressor, tüm lag / rolling / ewma feature'ları",
+    },
+    "Ridge (Linear)": {
+        "kind": "features", "factory": linear_baseline,
+        "description": "Medyan imputasyon + standardizasyon + Ridge(alpha=10)",
+    },
+    "Seasonal Naive": {
+        "kind": "naive", "factory": SeasonalNaive,
+        "description": f"Bir hafta ({SEASON} gün) önceki değer",
+    },
+    "Additive Seasonality": {
+        "kind": "dates", "factory": AdditiveSeasonality,
+        "description": "Parçalı doğrusal trend + haftalık + yıllık Fourier + tatil / kampanya (Prophet tarzı)",
+    },
+}
+
+
+def model_params(name):
+    spec = MODELS[name]
+    model = spec["factory"]()
+    params = model.get_params() if hasattr(model, "get_params") else vars(model)
+    return {k: v for k, v in params.items() if isinstance(v, (int, float, str, bool, type(None)))}
+
+
+def model_key(name):
+    """Stable id of a model configuration, e.g. ``gradient-boosting-1a2b3c4d``."""
+    params = json.dumps(model_params(name), sort_keys=True, default=str)
+    digest = hashlib.sha256(params.encode()).hexdigest()[:8]
+    return f"{name.lower().replace(' ', '-')}-{digest}"
+
+
+def champion_name(data_version=None):
+    """Champion of the latest evaluation, if it is a feature model that can recurse."""
+    evaluation = read_artifact(ARTIFACT, data_version)
+    name = evaluation and evaluation.get("champion")
+    return name if name in MODELS and MODELS[name]["kind"] == "features" else FALLBACK_MODEL
+
+
+# ---------------------------------------------------------------------------
+# Folds
+# ---------------------------------------------------------------------------
+
+def fit_predict(name, arrays, train, test, params=None):
+    """Fit ``name`` on the ``train`` rows of ``arrays`` and predict the ``test`` rows.
+
+    ``params`` override the model's defaults (``dashboard.tuning`` trials).
+    """
+    spec = MODELS[name]
+    model = spec["factory"]()
+    if params:
+        model.set_params(**params)
+    X, y, dates = arrays["X"], arrays["y"], arrays["dates"]
+    if spec["kind"] == "features":
+        # Short (sliding) windows can miss the long lags entirely; such
+        # columns carry nothing to fit on and are left out of that fold.
+        observed = ~np.isnan(X[train]).all(axis=0)
+        if not observed.all():
+            return model.fit(X[train][:, observed], y[train]).predict(X[test][:, observed])
+        return model.fit(X[train], y[train]).predict(X[test])
+    if spec["kind"] == "dates":
+        return model.fit(dates[train], y[train]).predict(dates[test])
+    return model.fit(y[train]).predict(arrays["seasonal"][test])
+
+
+def _day(value):
+    return str(pd.Timestamp(value).date())
+
+
+def evaluate(df, n_folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, budget=DEFAULT_BUDGET,
+             max_workers=None, models=None, step=None, window=None, by=None):
+    """Backtest ``models`` on ``df``; returns the artifact payload.
+
+    ``n_folds=None`` uses every fold that fits. ``window`` switches to a
+    sliding training window of that many days. With ``by`` the table holds
+    many series; folds cut all of them on the same days and the stored
+    prediction curve is their daily total.
+    """
+    started = time.perf_counter()
+    models = list(models or MODELS)
+    X_frame, y, dates = model_inputs(df, by)
+    X = X_frame.to_numpy()
+    groups = df[by].to_numpy()[target_rows(df, by)] if by else None
+    seasonal = seasonal_lag(y, SEASON, groups)
+
+    period, days = period_index(dates)
+    if np.any(period[1:] < period[:-1]):
+        order = np.argsort(period, kind="stable")
+        X, y, dates, seasonal, period = X[order], y[order], dates[order], seasonal[order], period[order]
+    folds = backtest_folds(len(days), horizon, step, n_folds, window)
+    results, timed_out = run_backtest(
+        fit_predict, {"X": X, "y": y, "dates": dates, "seasonal": seasonal},
+        period, folds, models, budget, max_workers,
+    )
+    bounds = np.searchsorted(period, folds)
+
+    # Daily totals over the tested span; a later fold overwrites an overlapping earlier one.
+    first, last = folds[0, 1], folds[-1, 2]
+    span = slice(bounds[0, 1], bounds[-1, 2])
+    actual = np.bincount(period[span] - first, y[span], minlength=last - first)
+    curves = {name: np.full(last - first, np.nan) for name in models}
+
+    fold_rows, summary = [], []
+    for name in models:
+        completed = [k for k in range(len(folds)) if (name, k) in results]
+        for k in completed:
+            b, c = bounds[k, 1:]
+            curve = np.bincount(period[b:c] - first, results[(name, k)][0], minlength=last - first)
+            covered = np.zeros(last - first, dtype=bool)
+            covered[period[b:c] - first] = True
+            curves[name][covered] = curve[covered]
+
+        metrics = {}
+        if completed:
+            actual_rows = np.concatenate([y[bounds[k, 1]:bounds[k, 2]] for k in completed])
+            predicted_rows = np.concatenate([results[(name, k)][0] for k in completed])
+            per_fold = fold_metrics(actual_rows, predicted_rows,
+                                    [bounds[k, 2] - bounds[k, 1] for k in completed])
+            metrics = {k: {m: float(v[i]) for m, v in per_fold.items()} for i, k in enumerate(completed)}
+            pooled = scores(actual_rows, predicted_rows)
+        else:
+            pooled = {"rmse": None, "mae": None, "r2": None}
+        summary.append({"model": name, **pooled, "folds_completed": len(completed)})
+
+        for k, (a, b, c) in enumerate(folds):
+            fold_rows.append({
+                "model": name, "fold": k, "train_rows": int(bounds[k, 1] - bounds[k, 0]),
+                "train_start": _day(days[a]), "test_start": _day(days[b]), "test_end": _day(days[c - 1]),
+                "completed": k in metrics,
+                "fit_seconds": results[(name, k)][1] if k in metrics else None,
+                **metrics.get(k, {}),
+            })
+
+    ranked = [row for row in summary if row["rmse"] is not None]
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {"folds": len(folds), "horizon": horizon, "step": step or horizon,
+                   "window": window, "budget_seconds": budget,
+                   "workers": max_workers or os.cpu_count(), "rows": len(y),
+                   "series": len(np.unique(groups)) if by else 1,
+                   "features": list(X_frame.columns), "sklearn": sklearn.__version__},
+        "models": {name: {"description": MODELS[name]["description"], "params": model_params(name)}
+                   for name in models},
+        "summary": summary,
+        "folds": fold_rows,
+        "champion": min(ranked, key=lambda row: row["rmse"])["model"] if ranked else None,
+        "predictions": {
+            DATE_COLUMN: [_day(d) for d in days[first:last]],
+            TARGET_COLUMN: actual.tolist(),
+            **{name: [None if np.isnan(v) else round(float(v), 4) for v in curves[name]]
+               for name in models},
+        },
+        "wall_seconds": time.perf_counter() - started,
+        "timed_out": timed_out,
+    }
+
+
+def run(path=DATA_PATH, **kwargs):
+    """Evaluate the table at ``path`` and write its versioned artifact."""
+    version = dataset_version(path)
+    payload = {"data_version": version, **evaluate(read_feature_table_cached(path), **kwargs)}
+    return write_artifact(ARTIFACT, version, payload), payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validate the candidate models.")
+    parser.add_argument("--path", default=str(DATA_PATH))
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="test days per fold")
+    parser.add_argument("--step", type=int, help="days between fold origins (default: horizon)")
+    parser.add_argument("--window", type=int, help="sliding training window in days (default: expanding)")
+    parser.add_argument("--all-folds", action="store_true", help="every fold that fits, not --folds")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="wall-clock seconds")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    target, payload = run(args.path, n_folds=None if args.all_folds else args.folds,
+                          horizon=args.horizon, step=args.step, window=args.window,
+                          budget=args.budget, max_workers=args.workers)
+    print(pd.DataFrame(payload["summary"]).to_string(index=False))
+    print(f"Champion: {payload['champion']}  ({payload['wall_seconds']:.1f}s, "
+          f"{payload['timed_out']} fits over budget) -> {target}")
+
+
+if __name__ == "__main__":
+    main()
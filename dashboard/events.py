@@ -0,0 +1,206 @@
+"""
+Holiday and retail-event calendar features.
+
+An event table has one row per event day: ``date``, ``name`` and ``kind``
+(one of ``KINDS``). It is made from two sources:
+
+* the built-in Brazilian calendar (``builtin_events()``). This covers the
+  national holidays (Easter-based ones included) and the retail days
+  (Dia das Mães, Black Friday, ...). It also has paydays: the 5th business
+  day of every month and the two 13th-salary instalments. Campaign weeks
+  are included too,
+* an optional local table (``calendar_events.csv`` in the repository
+  root, or ``DASHBOARD_EVENTS_PATH``). Its columns are ``date, name, kind``
+  plus an optional inclusive ``end`` for multi-day campaigns.
+
+``event_columns()`` turns any dates into the ``EVENT_COLUMNS``: one 0/1
+flag per kind, ``days_to_next_holiday`` and ``days_since_last_event``.
+The event days of each kind are a sorted array, and every day from the
+first to the last date is looked up with ``searchsorted``. The rows then
+gather the result by their day offset. A long table of many series costs
+one lookup per calendar day plus one gather per row.
+
+    python -m dashboard.features raw_orders.csv --events -o demand_features_final.csv
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import EVENT_COLUMNS, EVENT_FLAG_COLUMNS, ROOT
+
+# Event kind -> flag column.
+KINDS = dict(zip(("holiday", "retail", "payday", "campaign"), EVENT_FLAG_COLUMNS))
+EVENTS_PATH = os.environ.get("DASHBOARD_EVENTS_PATH", ROOT / "calendar_events.csv")
+# National since 2024 (Lei 14.759/2023); a state holiday in most of Brazil before.
+CONSCIENCIA_NEGRA_FROM = 2024
+PAYDAY_BUSINESS_DAY = 5  # CLT: salaries are due by the 5th business day
+DAY = np.timedelta64(1, "D")
+
+
+def _date(years, month, day):
+    """datetime64[D] of ``month``/``day`` in each of ``years``."""
+    years = np.asarray(years, dtype=np.int64)
+    months = (years - 1970) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return months.astype("datetime64[M]").astype("datetime64[D]") + (np.asarray(day) - 1) * DAY
+
+
+def easter(years):
+    """Easter Sunday of each year (Gregorian; anonymous algorithm)."""
+    y = np.asarray(years, dtype=np.int64)
+    a, b, c = y % 19, y // 100, y % 100
+    d, e = b // 4, b % 4
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    n = h + l - 7 * m + 114
+    return _date(y, n // 31, n % 31 + 1)
+
+
+def nth_weekday(years, month, weekday, n):
+    """The ``n``-th ``weekday`` (Monday = 0) of ``month`` in each year."""
+    first = _date(years, month, 1)
+    shift = (weekday - (first.astype(np.int64) + 3) % 7) % 7
+    return first + (shift + 7 * (n - 1)) * DAY
+
+
+def _events(days, name, kind):
+    days = np.asarray(days, dtype="datetime64[D]").ravel()
+    return pd.DataFrame({"date": days.astype("datetime64[ns]"), "name": name, "kind": kind})
+
+
+def _span(first, last):
+    """Every day of the inclusive ranges [first, last]."""
+    first = np.asarray(first, dtype="datetime64[D]")
+    length = (np.asarray(last, dtype="datetime64[D]") - first).astype(np.int64) + 1
+    offsets = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+    return np.repeat(first, length) + offsets * DAY
+
+
+def national_holidays(years):
+    """Brazilian national holidays (and the Carnaval days off) of ``years``."""
+    years = np.asarray(years, dtype=np.int64)
+    sunday = easter(years)
+    fixed = [(1, 1, "Confraternização Universal"), (4, 21, "Tiradentes"), (5, 1, "Dia do Trabalho"),
+             (9, 7, "Independência"), (10, 12, "Nossa Senhora Aparecida"), (11, 2, "Finados"),
+             (11, 15, "Proclamação da República"), (12, 25, "Natal")]
+    parts = [_events(_date(years, month, day), name, "holiday") for month, day, name in fixed]
+    parts += [
+        _events(sunday - 48 * DAY, "Carnaval", "holiday"),
+        _events(sunday - 47 * DAY, "Carnaval", "holiday"),
+        _events(sunday - 2 * DAY, "Sexta-feira Santa", "holiday"),
+        _events(sunday + 60 * DAY, "Corpus Christi", "holiday"),
+        _events(_date(years[years >= CONSCIENCIA_NEGRA_FROM], 11, 20), "Consciência Negra", "holiday"),
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def builtin_events(years):
+    """The built-in Brazilian event table of ``years``: holidays, retail days, paydays, campaigns."""
+    years = np.asarray(years, dtype=np.int64)
+    holidays = national_holidays(years)
+    black_friday = nth_weekday(years, 11, 3, 4) + DAY  # day after the 4th Thursday of November
+    consumer_day = _date(years, 3, 15)
+    christmas = _date(years, 12, 25)
+
+    retail = [
+        _events(consumer_day, "Dia do Consumidor", "retail"),
+        _events(nth_weekday(years, 5, 6, 2), "Dia das Mães", "retail"),
+        _events(_date(years, 6, 12), "Dia dos Namorados", "retail"),
+        _events(nth_weekday(years, 8, 6, 2), "Dia dos Pais", "retail"),
+        _events(_date(years, 10, 12), "Dia das Crianças", "retail"),
+        _events(black_friday, "Black Friday", "retail"),
+        _events(black_friday + 3 * DAY, "Cyber Monday", "retail"),
+        _events(christmas - DAY, "Véspera de Natal", "retail"),
+    ]
+    # Paydays: the 5th business day of each month, and the 13th salary (by
+    # 30 Nov and 20 Dec, moved back to a business day).
+    holiday_days = holidays["date"].to_numpy().astype("datetime64[D]")
+    months = _date(np.repeat(years, 12), np.tile(np.arange(1, 13), len(years)), 1)
+    salary = np.busday_offset(months, PAYDAY_BUSINESS_DAY - 1, roll="forward", holidays=holiday_days)
+    thirteenth = np.busday_offset(np.r_[_date(years, 11, 30), _date(years, 12, 20)], 0,
+                                  roll="backward", holidays=holiday_days)
+    paydays = [_events(salary, "Salário", "payday"), _events(thirteenth, "13º salário", "payday")]
+    campaigns = [
+        _events(_span(consumer_day - 6 * DAY, consumer_day), "Semana do Consumidor", "campaign"),
+        _events(_span(black_friday - 4 * DAY, black_friday + 3 * DAY), "Semana Black Friday", "campaign"),
+        _events(_span(christmas - 10 * DAY, christmas - DAY), "Compras de Natal", "campaign"),
+    ]
+    return pd.concat([holidays, *retail, *paydays, *campaigns], ignore_index=True)
+
+
+def read_events(path=EVENTS_PATH):
+    """Parse a local event table (``date, name, kind[, end]``); one row per event day."""
+    table = pd.read_csv(path)
+    missing = [c for c in ("date", "name", "kind") if c not in table]
+    if missing:
+        raise ValueError(f"{path}: missing columns: {', '.join(missing)}")
+    unknown = sorted(set(table["kind"]) - set(KINDS))
+    if unknown:
+        raise ValueError(f"{path}: unknown event kinds {unknown}; expected one of {list(KINDS)}")
+    first = pd.to_datetime(table["date"], format="%Y-%m-%d").to_numpy()
+    last = pd.to_datetime(table["end"], format="%Y-%m-%d").fillna(
+        pd.Series(first)).to_numpy() if "end" in table else first
+    if (last < first).any():
+        raise ValueError(f"{path}: an event ends before it starts")
+    length = (last.astype("datetime64[D]") - first.astype("datetime64[D]")).astype(np.int64) + 1
+    return pd.DataFrame({"date": _span(first, last).astype("datetime64[ns]"),
+                         "name": np.repeat(table["name"].to_numpy(), length),
+                         "kind": np.repeat(table["kind"].to_numpy(), length)})
+
+
+def event_table(years, path=EVENTS_PATH):
+    """Built-in events of ``years`` plus the local table at ``path``, if it exists."""
+    parts = [builtin_events(years)]
+    if path is not None and os.path.exists(path):
+        parts.append(read_events(path))
+    table = pd.concat(parts, ignore_index=True)
+    return table.drop_duplicates().sort_values(["date", "kind"], kind="stable", ignore_index=True)
+
+
+def event_columns(dates, events=None):
+    """``EVENT_COLUMNS`` for any dates (repeated across series or not).
+
+    ``events`` is an event table, or the path of a local table to combine
+    with the built-in calendar. By default it is ``event_table()``. The
+    built-in part covers the years of ``dates`` and one year either side,
+    so the next holiday and the last event always exist. A complete custom
+    table must cover the dates the same way.
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    if not len(days):
+        return {col: np.zeros(0, dtype=np.int64) for col in EVENT_COLUMNS}
+    first, last = days.min(), days.max()
+    if events is None or isinstance(events, (str, os.PathLike)):
+        years = np.arange(first.astype("datetime64[Y]").astype(np.int64) + 1969,
+                          last.astype("datetime64[Y]").astype(np.int64) + 1972)
+        events = event_table(years, EVENTS_PATH if events is None else events)
+    # Every calendar day of the range once; the rows gather by day offset.
+    grid = np.arange(first, last + DAY, DAY)
+    offset = (days - first).astype(np.int64)
+    event_days = events["date"].to_numpy().astype("datetime64[D]")
+    kinds = events["kind"].to_numpy()
+
+    out = {}
+    for kind, col in KINDS.items():
+        marked = np.unique(event_days[kinds == kind])
+        i = np.minimum(np.searchsorted(marked, grid), max(len(marked) - 1, 0))
+        hit = marked[i] == grid if len(marked) else np.zeros(len(grid), dtype=bool)
+        out[col] = hit.astype(np.int8)[offset]
+
+    holidays = np.unique(event_days[kinds == "holiday"])
+    i = np.searchsorted(holidays, grid, "left")
+    if i[-1] == len(holidays):
+        raise ValueError(f"event table has no holiday on or after {last}")
+    out["days_to_next_holiday"] = (holidays[i] - grid).astype(np.int64)[offset]
+
+    everything = np.unique(event_days)
+    j = np.searchsorted(everything, grid, "right")
+    if j[0] == 0:
+        raise ValueError(f"event table has no event on or before {first}")
+    out["days_since_last_event"] = (grid - everything[j - 1]).astype(np.int64)[offset]
+    return out
+
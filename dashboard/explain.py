@@ -0,0 +1,228 @@
+"""
+SHAP explanations for the gradient-boosting model.
+
+``tree_shap()`` computes exact path-dependent TreeSHAP values for a fitted
+``HistGradientBoostingRegressor``. Within one leaf's root-to-leaf path only
+the distinct features on that path matter, and for a given row each of them
+either agrees with the whole path or not. A leaf therefore contributes one
+of 2^d possible vectors (d = distinct path features), so the Shapley table
+is built once per leaf, with a subset-sum transform over the 2^d patterns,
+and every row just looks up its pattern. There is no per-row Python work.
+
+``run()`` fits the model on the full table, explains every day and stores
+the result as a ``shap`` artifact keyed by data version and model. The
+pages never compute SHAP themselves: ``load_explanation()`` serves the
+stored result and, when the data has moved on, starts the computation in a
+background process and keeps serving the previous result until it lands.
+
+    python -m dashboard.explain
+"""
+
+import argparse
+import json
+from math import factorial
+
+import numpy as np
+import pandas as pd
+
+from dashboard.artifacts import background_job, find_artifact, load_artifact, write_artifact
+from dashboard.data import (
+    DATA_PATH,
+    DATE_COLUMN,
+    TARGET_COLUMN,
+    dataset_version,
+    read_feature_table_cached,
+)
+from dashboard.evaluation import MODELS, model_inputs, model_key
+
+ARTIFACT = "shap"
+EXPLAINED_MODEL = "Gradient Boosting"
+
+
+# ---------------------------------------------------------------------------
+# TreeSHAP
+# ---------------------------------------------------------------------------
+
+def _leaf_paths(nodes):
+    """(leaf node, [(internal node, went_left), ...]) for every leaf."""
+    paths, stack = [], [(0, [])]
+    while stack:
+        node, path = stack.pop()
+        if nodes["is_leaf"][node]:
+            paths.append((node, path))
+            continue
+        stack.append((nodes["left"][node], path + [(node, True)]))
+        stack.append((nodes["right"][node], path + [(node, False)]))
+    return paths
+
+
+def _pattern_table(zero_fractions):
+    """Shapley values of a unit leaf for every agree/disagree pattern.
+
+    ``zero_fractions[k]`` is the share of training cover that follows the
+    path at feature k's splits. Row ``p`` of the result holds the values of
+    the d features when the bits of ``p`` mark the features the row agrees
+    with.
+    """
+    z = np.asarray(zero_fractions, dtype=float)
+    d = len(z)
+    masks = np.arange(1 << d)
+    bits = (masks[:, None] >> np.arange(d)) & 1
+    size = bits.sum(axis=1)
+    # Product of z over features outside the mask, and the Shapley weight |S|!(d-|S|-1)!/d!.
+    outside = np.prod(np.where(bits, 1.0, z), axis=1)
+    weight = np.array([factorial(s) * factorial(d - s - 1) / factorial(d) if s < d else 0.0
+                       for s in range(d + 1)])[size]
+
+    # g_i(S) = w(|S|) * prod_{j not in S u {i}} z_j for S without i.
+    with_i = masks[None, :] | (1 << np.arange(d))[:, None]
+    g = np.where(bits.T == 0, weight[None, :] * outside[with_i], 0.0)
+    # Sum over subsets S of p: a cumulative sum along every bit axis.
+    g = g.reshape((d,) + (2,) * d)
+    for axis in range(1, d + 1):
+        g = np.cumsum(g, axis=axis)
+    return (bits - z[None, :]) * g.reshape(d, -1).T
+
+
+def tree_shap(model, X):
+    """(shap values (rows x features), expected value) of a fitted HistGradientBoostingRegressor."""
+    X = np.asarray(X, dtype=float)
+    phi = np.zeros_like(X)
+    expected = float(np.ravel(model._baseline_prediction)[0])
+    for (predictor,) in model._predictors:
+        nodes = predictor.nodes
+        internal = np.flatnonzero(~nodes["is_leaf"].astype(bool))
+        goes_left = {}
+        for node in internal:
+            x = X[:, nodes["feature_idx"][node]]
+            goes_left[node] = np.where(np.isnan(x), bool(nodes["missing_go_to_left"][node]),
+                                       x <= nodes["num_threshold"][node])
+        count = nodes["count"].astype(float)
+
+        for leaf, path in _leaf_paths(nodes):
+            value = nodes["value"][leaf]
+            if not path:
+                expected += value
+                continue
+            features, agrees, zero = [], [], []
+            for node, went_left in path:
+                child = nodes["left"][node] if went_left else nodes["right"][node]
+                follows = goes_left[node] if went_left else ~goes_left[node]
+                ratio = count[child] / count[node]
+                f = nodes["feature_idx"][node]
+                if f in features:
+                    k = features.index(f)
+                    agrees[k] = agrees[k] & follows
+                    zero[k] *= ratio
+                else:
+                    features.append(f)
+                    agrees.append(follows)
+                    zero.append(ratio)
+            expected += value * np.prod(zero)
+            pattern = np.zeros(len(X), dtype=np.int64)
+            for k, agree in enumerate(agrees):
+                pattern |= agree.astype(np.int64) << k
+            phi[:, features] += value * _pattern_table(zero)[pattern]
+    return phi, expected
+
+
+# ---------------------------------------------------------------------------
+# Explanation store
+# ---------------------------------------------------------------------------
+
+def explanation_version(data_version, name=EXPLAINED_MODEL):
+    return f"{data_version}-{model_key(name)}"
+
+
+def explain(df, name=EXPLAINED_MODEL):
+    """Fit ``name`` on every day of ``df`` and explain each of its predictions."""
+    X_frame, y, dates = model_inputs(df)
+    X = X_frame.to_numpy()
+    model = MODELS[name]["factory"]().fit(X, y)
+    phi, expected = tree_shap(model, X)
+    prediction = model.predict(X)
+    return {
+        "model": name,
+        "model_key": model_key(name),
+        "features": list(X_frame.columns),
+        "expected_value": expected,
+        "max_additivity_error": float(np.abs(expected + phi.sum(axis=1) - prediction).max()),
+        "mean_abs_shap": dict(zip(X_frame.columns, np.abs(phi).mean(axis=0).round(6).tolist())),
+        DATE_COLUMN: [str(pd.Timestamp(d).date()) for d in dates],
+        TARGET_COLUMN: y.tolist(),
+        "prediction": prediction.round(4).tolist(),
+        "shap": phi.round(5).tolist(),
+        "values": np.where(np.isnan(X), None, X.round(5)).tolist(),
+    }
+
+
+def run(path=DATA_PATH, name=EXPLAINED_MODEL):
+    """Explain the table at ``path`` and store it under its data and model version."""
+    data_version = dataset_version(path)
+    payload = {"data_version": data_version, **explain(read_feature_table_cached(path), name)}
+    return write_artifact(ARTIFACT, explanation_version(data_version, name), payload)
+
+
+def load_explanation():
+    """(stored explanation or None, True if it matches the current data and model).
+
+    A missing explanation for the current version is computed in the
+    background; until it is ready the newest stored one is returned.
+    """
+    version = explanation_version(dataset_version())
+    if find_artifact(ARTIFACT, version) is None:
+        background_job("dashboard.explain", version)
+        return load_artifact(ARTIFACT), False
+    return load_artifact(ARTIFACT, version), True
+
+
+def shap_frame(explanation):
+    """SHAP values as a (days x features) frame indexed by date."""
+    return pd.DataFrame(explanation["shap"], columns=explanation["features"],
+                        index=pd.DatetimeIndex(explanation[DATE_COLUMN], name="date"))
+
+
+FEATURE_DESCRIPTIONS = {
+    "lag_1": "Dünkü talep",
+    "dayofweek": "Haftanın günü",
+    "is_weekend": "Hafta sonu",
+    "month": "Ay",
+    "year": "Yıl",
+    "is_high_short": "30 günlük ortalamanın üstünde",
+    "is_high_long": "180 günlük ortalamanın üstünde",
+    "is_peak_long": "Uzun dönem peak bayrağı",
+}
+FEATURE_PATTERNS = {
+    "lag": "{} gün önceki talep",
+    "rolling_mean": "{} günlük ortalama",
+    "rolling_std": "{} günlük std sapma",
+    "ewma": "{} günlük üssel ortalama",
+    "momentum": "{} günlük momentum",
+    "volatility": "{} günlük volatilite",
+}
+
+
+def feature_description(name):
+    """Short Turkish label of a model input for the explanation tables."""
+    if name in FEATURE_DESCRIPTIONS:
+        return FEATURE_DESCRIPTIONS[name]
+    if name.startswith("trend_"):
+        short, long = name.split("_")[1:]
+        return f"{short} / {long} günlük ortalama oranı"
+    stem, _, window = name.rpartition("_")
+    return FEATURE_PATTERNS[stem].format(window) if stem in FEATURE_PATTERNS else name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute and store SHAP explanations.")
+    parser.add_argument("--path", default=str(DATA_PATH))
+    args = parser.parse_args()
+    target = run(args.path)
+    explanation = json.loads(target.read_text())
+    top = pd.Series(explanation["mean_abs_shap"]).sort_values(ascending=False).head(10)
+    print(top.to_string())
+    print(f"additivity error {explanation['max_additivity_error']:.2e} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
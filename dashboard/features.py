@@ -0,0 +1,192 @@
+"""
+Batch feature engineering: raw ``order_date, daily_orders`` -> feature table.
+
+``build_features()`` produces exactly the columns of
+``demand_features_final.csv`` with whole-column NumPy / pandas operations
+(no Python loop over rows). Windows are positional, as in the original
+notebook: ``rolling(w, min_periods=1)``, ``ewm(span=w, adjust=False)`` and
+``shift(w)`` over the date-sorted rows.
+
+    python -m dashboard.features raw_orders.csv -o demand_features_final.csv
+    python -m dashboard.features raw_long.csv --by series -o demand_series_features.csv
+
+``--events`` (``events=`` in ``build_features()``) appends the holiday /
+retail-event columns of ``dashboard.events`` in the same pass.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import (
+    DATE_COLUMN,
+    EVENT_COLUMNS,
+    FEATURE_COLUMNS,
+    HIGH_LONG_WINDOW,
+    HIGH_SHORT_WINDOW,
+    PEAK_STD,
+    TARGET_COLUMN,
+    TREND_PAIRS,
+    VOLATILITY_WINDOW,
+    WINDOWS,
+    column_dtypes,
+)
+from dashboard.events import event_columns
+
+
+def calendar_columns(dates):
+    """dayofweek / is_weekend / month / year for a DatetimeIndex-like."""
+    dates = pd.DatetimeIndex(dates)
+    dayofweek = dates.dayofweek.to_numpy()
+    return {
+        "dayofweek": dayofweek,
+        "is_weekend": (dayofweek >= 5).astype(int),
+        "month": dates.month.to_numpy(),
+        "year": dates.year.to_numpy(),
+    }
+
+
+def group_starts(keys):
+    """Index of the first row of each row's group, for key-sorted rows."""
+    keys = np.asarray(keys)
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(first, np.arange(len(keys)), 0))
+
+
+def window_features(y, starts=None):
+    """Lag / rolling / EWMA / momentum / regime columns.
+
+    ``starts`` (see ``group_starts``) lets one call cover many series laid
+    out one after the other; windows never cross a series boundary. Rolling
+    sums come from prefix sums, so every window is two gathers and a
+    subtraction regardless of its length or the number of series.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    idx = np.arange(n)
+    grouped = starts is not None
+    starts = np.asarray(starts) if grouped else np.zeros(n, dtype=np.int64)
+    position = idx - starts
+    csum = np.concatenate(([0.0], np.cumsum(y)))
+    csq = np.concatenate(([0.0], np.cumsum(y * y)))
+
+    out = {}
+    for w in WINDOWS:
+        out[f"lag_{w}"] = np.where(position >= w, y[np.maximum(idx - w, 0)], np.nan)
+    for w in WINDOWS:
+        lo = np.maximum(idx - w + 1, starts)
+        count = idx + 1 - lo
+        total = csum[idx + 1] - csum[lo]
+        mean = total / count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (csq[idx + 1] - csq[lo] - total * mean) / (count - 1)
+            std = np.sqrt(np.maximum(var, 0.0))
+        out[f"rolling_mean_{w}"] = mean
+        out[f"rolling_std_{w}"] = np.where(count > 1, std, np.nan)
+
+    # One EWMA pass over all series back to back, then undo the carry-over at
+    # each series start: the two recursions differ by a term that decays as
+    # (1 - alpha) ** position, seeded with ewma(previous rows) - y at the start.
+    series = pd.Series(y)
+    first = position == 0
+    for w in WINDOWS:
+        ewma = series.ewm(span=w, adjust=False).mean().to_numpy()
+        if grouped:
+            carry = ewma[first] - y[first]
+            decay = (1.0 - 2.0 / (w + 1.0)) ** position
+            ewma = ewma - decay * carry[np.cumsum(first) - 1]
+        out[f"ewma_{w}"] = ewma
+    return derived_features(y, out)
+
+
+def derived_features(y, out):
+    """Columns that are element-wise functions of the window statistics."""
+    for w in WINDOWS:
+        out[f"momentum_{w}"] = y - out[f"lag_{w}"]
+    long_mean = out[f"rolling_mean_{HIGH_LONG_WINDOW}"]
+    long_std = out[f"rolling_std_{HIGH_LONG_WINDOW}"]
+    with np.errstate(invalid="ignore"):
+        out["is_high_short"] = (y > out[f"rolling_mean_{HIGH_SHORT_WINDOW}"]).astype(int)
+        out["is_high_long"] = (y > long_mean).astype(int)
+        out["is_peak_long"] = (y > long_mean + PEAK_STD * long_std).astype(int)
+    out[f"volatility_{VOLATILITY_WINDOW}"] = out[f"rolling_std_{VOLATILITY_WINDOW}"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for a, b in TREND_PAIRS:
+            out[f"trend_{a}_{b}"] = out[f"rolling_mean_{a}"] / out[f"rolling_mean_{b}"]
+    return out
+
+
+def build_features(raw, by=None, compact=False, events=None):
+    """Return the full feature table for raw ``order_date, daily_orders`` rows.
+
+    With ``by`` the input is a long table holding many series (one per
+    category, seller, state, ...); all of them are computed in the same
+    vectorised pass and the key column is kept first. ``compact`` casts
+    every column to the dashboard dtypes as soon as it is produced, which
+    halves peak memory on large tables.
+
+    ``events`` adds the ``EVENT_COLUMNS`` after the feature columns. It is
+    True for the default calendar, a local event CSV, or an event table
+    (see ``dashboard.events.event_columns``). Each calendar day is looked
+    up once, however many series share it.
+    """
+    dates = pd.to_datetime(raw[DATE_COLUMN]).to_numpy()
+    if by:
+        codes, keys = pd.factorize(raw[by], sort=True)
+        order = np.lexsort((dates, codes))
+        codes = codes[order]
+        starts = group_starts(codes)
+    else:
+        order = np.argsort(dates, kind="stable")
+        starts = None
+    dates = dates[order]
+    y = raw[TARGET_COLUMN].to_numpy()[order]
+
+    columns = {DATE_COLUMN: dates, TARGET_COLUMN: y}
+    columns.update(calendar_columns(dates))
+    columns.update(window_features(y, starts))
+    output = list(FEATURE_COLUMNS)
+    if events is not None:
+        columns.update(event_columns(dates, None if events is True else events))
+        output += EVENT_COLUMNS
+    ordered = {by: pd.Categorical.from_codes(codes, keys)} if by else {}
+    ordered.update((col, columns[col]) for col in output)
+    if compact:
+        dtypes = column_dtypes(output)
+        for col, dtype in dtypes.items():
+            ordered[col] = ordered[col].astype(dtype, copy=False)
+    # copy=False keeps one block per column instead of consolidating (2x peak memory).
+    return pd.DataFrame(ordered, copy=False)
+
+
+def compare_tables(expected, actual, rtol=1e-6, atol=1e-6):
+    """Max abs difference per numeric column; raises if NaN layouts differ."""
+    numeric = [c for c in FEATURE_COLUMNS if c != DATE_COLUMN]
+    exp = expected[numeric].to_numpy(dtype=float)
+    act = actual[numeric].to_numpy(dtype=float)
+    if not np.array_equal(np.isnan(exp), np.isnan(act)):
+        raise ValueError("Feature tables have different missing-value layouts")
+    diff = pd.Series(np.nanmax(np.abs(exp - act), axis=0, initial=0.0), index=numeric)
+    tolerance = atol + rtol * np.nanmax(np.abs(exp), axis=0, initial=0.0)
+    return diff, bool((diff.to_numpy() <= tolerance).all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the feature table from raw daily orders.")
+    parser.add_argument("raw", help="CSV with order_date,daily_orders columns")
+    parser.add_argument("-o", "--output", required=True, help="feature CSV to write")
+    parser.add_argument("--by", help="series key column of a long multi-series table")
+    parser.add_argument("--events", nargs="?", const=True, metavar="TABLE",
+                        help="add holiday / event columns (built-in Brazilian calendar, plus a "
+                             "date,name,kind[,end] CSV; default: calendar_events.csv if present)")
+    args = parser.parse_args()
+
+    features = build_features(pd.read_csv(args.raw), by=args.by, events=args.events)
+    features.to_csv(args.output, index=False, date_format="%Y-%m-%d")
+    print(f"Wrote {len(features)} rows x {len(features.columns)} columns to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
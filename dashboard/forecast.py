@@ -0,0 +1,326 @@
+"""
+Forecast service.
+
+``ForecastService`` keeps the champion model and the feature state of the
+last observed day in memory, so a request for "the next 30 days" neither
+retrains nor re-reads the CSV. Forecasts are recursive: each predicted day
+is fed back through ``FeatureState.step()`` to build the lag / rolling /
+EWMA inputs of the next one (see ``dashboard.multistep``).
+
+Once ``python -m dashboard.intervals`` has stored the backtest residual
+quantiles of the same data and model version, every forecast also carries
+``p50`` / ``p90`` / ``p95`` / ``p99`` columns.
+
+Requests go through a ``MicroBatcher``: concurrent callers are queued for at
+most a few milliseconds and answered by a single recursion, with one
+vectorised ``predict`` call per forecast day for the whole batch.
+
+In process::
+
+    service = ForecastService.load()
+    service.forecast(30)            # DataFrame(order_date, forecast)
+
+Over HTTP (``GET /forecast?horizon=30``, ``GET /health``)::
+
+    python -m dashboard.forecast --serve --port 8765
+    python -m dashboard.forecast --horizon 30
+"""
+
+import argparse
+import concurrent.futures as cf
+import json
+import os
+import pickle
+import queue
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import streamlit as st
+
+from dashboard.artifacts import ARTIFACTS_DIR
+from dashboard.data import DATA_PATH, DATE_COLUMN, dataset_version, read_feature_table_cached
+from dashboard.evaluation import MODELS, champion_name, model_inputs, model_key
+from dashboard.intervals import quantile_forecast, read_intervals
+from dashboard.multistep import Origin, forecast_frame, recursive_forecast
+from dashboard.profiling import section, tracked_cache
+
+DEFAULT_HORIZON = 30
+MAX_HORIZON = 365
+MODELS_DIR = ARTIFACTS_DIR / "models"
+
+
+# ---------------------------------------------------------------------------
+# Model store
+# ---------------------------------------------------------------------------
+
+def load_model(path=DATA_PATH, name=None):
+    """(fitted model, name) for the table at ``path``; fitted once per data / model version."""
+    data_version = dataset_version(path)
+    name = name or champion_name(data_version)
+    target = MODELS_DIR / f"{data_version}-{model_key(name)}.pkl"
+    if target.exists():
+        with open(target, "rb") as fh:
+            return pickle.load(fh), name
+
+    X, y, _ = model_inputs(read_feature_table_cached(path))
+    model = MODELS[name]["factory"]().fit(X.to_numpy(), y)
+    try:
+        save_model(model, target)
+    except OSError:
+        pass  # read-only checkout: keep the model in memory only
+    return model, name
+
+
+def save_model(model, target):
+    """Atomically pickle ``model`` to ``target`` and drop the models of older data versions."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".pkl")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(model, fh)
+        os.chmod(tmp, 0o644)  # mkstemp creates owner-only files
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    version = target.name.split("-", 1)[0]
+    for old in target.parent.glob("*.pkl"):
+        if not old.name.startswith(f"{version}-"):
+            old.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Forecaster
+# ---------------------------------------------------------------------------
+
+class Forecaster:
+    """Champion model plus the feature state at the end of the table."""
+
+    def __init__(self, model, table, name, data_version):
+        self.model = model
+        self.name = name
+        self.data_version = data_version
+        self.origin = Origin.from_table(table)
+        self.last_date = pd.Timestamp(self.origin.last_dates[0])
+        self.intervals = None
+        self._path = None  # longest forecast so far; a shorter one is its prefix
+
+    @classmethod
+    def load(cls, path=DATA_PATH, name=None):
+        model, name = load_model(path, name)
+        return cls(model, read_feature_table_cached(path), name, dataset_version(path))
+
+    def interval_offsets(self):
+        """Stored intervals of this data and model version, picked up once they exist."""
+        if self.intervals is None:
+            self.intervals = read_intervals(self.data_version, self.name)
+        return self.intervals
+
+    def predict_batch(self, horizons):
+        """One recursion to the longest horizon, sliced per request.
+
+        The forecast path is kept for this data version; a request that is
+        not longer than it costs no recursion at all.
+        """
+        if self._path is None or len(self._path) < max(horizons):
+            self._path = forecast_frame(self.origin,
+                                        recursive_forecast(self.model, self.origin, max(horizons)))
+        frame = self._path.iloc[:max(horizons)]
+        if self.interval_offsets() is not None:
+            frame = quantile_forecast(frame, self.intervals)
+        return [frame.iloc[:h] for h in horizons]
+
+
+# ---------------------------------------------------------------------------
+# Micro-batching service
+# ---------------------------------------------------------------------------
+
+class MicroBatcher:
+    """Collects concurrent calls and hands them to ``handler`` as one batch."""
+
+    _STOP = object()
+
+    def __init__(self, handler, max_batch=64, max_wait=0.002):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.closed = False
+        self._thread = threading.Thread(target=self._run, name="forecast-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = cf.Future()
+        with self._lock:
+            # Nothing may queue behind _STOP: it would never be answered.
+            if self.closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """Answer what is queued, then stop the thread (idempotent)."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is self._STOP:
+                return
+            batch, stop = [first], False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if entry is self._STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            items, futures = zip(*batch)
+            self.batches += 1
+            try:
+                results = self.handler(list(items))
+            except Exception as exc:  # delivered to every caller of the batch
+                for future in futures:
+                    future.set_exception(exc)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            if stop:
+                return
+
+
+class ForecastService:
+    """Warm forecaster behind a micro-batcher; safe to call from many threads."""
+
+    def __init__(self, forecaster, max_batch=64, max_wait=0.002):
+        self.forecaster = forecaster
+        self.batcher = MicroBatcher(forecaster.predict_batch, max_batch, max_wait)
+
+    @classmethod
+    def load(cls, path=DATA_PATH, name=None, **kwargs):
+        return cls(Forecaster.load(path, name), **kwargs)
+
+    def submit(self, horizon=DEFAULT_HORIZON):
+        horizon = int(horizon)
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f"horizon must be between 1 and {MAX_HORIZON}, got {horizon}")
+        return self.batcher.submit(horizon)
+
+    def forecast(self, horizon=DEFAULT_HORIZON, timeout=None):
+        """DataFrame(order_date, forecast) for the next ``horizon`` days."""
+        return self.submit(horizon).result(timeout)
+
+    def info(self):
+        f = self.forecaster
+        return {"model": f.name, "data_version": f.data_version,
+                "last_date": str(f.last_date.date()), "batches": self.batcher.batches,
+                "quantiles": f.intervals is not None}
+
+    def close(self):
+        self.batcher.close()
+
+
+# An evicted service is closed, so its batcher thread no longer pins the model and table.
+@tracked_cache(st.cache_resource, show_spinner="Tahmin modeli yükleniyor...", max_entries=2,
+               on_release=ForecastService.close)
+def get_forecast_service(version):
+    """Warm service for the current data version, shared by every session."""
+    return ForecastService.load()
+
+
+def load_forecast(horizon=DEFAULT_HORIZON):
+    """Forecast for the dashboard pages; the model is loaded once per data version.
+
+    Reruns get the service's stored forecast path, so only a longer horizon
+    than any asked before runs the recursion.
+    """
+    with section("load_forecast"):
+        service = get_forecast_service(dataset_version())
+        try:
+            return service.forecast(horizon)
+        except RuntimeError:
+            # Released by another session between the lookup and the call.
+            return get_forecast_service(dataset_version()).forecast(horizon)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def make_server(service, host="127.0.0.1", port=8765):
+    """``ThreadingHTTPServer`` exposing ``service`` as JSON over GET."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self._send(200, {"status": "ok", **service.info()})
+            if url.path != "/forecast":
+                return self._send(404, {"error": f"unknown path {url.path}"})
+            try:
+                horizon = int(parse_qs(url.query).get("horizon", [DEFAULT_HORIZON])[0])
+                frame = service.forecast(horizon)
+            except ValueError as exc:
+                return self._send(400, {"error": str(exc)})
+            values = frame.drop(columns=DATE_COLUMN).round(3)
+            self._send(200, {
+                **service.info(),
+                "horizon": horizon,
+                "forecast": [{DATE_COLUMN: str(d.date()), **row}
+                             for d, row in zip(frame[DATE_COLUMN], values.to_dict("records"))],
+            })
+
+        def log_message(self, format, *args):
+            pass  # keep load tests and schedulers quiet
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast the next days with the champion model.")
+    parser.add_argument("--path", default=str(DATA_PATH))
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON)
+    parser.add_argument("--serve", action="store_true", help="run the HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    service = ForecastService.load(args.path)
+    if not args.serve:
+        print(service.forecast(args.horizon).to_string(index=False))
+        return
+    server = make_server(service, args.host, args.port)
+    print(f"Serving {service.info()['model']} on http://{args.host}:{args.port}/forecast?horizon=30")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
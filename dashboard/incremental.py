@@ -0,0 +1,134 @@
+"""
+Incremental (one day at a time) computation of the derived feature columns.
+
+``FeatureState`` keeps, for each of S series, the last ``max(WINDOWS)``
+observations in a ring buffer, running sums / sums of squares and non-zero
+counts for every rolling window and the current EWMA values. ``step()`` consumes one new
+observation per series and returns the complete feature row in O(1) per
+column, vectorised over the series axis.
+
+Windows are positional (the last ``w`` rows), exactly like the offline
+table, so gaps in the calendar are not filled.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import DATE_COLUMN, EVENT_COLUMNS, FEATURE_COLUMNS, TARGET_COLUMN, WINDOWS
+from dashboard.events import event_columns
+from dashboard.features import calendar_columns, derived_features
+
+HISTORY = max(WINDOWS)
+
+
+class FeatureState:
+    """Rolling / EWMA state for S series, advanced one observation at a time."""
+
+    def __init__(self, n_series=1):
+        self.n_series = n_series
+        self.buffer = np.full((n_series, HISTORY), np.nan)
+        self.pos = 0                                  # next slot to write
+        self.seen = np.zeros(n_series, dtype=np.int64)
+        self.sums = {w: np.zeros(n_series) for w in WINDOWS}
+        self.sumsq = {w: np.zeros(n_series) for w in WINDOWS}
+        self.nonzero = {w: np.zeros(n_series, dtype=np.int64) for w in WINDOWS}
+        self.ewma = {w: np.full(n_series, np.nan) for w in WINDOWS}
+        self.alpha = {w: 2.0 / (w + 1.0) for w in WINDOWS}
+
+    @classmethod
+    def from_history(cls, history, ewma=None):
+        """Build the state from past observations.
+
+        ``history`` is (S, T) with the newest value last; rows may be
+        left-padded with NaN when a series is shorter. ``ewma`` maps span to
+        the current (S,) EWMA values; when omitted the EWMAs are replayed
+        from ``history``, which is exact only if it holds the whole series.
+        """
+        history = np.atleast_2d(np.asarray(history, dtype=float))
+        state = cls(history.shape[0])
+        # Only the last HISTORY values can still leave a window; replaying
+        # those through step() would also rebuild the sums, but the direct
+        # form below is O(HISTORY) per series without a Python loop per day.
+        tail = history[:, -HISTORY:]
+        valid = ~np.isnan(tail)
+        state.seen = valid.sum(axis=1) + (~np.isnan(history[:, :-HISTORY])).sum(axis=1)
+        state.buffer[:, HISTORY - tail.shape[1]:] = tail
+        for w in WINDOWS:
+            window = np.nan_to_num(tail[:, -w:])
+            state.sums[w] = window.sum(axis=1)
+            state.sumsq[w] = (window ** 2).sum(axis=1)
+            state.nonzero[w] = (window != 0).sum(axis=1)
+        if ewma is None:
+            for t in range(history.shape[1]):
+                state._update_ewma(history[:, t])
+        else:
+            state.ewma = {w: np.asarray(ewma[w], dtype=float).copy() for w in WINDOWS}
+        return state
+
+    def lag(self, w):
+        """Value observed ``w`` steps before the next one (NaN if too short)."""
+        value = self.buffer[:, (self.pos - w) % HISTORY]
+        return np.where(self.seen >= w, value, np.nan)
+
+    def _update_ewma(self, y):
+        for w in WINDOWS:
+            prev = self.ewma[w]
+            updated = prev + self.alpha[w] * (y - prev)
+            # First observation seeds the EWMA (adjust=False); NaN keeps it.
+            self.ewma[w] = np.where(np.isnan(prev), y, np.where(np.isnan(y), prev, updated))
+
+    def step(self, y):
+        """Consume one value per series and return its derived columns."""
+        y = np.broadcast_to(np.asarray(y, dtype=float), (self.n_series,))
+        row = {}
+        count = {}
+        for w in WINDOWS:
+            lag = self.lag(w)
+            row[f"lag_{w}"] = lag
+            leaving = np.nan_to_num(lag)
+            self.nonzero[w] = self.nonzero[w] + (y != 0) - (leaving != 0)
+            # Adding and removing fractional values (forecasts fed back in)
+            # leaves ~1e-15 residue; an all-zero window must sum to exactly 0
+            # or the trend ratios become +-inf instead of NaN.
+            empty = self.nonzero[w] == 0
+            self.sums[w] = np.where(empty, 0.0, self.sums[w] + y - leaving)
+            self.sumsq[w] = np.where(empty, 0.0, self.sumsq[w] + y ** 2 - leaving ** 2)
+            count[w] = np.minimum(self.seen + 1, w)
+
+        for w in WINDOWS:
+            n = count[w]
+            mean = self.sums[w] / n
+            with np.errstate(invalid="ignore", divide="ignore"):
+                var = (self.sumsq[w] - self.sums[w] * mean) / (n - 1)
+                std = np.sqrt(np.maximum(var, 0.0))
+            row[f"rolling_mean_{w}"] = mean
+            row[f"rolling_std_{w}"] = np.where(n > 1, std, np.nan)
+
+        self._update_ewma(y)
+        for w in WINDOWS:
+            row[f"ewma_{w}"] = self.ewma[w]
+
+        self.buffer[:, self.pos] = y
+        self.pos = (self.pos + 1) % HISTORY
+        self.seen = self.seen + 1
+        return derived_features(y, row)
+
+
+def extend_features(state, dates, values, events=None):
+    """Advance a single-series ``state`` over new days; return the new rows.
+
+    ``events`` adds the event columns, as in ``build_features()``.
+    """
+    dates = pd.DatetimeIndex(dates)
+    values = np.asarray(values, dtype=float)
+    rows = [state.step(v) for v in values]
+    frame = {DATE_COLUMN: dates, TARGET_COLUMN: values}
+    frame.update(calendar_columns(dates))
+    columns = list(FEATURE_COLUMNS)
+    if events is not None:
+        frame.update(event_columns(dates, None if events is True else events))
+        columns += EVENT_COLUMNS
+    for col in columns:
+        if col not in frame:
+            frame[col] = np.array([row[col][0] for row in rows])
+    return pd.DataFrame(frame, columns=columns)
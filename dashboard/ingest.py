@@ -0,0 +1,132 @@
+"""
+Append new days of orders to the feature table without rebuilding it.
+
+Only the last ``max(WINDOWS)`` rows of the CSV are read (by seeking from the
+end of the file) to restore the rolling / EWMA state; the new feature rows
+are appended to the CSV and the binary sidecar is refreshed from the
+existing memory-mapped columns, so nothing is re-parsed. A persisted
+quantile digest (``dashboard.quantiles``) and rollup cube (``dashboard.cube``)
+are updated with just the new days.
+
+    python -m dashboard.ingest 2018-09-04=120 2018-09-05=98
+    python -m dashboard.ingest --csv new_orders.csv   # order_date,daily_orders
+"""
+
+import argparse
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard.cube import load_cube_file, save_cube
+from dashboard.data import (
+    DATA_PATH,
+    DATE_COLUMN,
+    EVENT_COLUMNS,
+    TARGET_COLUMN,
+    WINDOWS,
+    column_dtypes,
+    dataset_version,
+    read_sidecar,
+    write_sidecar,
+)
+from dashboard.incremental import HISTORY, FeatureState, extend_features
+from dashboard.quantiles import load_digest, save_digest
+
+
+def read_tail(path, n_rows, chunk_size=1 << 16):
+    """Parse the header and the last ``n_rows`` rows of a CSV at full precision."""
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        fh.seek(0, os.SEEK_END)
+        end = fh.tell()
+        start, data = end, b""
+        while start > len(header) and data.count(b"\n") <= n_rows:
+            start = max(len(header), start - chunk_size)
+            fh.seek(start)
+            data = fh.read(end - start)
+    lines = data.splitlines(keepends=True)
+    if start > len(header):
+        lines = lines[1:]  # first line may be cut in the middle
+    newline = "\r\n" if header.endswith(b"\r\n") else "\n"
+    text = (header + b"".join(lines[-n_rows:])).decode()
+    tail = pd.read_csv(io.StringIO(text), parse_dates=[DATE_COLUMN])
+    return tail, newline
+
+
+def state_from_tail(tail):
+    """Restore a single-series ``FeatureState`` from the table's last rows."""
+    last = tail.iloc[-1]
+    ewma = {w: [last[f"ewma_{w}"]] for w in WINDOWS}
+    return FeatureState.from_history(tail[TARGET_COLUMN].to_numpy()[None, :], ewma=ewma)
+
+
+def ingest(new_rows, path=DATA_PATH):
+    """Append ``new_rows`` (order_date, daily_orders) to the feature table.
+
+    Dates must be strictly increasing and later than the last stored day.
+    Returns the appended feature rows.
+    """
+    new_rows = new_rows.sort_values(DATE_COLUMN)
+    dates = pd.DatetimeIndex(pd.to_datetime(new_rows[DATE_COLUMN]))
+    if dates.has_duplicates:
+        raise ValueError("Duplicate order_date values in the new rows")
+
+    tail, newline = read_tail(path, HISTORY)
+    if len(tail) and dates[0] <= tail[DATE_COLUMN].iloc[-1]:
+        raise ValueError(
+            f"Feature table already ends at {tail[DATE_COLUMN].iloc[-1]:%Y-%m-%d}; "
+            "ingestion is append-only"
+        )
+
+    # Grab the current columns before the CSV changes underneath the sidecar.
+    existing = read_sidecar(path)
+    digest = load_digest(path, dataset_version(path))
+    cube = load_cube_file(path, dataset_version(path))
+    state = state_from_tail(tail) if len(tail) else FeatureState()
+    # A table built with event columns gets them for the new days too (default calendar).
+    events = True if set(EVENT_COLUMNS) <= set(tail.columns) else None
+    appended = extend_features(state, dates, new_rows[TARGET_COLUMN].to_numpy(), events)
+
+    int_columns = [c for c, dtype in column_dtypes(appended.columns).items()
+                   if dtype.startswith("int")]
+    on_disk = appended.astype({c: int for c in int_columns})
+    with open(path, "a", newline="") as fh:
+        on_disk.to_csv(fh, header=False, index=False, date_format="%Y-%m-%d",
+                       lineterminator=newline)
+
+    if existing is not None:
+        compact = on_disk.astype(column_dtypes(on_disk.columns))
+        combined = pd.concat([existing, compact.set_axis(dates)])
+        write_sidecar(combined, path)
+    if digest is not None:
+        digest.update(new_rows[TARGET_COLUMN].to_numpy())
+        save_digest(digest, path, dataset_version(path))
+    if cube is not None:
+        save_cube(cube.update(appended), path, dataset_version(path))
+    return appended
+
+
+def _parse_pairs(pairs):
+    dates, values = zip(*(pair.split("=") for pair in pairs))
+    return pd.DataFrame({DATE_COLUMN: list(dates), TARGET_COLUMN: np.array(values, dtype=float)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new days to the feature table.")
+    parser.add_argument("pairs", nargs="*", metavar="DATE=ORDERS")
+    parser.add_argument("--csv", help="CSV with order_date,daily_orders columns")
+    parser.add_argument("--path", default=str(DATA_PATH), help="feature table to update")
+    args = parser.parse_args()
+
+    new_rows = pd.read_csv(args.csv) if args.csv else _parse_pairs(args.pairs)
+    if new_rows.empty:
+        parser.error("no rows to ingest")
+    appended = ingest(new_rows, args.path)
+    print(f"Appended {len(appended)} rows "
+          f"({appended[DATE_COLUMN].min():%Y-%m-%d} .. {appended[DATE_COLUMN].max():%Y-%m-%d})")
+
+
+if __name__ == "__main__":
+    main()
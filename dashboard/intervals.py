@@ -0,0 +1,184 @@
+"""
+Quantile forecasts (P50 / P90 / P95 / P99) from backtest residuals.
+
+``run()`` backtests the recursive forecast itself: from origins a week
+apart over the last part of the table, the model is fitted on the history
+up to the origin and rolled forward ``INTERVAL_HORIZON`` days, exactly as
+``dashboard.forecast`` does for the future. The (origins x horizon) matrix
+of residuals is stored as an ``intervals`` artifact per data and model
+version, together with its conformal quantiles per horizon, so a page
+rerun never recomputes them.
+
+Residuals are pooled over neighbouring horizons (+-``BAND`` days) and the
+quantile level is raised to ``ceil((n + 1) q) / n`` (split conformal), so
+with n pooled residuals the band covers at least ``q`` of future days if
+errors behave like the backtest. Fewer than ``MIN_ORIGINS`` finished
+origins (a short table, or a budget that ran out) raise ``ValueError``
+instead of storing collapsed bands. ``quantile_forecast()`` adds them to a
+point forecast.
+
+    python -m dashboard.intervals
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from dashboard.artifacts import artifact_path, background_job, load_artifact, read_artifact, write_artifact
+from dashboard.backtest import backtest_folds, period_index, run_backtest
+from dashboard.data import DATA_PATH, dataset_version, read_feature_table_cached
+from dashboard.evaluation import MODELS, champion_name, model_inputs, model_key
+from dashboard.incremental import HISTORY
+from dashboard.multistep import Origin, recursive_forecast
+
+ARTIFACT = "intervals"
+QUANTILES = (50, 90, 95, 99)
+INTERVAL_HORIZON = 90
+ORIGIN_STEP = 7
+BAND = 7
+DEFAULT_BUDGET = 300.0
+# With fewer finished origins, even the horizons pooling 2 * BAND + 1 days
+# hold under 300 residuals and their P99 is the largest one.
+MIN_ORIGINS = 20
+
+
+def intervals_version(data_version, name):
+    return f"{data_version}-{model_key(name)}"
+
+
+def quantile_column(q):
+    return f"p{q}"
+
+
+# ---------------------------------------------------------------------------
+# Residuals
+# ---------------------------------------------------------------------------
+
+def _recursive_task(name, arrays, train, test):
+    """Fit on the ``train`` rows and forecast the ``test`` rows recursively."""
+    X, y = arrays["X"], arrays["y"]
+    model = MODELS[name]["factory"]().fit(X[train], y[train])
+    origin = Origin.from_inputs(X, y, arrays["dates"], train.stop)
+    return recursive_forecast(model, origin, test.stop - test.start)[0]
+
+
+def backtest_residuals(df, name, horizon=INTERVAL_HORIZON, step=ORIGIN_STEP,
+                       budget=DEFAULT_BUDGET, max_workers=None, min_origins=MIN_ORIGINS):
+    """(origins x horizon residuals, origin dates); residual = actual - forecast.
+
+    Raises ``ValueError`` when fewer than ``min_origins`` backtests finish
+    within ``budget`` seconds.
+    """
+    X_frame, y, dates = model_inputs(df)
+    X = X_frame.to_numpy()
+    period, _ = period_index(dates)
+    # Every origin sees a full year, so no feature column is empty in training.
+    folds = backtest_folds(len(y), horizon, step, min_train=HISTORY + 1)
+    results, unfinished = run_backtest(_recursive_task, {"X": X, "y": y, "dates": dates},
+                                       period, folds, [name], budget, max_workers)
+    done = sorted(k for (_, k) in results)
+    if len(done) < min_origins:
+        why = (f"{unfinished} did not finish within the {budget}s budget" if unfinished
+               else "the table is too short")
+        raise ValueError(f"{len(done)} of {len(folds)} backtest origins finished ({why}); "
+                         f"intervals need at least {min_origins}")
+    residuals = np.array([y[folds[k, 1]:folds[k, 2]] - results[(name, k)][0] for k in done])
+    return residuals.reshape(len(done), horizon), dates[folds[done, 1] - 1]
+
+
+def conformal_offsets(residuals, quantiles=QUANTILES, band=BAND):
+    """(len(quantiles), horizon) conformal residual quantiles per forecast day."""
+    if not len(residuals):
+        raise ValueError("no residuals: no backtest origin finished")
+    horizon = residuals.shape[1]
+    q = np.asarray(quantiles, dtype=float) / 100
+    offsets = np.empty((len(q), horizon))
+    for h in range(horizon):
+        pooled = residuals[:, max(h - band, 0):h + band + 1].ravel()
+        pooled = pooled[~np.isnan(pooled)]
+        n = len(pooled)
+        levels = np.minimum(np.ceil((n + 1) * q) / n, 1.0)
+        offsets[:, h] = np.quantile(pooled, levels, method="higher")
+    return offsets
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+def run(path=DATA_PATH, name=None, **kwargs):
+    """Backtest the recursive forecast of ``name`` (default: the champion) and store its intervals."""
+    started = time.perf_counter()
+    data_version = dataset_version(path)
+    name = name or champion_name(data_version)
+    residuals, origins = backtest_residuals(read_feature_table_cached(path), name, **kwargs)
+    offsets = conformal_offsets(residuals)
+    payload = {
+        "data_version": data_version,
+        "model": name,
+        "model_key": model_key(name),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "quantiles": list(QUANTILES),
+        "horizon": residuals.shape[1],
+        "step": kwargs.get("step", ORIGIN_STEP),
+        "band": BAND,
+        "origins": [str(pd.Timestamp(d).date()) for d in origins],
+        "offsets": {quantile_column(q): offsets[i].round(4).tolist() for i, q in enumerate(QUANTILES)},
+        "residuals": residuals.round(4).tolist(),
+        "wall_seconds": time.perf_counter() - started,
+    }
+    return write_artifact(ARTIFACT, intervals_version(data_version, name), payload), payload
+
+
+def read_intervals(data_version, name):
+    """Stored intervals of exactly this data and model version, or None."""
+    version = intervals_version(data_version, name)
+    return read_artifact(ARTIFACT, version) if artifact_path(ARTIFACT, version).exists() else None
+
+
+def load_intervals():
+    """(stored intervals or None, True if they match the current data and champion).
+
+    Missing intervals for the current version are computed in the
+    background; until then the newest stored ones are returned.
+    """
+    data_version = dataset_version()
+    version = intervals_version(data_version, champion_name(data_version))
+    if not artifact_path(ARTIFACT, version).exists():
+        background_job("dashboard.intervals", version)
+        return load_artifact(ARTIFACT), False
+    return load_artifact(ARTIFACT, version), True
+
+
+def quantile_forecast(frame, intervals):
+    """``frame`` (one series, consecutive days) plus a ``p<q>`` column per stored quantile.
+
+    Days beyond the stored horizon reuse its last offsets; orders cannot
+    go negative.
+    """
+    days = np.minimum(np.arange(len(frame)), intervals["horizon"] - 1)
+    out = frame.copy()
+    for column, offsets in intervals["offsets"].items():
+        out[column] = np.maximum(out["forecast"].to_numpy() + np.asarray(offsets)[days], 0.0)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the forecast and store its quantile intervals.")
+    parser.add_argument("--path", default=str(DATA_PATH))
+    parser.add_argument("--model", help="default: the evaluation champion")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="wall-clock seconds")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    target, payload = run(args.path, args.model, budget=args.budget, max_workers=args.workers)
+    offsets = pd.DataFrame(payload["offsets"], index=pd.RangeIndex(1, payload["horizon"] + 1, name="day"))
+    print(offsets.iloc[[0, 6, 29, 59, 89]].round(1).to_string())
+    print(f"{len(payload['origins'])} origins, {payload['wall_seconds']:.1f}s -> {target}")
+
+
+if __name__ == "__main__":
+    main()
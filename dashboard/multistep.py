@@ -0,0 +1,188 @@
+"""
+Multi-step forecasting for one or many series.
+
+Two strategies share the same starting point, an ``Origin`` (the feature
+state and last observed day of every series, restored from a feature
+table):
+
+* ``recursive_forecast()`` predicts one day for all series at once, feeds
+  the predictions back through ``FeatureState.step()`` and repeats. Each step
+  updates the rolling sums / EWMAs in O(1) per feature and series; nothing
+  is rebuilt from the history.
+* ``DirectForecaster`` trains a single model on (origin features, horizon)
+  pairs and predicts every (series, horizon) cell in one call. It has no
+  feedback loop, so errors do not compound, but the inputs never see the
+  forecast path.
+
+Both return an (S, horizon) array; ``forecast_frame()`` turns it into a long
+``series, order_date, forecast`` frame.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import DATE_COLUMN, SERIES_COLUMN, TARGET_COLUMN
+from dashboard.evaluation import CALENDAR_COLUMNS, DERIVED_COLUMNS, INPUT_COLUMNS, gradient_boosting
+from dashboard.features import calendar_columns
+from dashboard.incremental import HISTORY, FeatureState
+
+DIRECT_COLUMNS = INPUT_COLUMNS + ["horizon"]
+DAY = np.timedelta64(1, "D")
+
+
+class Origin:
+    """Feature state, last value and last date of S series."""
+
+    def __init__(self, keys, state, last_y, last_derived, last_dates):
+        self.keys = keys
+        self.state = state
+        self.last_y = np.asarray(last_y, dtype=float)
+        self.last_derived = {c: np.asarray(last_derived[c], dtype=float) for c in DERIVED_COLUMNS}
+        self.last_dates = np.asarray(last_dates, dtype="datetime64[ns]")
+
+    @classmethod
+    def from_table(cls, table, by=None):
+        """Origin at the end of a feature table (a long table sorted by ``by`` if given)."""
+        y = table[TARGET_COLUMN].to_numpy(dtype=float)
+        if by:
+            codes = pd.factorize(table[by])[0]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            keys = list(table[by].iloc[starts])
+        else:
+            starts, keys = np.array([0]), [None]
+        stops = np.r_[starts[1:], len(y)]
+
+        # (S, HISTORY) matrix of the last values, left-padded with NaN.
+        positions = stops[:, None] - HISTORY + np.arange(HISTORY)[None, :]
+        history = np.where(positions >= starts[:, None], y[np.maximum(positions, 0)], np.nan)
+        last = stops - 1
+        ewma = {int(c.split("_")[1]): table[c].to_numpy(dtype=float)[last]
+                for c in DERIVED_COLUMNS if c.startswith("ewma_")}
+        return cls(
+            keys,
+            FeatureState.from_history(history, ewma=ewma),
+            y[last],
+            {c: table[c].to_numpy(dtype=float)[last] for c in DERIVED_COLUMNS},
+            table[DATE_COLUMN].to_numpy()[last],
+        )
+
+    @classmethod
+    def from_inputs(cls, X, y, dates, stop):
+        """Origin after target row ``stop - 1`` of ``model_inputs()`` arrays (one series).
+
+        Row ``stop`` of ``X`` holds the derived columns of that day (inputs
+        are taken from the previous row), so nothing after it is read; it
+        must exist, which it does for the train end of any backtest fold.
+        """
+        derived = {c: X[stop:stop + 1, INPUT_COLUMNS.index(c)] for c in DERIVED_COLUMNS}
+        ewma = {int(c.split("_")[1]): derived[c] for c in DERIVED_COLUMNS if c.startswith("ewma_")}
+        return cls(
+            [None],
+            FeatureState.from_history(y[None, :stop], ewma=ewma),
+            y[stop - 1:stop],
+            derived,
+            dates[stop - 1:stop],
+        )
+
+    @property
+    def n_series(self):
+        return len(self.last_y)
+
+    def dates(self, horizon):
+        """(S, horizon) forecast dates: the calendar days after each series' last day."""
+        return self.last_dates[:, None] + np.arange(1, horizon + 1)[None, :] * DAY
+
+    def calendar(self, horizon):
+        """Calendar inputs of every forecast day, each (S, horizon)."""
+        dates = self.dates(horizon)
+        return {c: v.reshape(dates.shape) for c, v in calendar_columns(dates.ravel()).items()}
+
+
+def recursive_forecast(model, origin, horizon):
+    """(S, horizon) recursive forecast; ``origin`` itself is left untouched."""
+    state = copy.deepcopy(origin.state)
+    calendar = origin.calendar(horizon)
+    S = origin.n_series
+    X = np.empty((S, len(INPUT_COLUMNS)))
+    n_calendar = len(CALENDAR_COLUMNS)
+    X[:, n_calendar] = origin.last_y
+    for j, c in enumerate(DERIVED_COLUMNS, start=n_calendar + 1):
+        X[:, j] = origin.last_derived[c]
+
+    out = np.empty((S, horizon))
+    for t in range(horizon):
+        for j, c in enumerate(CALENDAR_COLUMNS):
+            X[:, j] = calendar[c][:, t]
+        y = np.maximum(model.predict(X), 0.0)  # orders cannot go negative
+        out[:, t] = y
+        row = state.step(y)
+        X[:, n_calendar] = y
+        for j, c in enumerate(DERIVED_COLUMNS, start=n_calendar + 1):
+            X[:, j] = row[c]
+    return out
+
+
+def direct_inputs(origin, horizon):
+    """(S * horizon, DIRECT_COLUMNS) inputs for every series and horizon."""
+    S = origin.n_series
+    calendar = origin.calendar(horizon)
+    columns = [calendar[c].ravel() for c in CALENDAR_COLUMNS]
+    columns.append(np.repeat(origin.last_y, horizon))
+    columns += [np.repeat(origin.last_derived[c], horizon) for c in DERIVED_COLUMNS]
+    columns.append(np.tile(np.arange(1, horizon + 1), S))
+    return np.column_stack(columns).astype(float)
+
+
+def direct_training_set(table, max_horizon, by=None, max_rows=200_000, seed=0):
+    """(X, y) pairs of (features at day t, horizon h) -> orders at day t + h.
+
+    Horizons are sampled uniformly from 1..max_horizon, at most ``max_rows``
+    pairs, never crossing into another series.
+    """
+    y = table[TARGET_COLUMN].to_numpy(dtype=float)
+    n = len(y)
+    group = (pd.factorize(table[by])[0] if by else np.zeros(n, dtype=np.int64))
+    rng = np.random.default_rng(seed)
+    origin = rng.integers(0, n, max_rows)
+    horizon = rng.integers(1, max_horizon + 1, max_rows)
+    target = origin + horizon
+    keep = target < n
+    keep[keep] = group[origin[keep]] == group[target[keep]]
+    origin, horizon, target = origin[keep], horizon[keep], target[keep]
+
+    calendar = calendar_columns(table[DATE_COLUMN].to_numpy()[target])
+    columns = [calendar[c] for c in CALENDAR_COLUMNS]
+    columns.append(y[origin])
+    columns += [table[c].to_numpy(dtype=float)[origin] for c in DERIVED_COLUMNS]
+    columns.append(horizon)
+    return np.column_stack(columns).astype(float), y[target]
+
+
+class DirectForecaster:
+    """One model for all horizons, with the horizon as an input."""
+
+    def __init__(self, factory=gradient_boosting, max_horizon=365):
+        self.factory = factory
+        self.max_horizon = max_horizon
+
+    def fit(self, table, by=None, **kwargs):
+        X, y = direct_training_set(table, self.max_horizon, by, **kwargs)
+        self.model = self.factory().fit(X, y)
+        return self
+
+    def predict(self, origin, horizon):
+        if horizon > self.max_horizon:
+            raise ValueError(f"trained for horizons up to {self.max_horizon}, got {horizon}")
+        values = self.model.predict(direct_inputs(origin, horizon))
+        return np.maximum(values, 0.0).reshape(origin.n_series, horizon)
+
+
+def forecast_frame(origin, values):
+    """Long frame (series, order_date, forecast) of an (S, horizon) forecast."""
+    S, horizon = values.shape
+    frame = {DATE_COLUMN: origin.dates(horizon).ravel(), "forecast": values.ravel()}
+    if S > 1 or origin.keys[0] is not None:
+        frame = {SERIES_COLUMN: np.repeat(origin.keys, horizon), **frame}
+    return pd.DataFrame(frame)
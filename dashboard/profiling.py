@@ -0,0 +1,286 @@
+"""
+Render profiling for the dashboard scripts.
+
+Every script calls ``start_page(__file__)`` first and ``end_page()`` last.
+In between, the time of a run is attributed to named sections:
+
+- ``section(name, kind)`` times an explicit block (``load``, ``aggregate``);
+  every ``tracked_cache()`` function is one,
+- ``chart(fig)`` replaces ``st.plotly_chart``: the time since the previous
+  checkpoint is booked as that chart's ``figure`` build and the call itself
+  as ``emit``. With ``DASHBOARD_PROFILE=1`` the figure's JSON size is its
+  payload bytes; measuring it costs a second serialisation, booked as
+  ``other``,
+- ``tracked_cache()`` wraps ``st.cache_data`` / ``st.cache_resource`` and
+  also counts hits and misses.
+
+Each finished run also records the process RSS. The last ``RUN_HISTORY``
+runs and cumulative counters live in this process. The hidden diagnostics
+view (``app.py?diagnostics=1``) shows them. ``prometheus_text()`` renders
+them in the Prometheus text format, and every run is logged as one JSON
+line on the ``dashboard.profile`` logger. With ``DASHBOARD_PROFILE_LOG``
+the lines are also appended to that file, and with
+``DASHBOARD_METRICS_FILE`` the metrics are rewritten there after every run
+(for a node_exporter textfile collector). ``DASHBOARD_PROFILE=0`` turns
+everything off.
+"""
+
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import streamlit as st
+
+PROFILE_ENV = "DASHBOARD_PROFILE"
+LOG_ENV = "DASHBOARD_PROFILE_LOG"
+METRICS_ENV = "DASHBOARD_METRICS_FILE"
+RUN_HISTORY = 500
+KINDS = ("load", "aggregate", "figure", "emit", "other")
+
+logger = logging.getLogger("dashboard.profile")
+
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+_RUNS = deque(maxlen=RUN_HISTORY)
+# (page, section, kind) -> [count, seconds, payload bytes]
+_SECTIONS = defaultdict(lambda: [0, 0.0, 0])
+# page -> [count, seconds]
+_PAGES = defaultdict(lambda: [0, 0.0])
+# cache name -> [hits, misses]
+_CACHES = defaultdict(lambda: [0, 0])
+
+
+def enabled():
+    return os.environ.get(PROFILE_ENV) != "0"
+
+
+def payload_sizes():
+    """Chart payload sizes are measured only with ``DASHBOARD_PROFILE=1``."""
+    return os.environ.get(PROFILE_ENV) == "1"
+
+
+def rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _current():
+    return getattr(_LOCAL, "run", None)
+
+
+# ---------------------------------------------------------------------------
+# Page runs
+# ---------------------------------------------------------------------------
+
+def start_page(script):
+    """Begin profiling a run of ``script`` (a path or page name) in this thread."""
+    if not enabled():
+        return
+    page = Path(script).stem
+    now = time.perf_counter()
+    _LOCAL.run = {"page": page, "started": now, "checkpoint": now, "depth": 0, "sections": [],
+                  "caches": [], "rss_start": rss_bytes()}
+
+
+def _add(run, name, kind, seconds, nbytes=0):
+    run["sections"].append({"section": name, "kind": kind, "seconds": seconds, "bytes": nbytes})
+
+
+@contextmanager
+def section(name, kind="aggregate"):
+    """Time the enclosed block as section ``name`` of the current page run.
+
+    A section inside another one is part of the outer one's time only.
+    """
+    run = _current()
+    if run is None or run["depth"]:
+        yield
+        return
+    start = time.perf_counter()
+    run["depth"] += 1
+    try:
+        yield
+    finally:
+        run["depth"] -= 1
+        end = time.perf_counter()
+        _add(run, name, kind, end - start)
+        run["checkpoint"] = end
+
+
+def chart(fig, name=None, **kwargs):
+    """``st.plotly_chart(fig, **kwargs)``, booking figure build, emission and payload size."""
+    run = _current()
+    if run is None:
+        return st.plotly_chart(fig, **kwargs)
+    name = name or fig.layout.title.text or f"chart {sum(s['kind'] == 'emit' for s in run['sections']) + 1}"
+    start = time.perf_counter()
+    _add(run, name, "figure", start - run["checkpoint"])
+    result = st.plotly_chart(fig, **kwargs)
+    end = time.perf_counter()
+    # Sizing serialises the figure a second time: only on request, and not as emission.
+    nbytes = len(fig.to_json()) if payload_sizes() else 0
+    _add(run, name, "emit", end - start, nbytes)
+    if nbytes:
+        _add(run, name, "other", time.perf_counter() - end)
+    run["checkpoint"] = time.perf_counter()
+    return result
+
+
+def end_page():
+    """Finish the current run: store it, update the counters and export it."""
+    run = _current()
+    if run is None:
+        return None
+    _LOCAL.run = None
+    end = time.perf_counter()
+    _add(run, "rest of page", "other", end - run.pop("checkpoint"))
+    del run["depth"]
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "page": run["page"],
+        "seconds": end - run.pop("started"),
+        "payload_bytes": sum(s["bytes"] for s in run["sections"]),
+        "rss_bytes": rss_bytes(),
+        **run,
+    }
+    with _LOCK:
+        _RUNS.append(record)
+        _PAGES[record["page"]][0] += 1
+        _PAGES[record["page"]][1] += record["seconds"]
+        for s in record["sections"]:
+            totals = _SECTIONS[(record["page"], s["section"], s["kind"])]
+            totals[0] += 1
+            totals[1] += s["seconds"]
+            totals[2] += s["bytes"]
+    _export(record)
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Caches
+# ---------------------------------------------------------------------------
+
+def tracked_cache(cache, name=None, kind="aggregate", **kwargs):
+    """``cache(**kwargs)`` (``st.cache_data`` or ``st.cache_resource``) counting hits and misses.
+
+    Every call is also a ``section`` of ``kind``, named after the function.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def compute(*args, **kw):
+            _LOCAL.missed = True
+            return func(*args, **kw)
+
+        cached = cache(**kwargs)(compute)
+
+        @functools.wraps(func)
+        def call(*args, **kw):
+            outer = getattr(_LOCAL, "missed", False)
+            _LOCAL.missed = False
+            try:
+                with section(label, kind):
+                    result = cached(*args, **kw)
+                hit = not _LOCAL.missed
+            finally:
+                _LOCAL.missed = outer
+            if enabled():
+                with _LOCK:
+                    _CACHES[label][0 if hit else 1] += 1
+                run = _current()
+                if run is not None:
+                    run["caches"].append({"cache": label, "hit": hit})
+            return result
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def recent_runs():
+    """The stored runs, oldest first."""
+    with _LOCK:
+        return list(_RUNS)
+
+
+def cache_counts():
+    """{cache name: (hits, misses)}."""
+    with _LOCK:
+        return {name: tuple(counts) for name, counts in _CACHES.items()}
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text():
+    """Cumulative counters in the Prometheus text exposition format."""
+    with _LOCK:
+        pages = dict(_PAGES)
+        sections = dict(_SECTIONS)
+        caches = dict(_CACHES)
+    lines = [
+        "# HELP dashboard_page_render_seconds Wall time of page script runs.",
+        "# TYPE dashboard_page_render_seconds summary",
+    ]
+    for page, (count, seconds) in sorted(pages.items()):
+        lines += [f'dashboard_page_render_seconds_sum{{page="{_label(page)}"}} {seconds:.6f}',
+                  f'dashboard_page_render_seconds_count{{page="{_label(page)}"}} {count}']
+    lines += ["# HELP dashboard_section_seconds Wall time of named page sections.",
+              "# TYPE dashboard_section_seconds summary"]
+    for (page, name, kind), (count, seconds, _) in sorted(sections.items()):
+        labels = f'page="{_label(page)}",section="{_label(name)}",kind="{kind}"'
+        lines += [f"dashboard_section_seconds_sum{{{labels}}} {seconds:.6f}",
+                  f"dashboard_section_seconds_count{{{labels}}} {count}"]
+    lines += ["# HELP dashboard_payload_bytes_total Serialized chart bytes sent to browsers.",
+              "# TYPE dashboard_payload_bytes_total counter"]
+    for (page, name, kind), (_, _, nbytes) in sorted(sections.items()):
+        if kind == "emit":
+            lines.append(f'dashboard_payload_bytes_total{{page="{_label(page)}",section="{_label(name)}"}} '
+                         f"{nbytes}")
+    lines += ["# HELP dashboard_cache_requests_total Streamlit cache lookups by result.",
+              "# TYPE dashboard_cache_requests_total counter"]
+    for cache, (hits, misses) in sorted(caches.items()):
+        lines += [f'dashboard_cache_requests_total{{cache="{_label(cache)}",result="hit"}} {hits}',
+                  f'dashboard_cache_requests_total{{cache="{_label(cache)}",result="miss"}} {misses}']
+    lines += ["# HELP dashboard_process_resident_memory_bytes Resident memory of the server process.",
+              "# TYPE dashboard_process_resident_memory_bytes gauge",
+              f"dashboard_process_resident_memory_bytes {rss_bytes()}"]
+    return "\n".join(lines) + "\n"
+
+
+def _export(record):
+    line = json.dumps(record, default=str)
+    logger.info(line)
+    log_path = os.environ.get(LOG_ENV)
+    if log_path:
+        with _LOCK, open(log_path, "a") as fh:
+            fh.write(line + "\n")
+    metrics_path = os.environ.get(METRICS_ENV)
+    if metrics_path:
+        # Atomic replace: a scraper never reads a half-written file.
+        target = Path(metrics_path)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".prom")
+        with os.fdopen(fd, "w") as fh:
+            fh.write(prometheus_text())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
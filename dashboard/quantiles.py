@@ -0,0 +1,207 @@
+"""
+Quantiles for capacity planning.
+
+``percentiles()`` answers any number of percentiles with a single
+``np.partition`` (selection, not a full sort) and returns exactly what
+``np.percentile`` would.
+
+``TDigest`` is a mergeable streaming sketch (merging t-digest with the
+arcsine scale function). It absorbs new days with ``update()``, combines
+shards or series with ``merge()`` and keeps the tails accurate, which is
+where the 95th / 99th percentile capacity numbers live. Compression
+first groups the new points with whole-array operations (by a quarter unit
+of the scale function, never together with stored centroids), then merges
+neighbours in one pass while a cluster spans at most one unit. A cluster
+never grows past that limit, however often the digest is saved, reloaded
+and extended, so repeated small appends cost no accuracy: P50 / P95 / P99
+of daily order counts stay within ``RELATIVE_ERROR`` of ``np.percentile``.
+"""
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+from dashboard.data import (
+    CACHE_DIR_NAME,
+    DATA_PATH,
+    TARGET_COLUMN,
+    dataset_version,
+    read_feature_table_cached,
+)
+
+# Tested bound of the digest's P50 / P95 / P99 on daily order counts.
+RELATIVE_ERROR = 0.01
+
+
+def percentiles(values, ps):
+    """``np.percentile(values, ps)`` (linear interpolation) in one selection pass."""
+    a = np.asarray(values, dtype=float).ravel()
+    a = a[~np.isnan(a)]
+    ps = np.asarray(ps, dtype=float)
+    if a.size == 0:
+        return np.full(ps.shape, np.nan)
+    rank = ps / 100.0 * (a.size - 1)
+    lo = np.floor(rank).astype(int)
+    hi = np.minimum(lo + 1, a.size - 1)
+    part = np.partition(a, np.unique(np.concatenate([lo, hi])))
+    a_lo, a_hi, frac = part[lo], part[hi], rank - lo
+    # numpy's lerp: interpolate from the nearer end so results match exactly.
+    return np.where(frac >= 0.5, a_hi - (a_hi - a_lo) * (1 - frac), a_lo + (a_hi - a_lo) * frac)
+
+
+class TDigest:
+    """Mergeable quantile sketch; memory is O(compression)."""
+
+    def __init__(self, compression=200, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or 10 * compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values, weights=None):
+        """Add observations (optionally weighted)."""
+        values = np.asarray(values, dtype=float).ravel()
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float).ravel()
+        keep = ~np.isnan(values)
+        values, weights = values[keep], weights[keep]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._buffer.append((values, weights, False))
+        self._buffered += values.size
+        if self._buffered >= self.buffer_size:
+            self._flush()
+        return self
+
+    def merge(self, other):
+        """Fold another digest (e.g. another series or shard) into this one."""
+        other._flush()
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._buffer.append((other.means, other.weights, True))
+            self._buffered += other.means.size
+            self._flush()
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        parts = [(self.means, self.weights, True)] + self._buffer
+        means = np.concatenate([m for m, _, _ in parts])
+        weights = np.concatenate([w for _, w, _ in parts])
+        stored = np.concatenate([np.full(m.size, compressed) for m, _, compressed in parts])
+        self._buffer, self._buffered = [], 0
+
+        order = np.argsort(means, kind="stable")
+        means, weights, stored = means[order], weights[order], stored[order]
+        total = weights.sum()
+        scale = self.compression / (2 * np.pi)  # k(q) = scale * arcsin(2q - 1)
+        # Group the new points by a quarter unit of k; a stored centroid
+        # (possibly a full cluster already) stays on its own.
+        left = np.clip((np.cumsum(weights) - weights) / total, 0, 1)
+        fine = np.floor(4 * scale * np.arcsin(2 * left - 1)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, (fine[1:] != fine[:-1]) | stored[1:] | stored[:-1]])
+        grouped_w = np.add.reduceat(weights, starts)
+        grouped_m = np.add.reduceat(means * weights, starts) / grouped_w
+
+        # Merge neighbours while the cluster spans at most one unit of k
+        # (a few hundred groups, so a plain loop).
+        out_m, out_w = [], []
+        left, limit = 0.0, -scale * np.pi / 2 + 1
+        sum_mw, sum_w = 0.0, 0.0
+        for m, w in zip(grouped_m.tolist(), grouped_w.tolist()):
+            right = min((left + sum_w + w) / total, 1.0)
+            if sum_w and scale * math.asin(2 * right - 1) > limit:
+                out_m.append(sum_mw / sum_w)
+                out_w.append(sum_w)
+                left += sum_w
+                limit = scale * math.asin(2 * min(left / total, 1.0) - 1) + 1
+                sum_mw, sum_w = 0.0, 0.0
+            sum_mw += m * w
+            sum_w += w
+        out_m.append(sum_mw / sum_w)
+        out_w.append(sum_w)
+        self.means = np.array(out_m)
+        self.weights = np.array(out_w)
+
+    def quantile(self, qs):
+        """Estimated quantiles for ``qs`` in [0, 1]."""
+        self._flush()
+        qs = np.asarray(qs, dtype=float)
+        if self.weights.size == 0:
+            return np.full(qs.shape, np.nan)
+        cum = np.cumsum(self.weights)
+        total = cum[-1]
+        centers = cum - self.weights / 2
+        # Anchor the ends at the exact extremes so the 0 / 100 ranks are exact.
+        x = np.concatenate([[0.0], centers, [total]])
+        y = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(qs * total, x, y)
+
+    def percentiles(self, ps):
+        return self.quantile(np.asarray(ps, dtype=float) / 100.0)
+
+    def to_dict(self):
+        self._flush()
+        return {"compression": self.compression, "min": self.min, "max": self.max,
+                "means": self.means.tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        digest = cls(state["compression"])
+        digest.means = np.asarray(state["means"], dtype=float)
+        digest.weights = np.asarray(state["weights"], dtype=float)
+        digest.min, digest.max = state["min"], state["max"]
+        return digest
+
+
+def _digest_path(path):
+    path = Path(path)
+    return path.parent / CACHE_DIR_NAME / f"{path.stem}-digest.json"
+
+
+def load_digest(path=DATA_PATH, version=None):
+    """Persisted digest of the table's target column, or None if missing / stale."""
+    try:
+        state = json.loads(_digest_path(path).read_text())
+        if version is not None and state.get("version") != version:
+            return None
+        return TDigest.from_dict(state)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_digest(digest, path=DATA_PATH, version=None):
+    target = _digest_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps({**digest.to_dict(), "version": version}))
+
+
+def table_digest(path=DATA_PATH):
+    """Digest of ``daily_orders`` for the current table version.
+
+    Built once from the table and persisted next to the sidecar; ``ingest``
+    then keeps it current by feeding it only the appended days.
+    """
+    version = dataset_version(path)
+    digest = load_digest(path, version)
+    if digest is None:
+        digest = TDigest().update(read_feature_table_cached(path)[TARGET_COLUMN].to_numpy())
+        try:
+            save_digest(digest, path, version)
+        except OSError:
+            pass
+    return digest
@@ -0,0 +1,210 @@
+"""
+Feature selection scores for page 5.
+
+Four methods score every model input (``model_inputs``, so the same
+one-step-ahead columns the models see):
+
+- mutual information with the target (k-NN estimator, per column over its
+  observed rows),
+- random-forest impurity importance,
+- permutation importance of the selection model on rolling-origin folds
+  (RMSE increase when a column is shuffled within the test rows),
+- recursive feature elimination (elimination order of a random forest).
+
+All of them run as jobs in the backtest process pool over shared memory:
+one job per column for mutual information, one per fold for permutation
+importance, and one each for the forest and the elimination, so wider
+tables only add jobs. ``run()`` stores the scores as a ``selection``
+artifact per data and model version; the page only reads it and, like
+SHAP, starts a missing version in a background process.
+
+    python -m dashboard.selection
+"""
+
+import argparse
+import concurrent.futures as cf
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.feature_selection import RFE, mutual_info_regression
+from sklearn.impute import SimpleImputer
+
+from dashboard.artifacts import background_job, find_artifact, load_artifact, write_artifact
+from dashboard.backtest import SharedArrays, backtest_folds, fold_pool, row_slices, submit_fold
+from dashboard.data import DATA_PATH, dataset_version, read_feature_table_cached
+from dashboard.evaluation import (
+    DEFAULT_FOLDS,
+    DEFAULT_HORIZON,
+    FALLBACK_MODEL,
+    MODELS,
+    model_inputs,
+    model_key,
+)
+
+ARTIFACT = "selection"
+METHODS = ("mutual_info", "forest", "permutation", "rfe_rank")
+N_NEIGHBORS = 3
+N_REPEATS = 5
+RFE_STEP = 0.05
+
+
+def selection_version(data_version, name=FALLBACK_MODEL):
+    return f"{data_version}-{model_key(name)}"
+
+
+def _forest():
+    return RandomForestRegressor(n_estimators=200, min_samples_leaf=5, random_state=0)
+
+
+def _imputed(X):
+    # Early lag rows are NaN; the forest and RFE need complete rows.
+    return SimpleImputer(strategy="median", keep_empty_features=True).fit_transform(X)
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+def mutual_information(x, y, seed=0):
+    """k-NN mutual information of one column with ``y`` over the rows where it is observed."""
+    rows = ~np.isnan(x)
+    if rows.sum() <= N_NEIGHBORS:
+        return np.nan
+    return float(mutual_info_regression(x[rows, None], y[rows], n_neighbors=N_NEIGHBORS,
+                                        random_state=seed)[0])
+
+
+def permutation_importance(name, X, y, train, test, n_repeats=N_REPEATS, seed=0):
+    """RMSE increase on the ``test`` rows per shuffled column (NaN for columns unseen in training).
+
+    The ``n_repeats`` shuffles of a column are stacked and predicted in one call.
+    """
+    observed = np.flatnonzero(~np.isnan(X[train]).all(axis=0))
+    model = MODELS[name]["factory"]().fit(X[train][:, observed], y[train])
+    X_test, y_test = X[test][:, observed], y[test]
+    base = np.sqrt(np.mean((model.predict(X_test) - y_test) ** 2))
+    rng = np.random.default_rng(seed)
+    stacked = np.tile(X_test, (n_repeats, 1))
+    importance = np.full(X.shape[1], np.nan)
+    for k, column in enumerate(observed):
+        stacked[:, k] = np.concatenate([rng.permutation(X_test[:, k]) for _ in range(n_repeats)])
+        error = (model.predict(stacked) - np.tile(y_test, n_repeats)).reshape(n_repeats, -1)
+        importance[column] = np.sqrt(np.mean(error ** 2, axis=1)).mean() - base
+        stacked[:, k] = np.tile(X_test[:, k], n_repeats)
+    return importance
+
+
+def _selection_task(job, arrays, train, test):
+    """One pool job: ``(method, argument)`` -> float array."""
+    method, argument = job
+    X, y = arrays["X"], arrays["y"]
+    if method == "mutual_info":
+        return [mutual_information(X[:, argument], y)]
+    if method == "forest":
+        return _forest().fit(_imputed(X), y).feature_importances_
+    if method == "rfe_rank":
+        return RFE(_forest(), n_features_to_select=1, step=RFE_STEP).fit(_imputed(X), y).ranking_
+    return permutation_importance(argument, X, y, train, test)
+
+
+def select(df, name=FALLBACK_MODEL, n_folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, max_workers=None):
+    """Scores of every input of ``df`` by every method; returns the artifact payload."""
+    if MODELS[name]["kind"] != "features":
+        raise ValueError(f"{name!r} does not use the features; choose a feature model")
+    started = time.perf_counter()
+    X_frame, y, _ = model_inputs(df)
+    X = X_frame.to_numpy()
+    n, n_features = X.shape
+    folds = backtest_folds(n, horizon, n_folds=n_folds)
+    everything = (slice(0, n), slice(n, n))
+
+    jobs = [(("mutual_info", j), 0, everything) for j in range(n_features)]
+    jobs += [(("forest", None), 0, everything), (("rfe_rank", None), 0, everything)]
+    jobs += [(("permutation", name), k, fold) for k, fold in enumerate(row_slices(np.arange(n), folds))]
+    results = {}
+    with SharedArrays(X=X, y=y) as shared:
+        pool = fold_pool(_selection_task, shared, max_workers)
+        try:
+            # The slow forest / RFE / fold fits go first so the column jobs fill the gaps.
+            futures = [submit_fold(pool, job, k, *rows) for job, k, rows in reversed(jobs)]
+            for future in cf.as_completed(futures):
+                (method, argument), k, values, _, _ = future.result()
+                results[(method, argument if method == "mutual_info" else k)] = values
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    per_fold = np.array([results[("permutation", k)] for k in range(len(folds))])
+    scores = pd.DataFrame({
+        "mutual_info": [results[("mutual_info", j)][0] for j in range(n_features)],
+        "forest": results[("forest", 0)],
+        "permutation": np.nanmean(per_fold, axis=0),
+        "rfe_rank": results[("rfe_rank", 0)],
+    }, index=X_frame.columns)
+    # Rank 1 is best for every method; the mean rank orders the table.
+    ranks = pd.concat([scores[m].rank(ascending=m == "rfe_rank") for m in METHODS], axis=1)
+    scores["mean_rank"] = ranks.mean(axis=1)
+    return {
+        "model": name,
+        "model_key": model_key(name),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {"folds": len(folds), "horizon": horizon, "n_neighbors": N_NEIGHBORS,
+                   "n_repeats": N_REPEATS, "rfe_step": RFE_STEP, "rows": n,
+                   "workers": max_workers or os.cpu_count()},
+        "features": list(X_frame.columns),
+        "scores": {column: [None if np.isnan(v) else round(float(v), 6) for v in scores[column]]
+                   for column in scores},
+        "permutation_folds": np.where(np.isnan(per_fold), None, per_fold.round(6)).tolist(),
+        "wall_seconds": time.perf_counter() - started,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+def run(path=DATA_PATH, name=FALLBACK_MODEL, **kwargs):
+    """Score the features of the table at ``path`` and store them under its data and model version."""
+    data_version = dataset_version(path)
+    payload = {"data_version": data_version, **select(read_feature_table_cached(path), name, **kwargs)}
+    return write_artifact(ARTIFACT, selection_version(data_version, name), payload), payload
+
+
+def load_selection():
+    """(stored scores or None, True if they match the current data and model).
+
+    Missing scores for the current version are computed in the background;
+    until then the newest stored ones are returned.
+    """
+    version = selection_version(dataset_version())
+    if find_artifact(ARTIFACT, version) is None:
+        background_job("dashboard.selection", version)
+        return load_artifact(ARTIFACT), False
+    return load_artifact(ARTIFACT, version), True
+
+
+def selection_frame(selection):
+    """Scores as a (features x methods + mean_rank) frame, best mean rank first."""
+    return (pd.DataFrame(selection["scores"], index=selection["features"], dtype=float)
+            .sort_values("mean_rank"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the model inputs for feature selection.")
+    parser.add_argument("--path", default=str(DATA_PATH))
+    parser.add_argument("--model", default=FALLBACK_MODEL,
+                        choices=[name for name, spec in MODELS.items() if spec["kind"] == "features"])
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    args = parser.parse_args()
+
+    target, payload = run(args.path, args.model, n_folds=args.folds, max_workers=args.workers)
+    print(selection_frame(payload).head(15).round(4).to_string())
+    print(f"{len(payload['features'])} features, {payload['wall_seconds']:.1f}s -> {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Date-range windows over the daily series at day, week or month grain.
+
+A ``Timeline`` holds the target as date-sorted arrays, built once per data
+version inside the page aggregates. It also keeps:
+
+* prefix sums of the values and their squares, so the count / sum / mean /
+  std of any window is a subtraction,
+* for each grain, the row positions where a new period starts, so the
+  weekly and monthly rollups of a window come from the same prefix sums.
+  Edge periods that the window cuts through only count the days inside it,
+* for the ``dayofweek`` and ``month`` codes, the rows of every code in date
+  order, with prefix sums, so per-weekday or per-month statistics of a
+  window cost two ``searchsorted`` calls per code.
+
+``rows(start, end)`` turns a date range into a row slice with
+``searchsorted``. Frames sorted the same way (the ``trend`` and
+``volatility`` aggregates) are cut with that slice. Changing the filter never
+touches the feature table.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import DATE_COLUMN, TARGET_COLUMN
+
+GRAINS = ("day", "week", "month")
+CATEGORY_COLUMNS = ("dayofweek", "month")
+
+
+def _prefix(values):
+    return np.r_[0.0, np.cumsum(values, dtype=float)]
+
+
+def period_starts(dates, grain):
+    """First day of the ``grain`` period of every date (weeks start on Monday)."""
+    days = np.asarray(dates, dtype="datetime64[D]")
+    if grain == "day":
+        starts = days
+    elif grain == "week":
+        # 1970-01-01 was a Thursday: shift so Monday is 0.
+        starts = days - (days.astype(np.int64) + 3) % 7
+    elif grain == "month":
+        starts = days.astype("datetime64[M]").astype("datetime64[D]")
+    elif grain == "year":
+        starts = days.astype("datetime64[Y]").astype("datetime64[D]")
+    else:
+        raise ValueError(f"grain must be one of {GRAINS + ('year',)}, got {grain!r}")
+    return starts.astype("datetime64[ns]")
+
+
+def _stats(count, total, squares):
+    """(mean, sample std) from counts, sums and sums of squares."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        var = (squares - total * mean) / (count - 1)
+    return mean, np.sqrt(np.clip(var, 0, None))
+
+
+class Timeline:
+    """Date-sorted target values with prefix sums per grain and calendar code."""
+
+    def __init__(self, dates, values, codes=None):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.values = np.asarray(values, dtype=float)
+        self._sum = _prefix(self.values)
+        self._squares = _prefix(self.values ** 2)
+
+        self._periods = {}
+        for grain in GRAINS:
+            starts = period_starts(self.dates, grain)
+            cuts = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]]) if len(starts) else np.array([], int)
+            self._periods[grain] = (cuts, starts[cuts])
+
+        self.codes = {}
+        self._categories = {}
+        for name, code in (codes or {}).items():
+            code = np.asarray(code, dtype=np.int64)
+            order = np.argsort(code, kind="stable")
+            keys, bounds = np.unique(code[order], return_index=True)
+            self.codes[name] = code
+            self._categories[name] = (keys, np.r_[bounds, len(order)], order,
+                                      _prefix(self.values[order]), _prefix(self.values[order] ** 2))
+
+    @classmethod
+    def from_frame(cls, ordered):
+        """Timeline of a date-sorted feature table."""
+        return cls(ordered[DATE_COLUMN].to_numpy(), ordered[TARGET_COLUMN].to_numpy(dtype=float),
+                   {c: ordered[c].to_numpy() for c in CATEGORY_COLUMNS if c in ordered})
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def first(self):
+        return pd.Timestamp(self.dates[0])
+
+    @property
+    def last(self):
+        return pd.Timestamp(self.dates[-1])
+
+    def rows(self, start=None, end=None):
+        """Row slice of the dates in [start, end] (whole days)."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)), "left")
+        if end is None:
+            hi = len(self.dates)
+        else:
+            after = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+            hi = np.searchsorted(self.dates, np.datetime64(after), "left")
+        return slice(int(lo), int(max(hi, lo)))
+
+    def summary(self, rows=slice(None)):
+        """Count, sum, mean, std, min, max and first / last date of a window."""
+        lo, hi, _ = rows.indices(len(self))
+        count = hi - lo
+        total = self._sum[hi] - self._sum[lo]
+        mean, std = _stats(count, total, self._squares[hi] - self._squares[lo])
+        window = self.values[lo:hi]
+        empty = count == 0
+        return {
+            'days': count, 'sum': total, 'mean': mean, 'std': std,
+            'min': np.nan if empty else window.min(), 'max': np.nan if empty else window.max(),
+            'start': None if empty else pd.Timestamp(self.dates[lo]),
+            'end': None if empty else pd.Timestamp(self.dates[hi - 1]),
+        }
+
+    def rollup(self, grain, rows=slice(None)):
+        """One row per ``grain`` period of the window: period start, sum, days, mean, std."""
+        lo, hi, _ = rows.indices(len(self))
+        cuts, labels = self._periods[grain]
+        i = max(np.searchsorted(cuts, lo, "right") - 1, 0)
+        j = np.searchsorted(cuts, hi, "left")
+        edges = np.r_[lo, cuts[i + 1:j], hi] if hi > lo else np.array([lo])
+        count = np.diff(edges)
+        total = np.diff(self._sum[edges])
+        mean, std = _stats(count, total, np.diff(self._squares[edges]))
+        return pd.DataFrame({DATE_COLUMN: labels[i:i + len(count)], TARGET_COLUMN: total,
+                             'days': count, 'mean': mean, 'std': std})
+
+    def by_category(self, name, rows=slice(None)):
+        """Count, sum, mean and std of the window per value of calendar code ``name``."""
+        lo, hi, _ = rows.indices(len(self))
+        keys, bounds, order, sums, squares = self._categories[name]
+        starts = np.array([bounds[k] + np.searchsorted(order[bounds[k]:bounds[k + 1]], lo)
+                           for k in range(len(keys))], dtype=np.int64)
+        stops = np.array([bounds[k] + np.searchsorted(order[bounds[k]:bounds[k + 1]], hi)
+                          for k in range(len(keys))], dtype=np.int64)
+        count = stops - starts
+        total = sums[stops] - sums[starts]
+        mean, std = _stats(count, total, squares[stops] - squares[starts])
+        frame = pd.DataFrame({name: keys, 'count': count, 'sum': total, 'mean': mean, 'std': std})
+        return frame[frame['count'] > 0].reset_index(drop=True)
+
+    def count_at_least(self, threshold, rows=slice(None), by=None):
+        """Days of the window at or above ``threshold``.
+
+        With ``by``, a Series of those days per code (every code of the
+        timeline, zero where the window has none).
+        """
+        hit = self.values[rows] >= threshold
+        if by is None:
+            return int(hit.sum())
+        keys = self._categories[by][0]
+        counts = pd.Series(self.codes[by][rows][hit]).value_counts().reindex(keys, fill_value=0)
+        counts.index.name = by
+        return counts
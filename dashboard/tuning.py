@@ -0,0 +1,349 @@
+"""
+Hyperparameter search for the feature models.
+
+Trials are parameter sets drawn from ``SEARCH_SPACES`` (trial 0 is the
+model's current defaults, as the baseline). Each trial is scored fold by
+fold on rolling-origin folds that end where the evaluation's test span
+starts, so tuning never sees the days the models are compared on. After
+every fold the trial's running mean RMSE is compared with the median of
+all other trials at the same fold, and trials above it are pruned (median
+pruning). Folds of different trials run concurrently in the backtest
+process pool over shared memory.
+
+Every trial start, fold score and outcome is appended to a JSONL history
+per data version and model (``artifacts/tuning/``). A search stops when it
+has used its CPU budget (fit CPU seconds summed over all workers and all
+runs) or its number of trials; running it again resumes from the history,
+with unfinished trials continuing at their next fold.
+
+    python -m dashboard.tuning --trials 40 --cpu-budget 300
+"""
+
+import argparse
+import concurrent.futures as cf
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.artifacts import ARTIFACTS_DIR
+from dashboard.backtest import SharedArrays, backtest_folds, fold_pool, row_slices, submit_fold
+from dashboard.data import DATA_PATH, dataset_version, read_feature_table_cached
+from dashboard.evaluation import (
+    DEFAULT_FOLDS,
+    DEFAULT_HORIZON,
+    FALLBACK_MODEL,
+    fit_predict,
+    model_inputs,
+    model_key,
+    model_params,
+    scores,
+)
+from dashboard.profiling import tracked_cache
+
+ARTIFACT = "tuning"
+DEFAULT_TRIALS = 40
+DEFAULT_CPU_BUDGET = 300.0
+TUNING_FOLDS = 6
+N_STARTUP = 4
+
+# name -> (scale, low, high); "log" and "float" are continuous, "int" inclusive.
+SEARCH_SPACES = {
+    "Gradient Boosting": {
+        "learning_rate": ("log", 0.01, 0.3),
+        "max_iter": ("int", 100, 600),
+        "max_leaf_nodes": ("int", 7, 63),
+        "min_samples_leaf": ("int", 5, 60),
+        "l2_regularization": ("log", 1e-3, 10.0),
+    },
+    "Ridge (Linear)": {
+        "ridge__alpha": ("log", 1e-2, 1e3),
+    },
+}
+
+
+def history_path(data_version, name, root=ARTIFACTS_DIR):
+    return Path(root) / ARTIFACT / f"{data_version}-{model_key(name)}.jsonl"
+
+
+def sample_params(space, trial, seed=0):
+    """Parameters of ``trial``; a pure function of (seed, trial), so resumes redraw the same."""
+    if trial == 0:
+        return {}
+    rng = np.random.default_rng([seed, trial])
+    params = {}
+    for key, (scale, low, high) in space.items():
+        if scale == "int":
+            params[key] = int(rng.integers(low, high + 1))
+        elif scale == "log":
+            params[key] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[key] = float(rng.uniform(low, high))
+    return params
+
+
+def tuning_folds(n_rows, n_folds=TUNING_FOLDS, horizon=DEFAULT_HORIZON,
+                 holdout=DEFAULT_FOLDS * DEFAULT_HORIZON):
+    """Folds over the rows before the evaluation's last ``holdout`` test rows."""
+    return backtest_folds(n_rows - holdout, horizon, n_folds=n_folds)
+
+
+class MedianPruner:
+    """Prune a trial whose running score is worse than the median at the same fold."""
+
+    def __init__(self, n_startup=N_STARTUP):
+        self.n_startup = n_startup
+        self.values = {}
+
+    def report(self, fold, value):
+        """Record ``value`` at ``fold``; True if the trial should stop."""
+        seen = self.values.setdefault(fold, [])
+        prune = len(seen) >= self.n_startup and value > np.median(seen)
+        seen.append(value)
+        return prune
+
+
+def read_history(path):
+    """Events of a JSONL history; a line cut off by an interruption is dropped."""
+    events = []
+    if not Path(path).exists():
+        return events
+    with open(path) as fh:
+        for line in fh:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return events
+
+
+def _fit_trial(model, arrays, train, test):
+    name, params = model
+    return fit_predict(name, arrays, train, test, params)
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+class Search:
+    """Resumable median-pruned search for one model on one table.
+
+    ``path`` is the JSONL history; by default the one of ``name`` on the
+    current feature table, so pass it for any other ``df``.
+    """
+
+    def __init__(self, df, name=FALLBACK_MODEL, path=None, seed=0, n_folds=TUNING_FOLDS,
+                 n_startup=N_STARTUP, fresh=False):
+        if name not in SEARCH_SPACES:
+            raise ValueError(f"no search space for {name!r}; choose from {list(SEARCH_SPACES)}")
+        X_frame, self.y, self.dates = model_inputs(df)
+        self.X = X_frame.to_numpy()
+        self.name = name
+        self.seed = seed
+        self.folds = tuning_folds(len(self.y), n_folds)
+        self.slices = row_slices(np.arange(len(self.y)), self.folds)
+        self.pruner = MedianPruner(n_startup)
+        self.path = Path(path) if path is not None else history_path(dataset_version(), name)
+        self.trials = {}
+        self.cpu_seconds = 0.0
+
+        setup = {"type": "search", "model": name, "seed": seed, "space": SEARCH_SPACES[name],
+                 "defaults": model_params(name), "folds": self.folds.tolist()}
+        events = [] if fresh else read_history(self.path)
+        if events and {k: events[0].get(k) for k in setup} != json.loads(json.dumps(setup)):
+            raise ValueError(f"{self.path} was written by a different search setup; start it fresh")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not events:
+            self.path.write_text("")
+            self._log({**setup, "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds")})
+        else:
+            # Drop a line cut off by an interruption, or the next event would be appended to it.
+            text = self.path.read_text()
+            if not text.endswith("\n") or text.count("\n") != len(events):
+                self.path.write_text("".join(json.dumps(event) + "\n" for event in events))
+        for event in events[1:]:
+            self._apply(event)
+
+    def _log(self, event):
+        with open(self.path, "a") as fh:
+            fh.write(json.dumps(event) + "\n")
+
+    def _apply(self, event):
+        """Update the state with one event; True if it is a fold score that prunes its trial."""
+        if event["type"] == "trial":
+            self.trials[event["trial"]] = {"params": event["params"], "rmse": [], "state": "running"}
+        elif event["type"] == "fold":
+            trial = self.trials[event["trial"]]
+            trial["rmse"].append(event["rmse"])
+            self.cpu_seconds += event["cpu_seconds"]
+            return self.pruner.report(event["fold"], float(np.mean(trial["rmse"])))
+        else:
+            self.trials[event["trial"]]["state"] = event["state"]
+        return False
+
+    def _record(self, event):
+        self._log(event)
+        return self._apply(event)
+
+    def run(self, n_trials=DEFAULT_TRIALS, cpu_budget=DEFAULT_CPU_BUDGET, max_workers=None):
+        """Run until ``n_trials`` trials exist and are finished, or the CPU budget is spent."""
+        workers = max_workers or os.cpu_count()
+        arrays = {"X": self.X, "y": self.y, "dates": self.dates}
+        inflight = {}
+        with SharedArrays(**arrays) as shared:
+            pool = fold_pool(_fit_trial, shared, workers)
+
+            def launch(trial_id):
+                trial = self.trials[trial_id]
+                fold = len(trial["rmse"])
+                future = submit_fold(pool, (self.name, trial["params"]), fold, *self.slices[fold])
+                inflight[future] = trial_id
+
+            try:
+                waiting = [t for t, trial in sorted(self.trials.items()) if trial["state"] == "running"]
+                next_trial = max(self.trials, default=-1) + 1
+                while True:
+                    while len(inflight) < workers and self.cpu_seconds < cpu_budget:
+                        if waiting:
+                            launch(waiting.pop(0))
+                        elif next_trial < n_trials:
+                            self._record({"type": "trial", "trial": next_trial,
+                                          "params": sample_params(SEARCH_SPACES[self.name], next_trial,
+                                                                  self.seed)})
+                            launch(next_trial)
+                            next_trial += 1
+                        else:
+                            break
+                    if not inflight:
+                        break
+                    done, _ = cf.wait(inflight, return_when=cf.FIRST_COMPLETED)
+                    for future in done:
+                        trial_id = inflight.pop(future)
+                        _, fold, predicted, seconds, cpu = future.result()
+                        test = self.slices[fold][1]
+                        rmse = scores(self.y[test], predicted)["rmse"]
+                        prune = self._record({"type": "fold", "trial": trial_id, "fold": fold,
+                                              "rmse": rmse, "seconds": round(seconds, 4),
+                                              "cpu_seconds": round(cpu, 4)})
+                        last = fold + 1 == len(self.folds)
+                        if prune or last:
+                            self._record({"type": "end", "trial": trial_id,
+                                          "state": "pruned" if prune and not last else "complete",
+                                          "score": float(np.mean(self.trials[trial_id]["rmse"]))})
+                        else:
+                            waiting.insert(0, trial_id)
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        return search_summary(read_history(self.path))
+
+
+# ---------------------------------------------------------------------------
+# Summary
+# ---------------------------------------------------------------------------
+
+def search_summary(events):
+    """Progress and best configuration of a history, for the CLI and page 6."""
+    setup, trials = events[0], {}
+    for event in events[1:]:
+        if event["type"] == "trial":
+            # Trial 0 runs the defaults; show their values for the searched keys.
+            params = event["params"] or {k: setup["defaults"].get(k) for k in setup["space"]}
+            trials[event["trial"]] = {"trial": event["trial"], "params": params,
+                                      "rmse": [], "cpu_seconds": 0.0, "state": "running"}
+        elif event["type"] == "fold":
+            trials[event["trial"]]["rmse"].append(event["rmse"])
+            trials[event["trial"]]["cpu_seconds"] += event["cpu_seconds"]
+        elif event["type"] == "end":
+            trials[event["trial"]]["state"] = event["state"]
+
+    n_folds = len(setup["folds"])
+    table = pd.DataFrame([{
+        "trial": t["trial"], "state": t["state"], "folds_done": len(t["rmse"]),
+        "score": float(np.mean(t["rmse"])) if t["rmse"] else None,
+        "cpu_seconds": t["cpu_seconds"], **t["params"],
+    } for t in trials.values()], columns=["trial", "state", "folds_done", "score", "cpu_seconds"]
+        + list(setup["space"]))
+    complete = table[table["state"] == "complete"]
+    best = complete.loc[complete["score"].idxmin()] if len(complete) else None
+    default = complete[complete["trial"] == 0]
+    return {
+        "model": setup["model"],
+        "created_at": setup.get("created_at"),
+        "folds": n_folds,
+        "space": setup["space"],
+        "defaults": setup["defaults"],
+        "trials": table,
+        "counts": table["state"].value_counts().to_dict(),
+        "cpu_seconds": float(table["cpu_seconds"].sum()),
+        "fold_fraction": float(table["folds_done"].sum() / max(len(table) * n_folds, 1)),
+        "best": None if best is None else {
+            "trial": int(best["trial"]), "score": float(best["score"]),
+            "params": trials[int(best["trial"])]["params"],
+        },
+        "default_score": float(default["score"].iloc[0]) if len(default) else None,
+    }
+
+
+def find_history(data_version=None, name=FALLBACK_MODEL, root=ARTIFACTS_DIR):
+    """History of ``data_version`` for ``name``, else the newest one, else None."""
+    if data_version is not None and history_path(data_version, name, root).exists():
+        return history_path(data_version, name, root)
+    suffix = history_path("", name, root).name
+    candidates = sorted((Path(root) / ARTIFACT).glob(f"*{suffix}"), key=lambda p: p.stat().st_mtime)
+    return candidates[-1] if candidates else None
+
+
+@tracked_cache(st.cache_data, show_spinner=False, max_entries=8)
+def _cached_summary(path, mtime_ns):
+    events = read_history(path)
+    return search_summary(events) if events else None
+
+
+def load_tuning(name=FALLBACK_MODEL):
+    """Summary of the search for ``name`` on the current data (or the newest one), or None."""
+    path = find_history(dataset_version(), name)
+    if path is None:
+        return None
+    return _cached_summary(str(path), path.stat().st_mtime_ns)
+
+
+def run(path=DATA_PATH, name=FALLBACK_MODEL, n_trials=DEFAULT_TRIALS, cpu_budget=DEFAULT_CPU_BUDGET,
+        max_workers=None, seed=0, fresh=False):
+    """Start or resume the search for ``name`` on the table at ``path``."""
+    target = history_path(dataset_version(path), name)
+    search = Search(read_feature_table_cached(path), name, target, seed=seed, fresh=fresh)
+    return target, search.run(n_trials, cpu_budget, max_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune a feature model with median-pruned trials.")
+    parser.add_argument("--path", default=str(DATA_PATH))
+    parser.add_argument("--model", default=FALLBACK_MODEL, choices=list(SEARCH_SPACES))
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="total, including earlier runs")
+    parser.add_argument("--cpu-budget", type=float, default=DEFAULT_CPU_BUDGET,
+                        help="fit CPU seconds, including earlier runs")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fresh", action="store_true", help="discard the history and start over")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    target, summary = run(args.path, args.model, args.trials, args.cpu_budget, args.workers,
+                          args.seed, args.fresh)
+    ranked = summary["trials"].sort_values(["folds_done", "score"], ascending=[False, True])
+    print(ranked.head(10).to_string(index=False))
+    print(f"{summary['counts']}  cpu {summary['cpu_seconds']:.0f}s  "
+          f"wall {time.perf_counter() - started:.0f}s -> {target}")
+    if summary["best"]:
+        print(f"Best trial {summary['best']['trial']}: RMSE {summary['best']['score']:.2f} "
+              f"(defaults {summary['default_score']}) {summary['best']['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Sidebar widgets and layout helpers shared by several pages.
+"""
+
+import os
+
+import streamlit as st
+
+from dashboard.data import load_series, series_keys
+from dashboard.downsample import DEFAULT_POINTS, downsample_frame
+
+ALL_SERIES = "Tümü (toplam talep)"
+POINT_BUDGETS = (500, 1_000, DEFAULT_POINTS, 5_000, 10_000)
+GRANULARITIES = {"day": "Gün", "week": "Hafta", "month": "Ay"}
+GRAIN_TITLES = {"day": "Günlük", "week": "Haftalık", "month": "Aylık"}
+# Set to 1 to run every lazy section on every rerun (for before/after benchmarks).
+EAGER_ENV = "DASHBOARD_EAGER_SECTIONS"
+
+
+def select_series(df):
+    """Sidebar series picker for the EDA pages.
+
+    Returns ``(df, None)`` for the aggregate table unless a multi-series
+    table exists and the user picked one series, in which case that
+    series' rows and key are returned. The choice is kept in session state
+    so it follows the user across pages.
+    """
+    keys = series_keys()
+    if not keys:
+        return df, None
+
+    options = [ALL_SERIES] + keys
+    current = st.session_state.get("series_key", ALL_SERIES)
+    choice = st.sidebar.selectbox(
+        "📂 Seri (kategori / satıcı / eyalet)", options,
+        index=options.index(current) if current in options else 0,
+    )
+    st.session_state["series_key"] = choice
+    if choice == ALL_SERIES:
+        return df, None
+    return load_series(choice), choice
+
+
+def point_budget():
+    """Sidebar cap on the points sent per time-series trace (kept across pages)."""
+    budget = st.sidebar.select_slider(
+        "📉 Grafik nokta bütçesi", options=POINT_BUDGETS,
+        value=st.session_state.get("point_budget", DEFAULT_POINTS),
+    )
+    st.session_state["point_budget"] = budget
+    return budget
+
+
+def time_filter(timeline):
+    """Sidebar date range and granularity, kept in session state across pages.
+
+    Returns ``(rows, grain)``: the row slice of ``timeline`` inside the
+    chosen range and one of ``GRANULARITIES``. A range covering all the
+    data is stored as ``None``, so it keeps covering it when new days
+    arrive or another series is picked.
+    """
+    first, last = timeline.first.date(), timeline.last.date()
+    start, end = st.session_state.get("date_range") or (first, last)
+    start, end = max(start, first), min(end, last)
+    if start > end:
+        start, end = first, last
+    picked = st.sidebar.date_input("📅 Tarih aralığı", value=(start, end),
+                                   min_value=first, max_value=last, format="YYYY-MM-DD")
+    if len(picked) == 2:  # a single date while the user is still picking the end
+        start, end = picked
+    st.session_state["date_range"] = None if (start, end) == (first, last) else (start, end)
+
+    grains = list(GRANULARITIES)
+    grain = st.sidebar.radio("🕒 Zaman ayrıntısı", grains, format_func=GRANULARITIES.get,
+                             index=grains.index(st.session_state.get("granularity", "day")),
+                             horizontal=True)
+    st.session_state["granularity"] = grain
+    return timeline.rows(start, end), grain
+
+
+def chart_rows(frame, y, key, budget=DEFAULT_POINTS, x="order_date", method="minmax"):
+    """Rows of a date-sorted frame to draw on a long time-series chart.
+
+    When the frame has more rows than the point budget, a date-range slider
+    picks the visible window (Plotly zoom does not reach the server) and
+    the window is downsampled to the budget, keeping every peak.
+    """
+    if len(frame) <= budget:
+        return frame
+    first, last = frame[x].iloc[0].to_pydatetime(), frame[x].iloc[-1].to_pydatetime()
+    # Bounds in the key: a new sidebar window starts with a fresh slider.
+    x_range = st.slider("Görünür tarih aralığı", min_value=first, max_value=last,
+                        value=(first, last), format="YYYY-MM-DD",
+                        key=f"range_{key}_{first:%Y%m%d}_{last:%Y%m%d}")
+    rows = downsample_frame(frame, x, y, budget, method, x_range)
+    st.caption(f"{len(rows):,} / {len(frame):,} nokta gösteriliyor (aralığı daraltınca detay artar).")
+    return rows
+
+
+def _eager():
+    return os.environ.get(EAGER_ENV) == "1"
+
+
+def lazy_tabs(labels, key):
+    """``st.tabs`` whose bodies only run for the selected tab.
+
+    Guard each body with ``if tab.open:``. Switching tabs reruns the page,
+    and that rerun computes and sends only the newly selected tab.
+    """
+    if _eager():
+        tabs = st.tabs(labels, key=key)
+        for tab in tabs:
+            tab.open = True
+        return tabs
+    return st.tabs(labels, key=key, on_change="rerun")
+
+
+def lazy_expander(label, key, expanded=False):
+    """``st.expander`` whose body only runs while it is expanded (guard with ``.open``)."""
+    if _eager():
+        expander = st.expander(label, expanded, key=key)
+        expander.open = True
+        return expander
+    return st.expander(label, expanded, key=key, on_change="rerun")
@@ -4,24 +4,33 @@ DASHBOARD 1: DATA & BUSINESS OVERVIEW
 """
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-st.set_page_config(page_title="Data & Business Overview", page_icon="🏠", layout="wide")
+from dashboard.aggregates import load_aggregates
+from dashboard.data import load_data
+from dashboard.profiling import chart, end_page, start_page
+from dashboard.ui import GRAIN_TITLES, chart_rows, point_budget, select_series, time_filter
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('demand_features_final.csv')
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    return df
+st.set_page_config(page_title="Data & Business Overview", page_icon="🏠", layout="wide")
+start_page(__file__)
 
-df = load_data()
+df, series = select_series(load_data())
+aggs = load_aggregates(series)
+timeline = aggs['timeline']
+rows, grain = time_filter(timeline)
+summary = timeline.summary(rows)
+budget = point_budget()
 
 st.title("🏠 Data & Business Overview")
 st.markdown("### EDA - Büyük Resim")
 st.markdown("---")
 
+if not summary['days']:
+    st.warning("Seçilen tarih aralığında veri yok.")
+    end_page()
+    st.stop()
+
 # Ana soru
 st.info("""
 **🎯 Ana Soru:** Bu veri ne anlatıyor? Olist'te talep nasıl bir yapı gösteriyor?
@@ -33,11 +42,11 @@ st.markdown("*Veri kapsamı, tarih aralığı, hacim*")
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("📅 Tarih Aralığı", f"{df['order_date'].min().strftime('%Y-%m-%d')}")
+    st.metric("📅 Tarih Aralığı", f"{summary['start'].strftime('%Y-%m-%d')}")
 with col2:
-    st.metric("📅 Son Tarih", f"{df['order_date'].max().strftime('%Y-%m-%d')}")
+    st.metric("📅 Son Tarih", f"{summary['end'].strftime('%Y-%m-%d')}")
 with col3:
-    st.metric("📊 Toplam Gün", len(df))
+    st.metric("📊 Toplam Gün", summary['days'])
 with col4:
     st.metric("🔢 Feature Sayısı", len(df.columns))
 
@@ -45,10 +54,10 @@ with col4:
 st.markdown("**Veri Türleri:**")
 col1, col2 = st.columns(2)
 with col1:
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
+    numeric_cols = df.select_dtypes(include='number').columns
     st.write(f"- Sayısal Değişkenler: **{len(numeric_cols)}**")
 with col2:
-    st.write(f"- Toplam Satır: **{len(df):,}**")
+    st.write(f"- Toplam Satır: **{summary['days']:,}** / {len(df):,}")
 
 st.markdown("""
 <div style='background-color: #e8f4f8; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -62,11 +71,15 @@ st.markdown("---")
 st.subheader("📈 2. Time Series Analysis")
 st.markdown("*Talep zaman içinde nasıl değişiyor?*")
 
-fig_ts = px.line(df, x='order_date', y='daily_orders',
-                 title='Günlük Sipariş Trendi',
-                 labels={'order_date': 'Tarih', 'daily_orders': 'Günlük Sipariş'})
+if grain == 'day':
+    ts_rows = chart_rows(aggs['trend'].iloc[rows], 'daily_orders', key='daily_orders', budget=budget)
+else:
+    ts_rows = timeline.rollup(grain, rows)
+fig_ts = px.line(ts_rows, x='order_date', y='daily_orders',
+                 title=f'{GRAIN_TITLES[grain]} Sipariş Trendi',
+                 labels={'order_date': 'Tarih', 'daily_orders': f'{GRAIN_TITLES[grain]} Sipariş'})
 fig_ts.update_layout(hovermode='x unified')
-st.plotly_chart(fig_ts, use_container_width=True)
+chart(fig_ts, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #e8f4f8; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -80,19 +93,20 @@ st.markdown("---")
 st.subheader("📦 3. Talep Dağılımı")
 st.markdown("*Sipariş hacmi nasıl dağılıyor?*")
 
+window = aggs['trend'].iloc[rows]
 col1, col2 = st.columns(2)
 
 with col1:
-    fig_hist = px.histogram(df, x='daily_orders', nbins=30,
+    fig_hist = px.histogram(window, x='daily_orders', nbins=30,
                             title='Günlük Sipariş Dağılımı',
                             labels={'daily_orders': 'Günlük Sipariş', 'count': 'Frekans'})
-    st.plotly_chart(fig_hist, use_container_width=True)
+    chart(fig_hist, use_container_width=True)
 
 with col2:
-    fig_box = px.box(df, y='daily_orders',
+    fig_box = px.box(window, y='daily_orders',
                      title='Sipariş Box Plot',
                      labels={'daily_orders': 'Günlük Sipariş'})
-    st.plotly_chart(fig_box, use_container_width=True)
+    chart(fig_box, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #e8f4f8; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -107,7 +121,7 @@ st.subheader("💳 4. Haftalık Pattern")
 st.markdown("*Haftanın günlerine göre talep*")
 
 if 'dayofweek' in df.columns:
-    dow_avg = df.groupby('dayofweek')['daily_orders'].mean().reset_index()
+    dow_avg = timeline.by_category('dayofweek', rows)[['dayofweek', 'mean']].rename(columns={'mean': 'daily_orders'})
     day_names = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar']
     dow_avg['day_name'] = dow_avg['dayofweek'].apply(lambda x: day_names[int(x)] if x < 7 else 'Bilinmiyor')
     
@@ -115,7 +129,7 @@ if 'dayofweek' in df.columns:
                      title='Haftanın Günlerine Göre Ortalama Sipariş',
                      labels={'day_name': 'Gün', 'daily_orders': 'Ortalama Sipariş'},
                      color='daily_orders', color_continuous_scale='Blues')
-    st.plotly_chart(fig_dow, use_container_width=True)
+    chart(fig_dow, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #e8f4f8; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -133,3 +147,5 @@ st.success("""
 - **Haftalık pattern mevcut** - tahmin için fırsat
 - **Mevsimsel paternler mevcut** - feature engineering için fırsat
 """)
+
+end_page()
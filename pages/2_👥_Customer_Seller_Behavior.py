@@ -4,24 +4,33 @@ DASHBOARD 2: CUSTOMER & SELLER BEHAVIOR
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
-st.set_page_config(page_title="Customer & Seller Behavior", page_icon="👥", layout="wide")
+from dashboard.aggregates import load_aggregates
+from dashboard.cube import load_cube
+from dashboard.data import load_data
+from dashboard.profiling import chart, end_page, start_page
+from dashboard.ui import GRAIN_TITLES, chart_rows, point_budget, select_series, time_filter
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('demand_features_final.csv')
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    return df
+st.set_page_config(page_title="Customer & Seller Behavior", page_icon="👥", layout="wide")
+start_page(__file__)
 
-df = load_data()
+df, series = select_series(load_data())
+aggs = load_aggregates(series)
+timeline = aggs['timeline']
+rows, grain = time_filter(timeline)
+budget = point_budget()
 
 st.title("👥 Customer & Seller Behavior")
 st.markdown("### EDA - Davranışsal İçgörü")
 st.markdown("---")
 
+summary = timeline.summary(rows)
+if not summary['days']:
+    st.warning("Seçilen tarih aralığında veri yok.")
+    end_page()
+    st.stop()
+
 # Ana soru
 st.info("""
 **🎯 Ana Soru:** Talebi kim üretiyor, kim karşılıyor?
@@ -31,18 +40,41 @@ st.info("""
 st.subheader("👤 1. Aylık Talep Analizi")
 st.markdown("*Müşteri davranış paternleri - aylık bazda*")
 
-if 'month' in df.columns:
-    monthly_orders = df.groupby('month')['daily_orders'].agg(['sum', 'mean', 'std']).reset_index()
-    monthly_orders.columns = ['Ay', 'Toplam', 'Ortalama', 'Std']
-    
-    month_names = ['Oca', 'Şub', 'Mar', 'Nis', 'May', 'Haz', 'Tem', 'Ağu', 'Eyl', 'Eki', 'Kas', 'Ara']
-    monthly_orders['Ay_Adı'] = monthly_orders['Ay'].apply(lambda x: month_names[int(x)-1] if 1 <= x <= 12 else 'N/A')
-    
-    fig_monthly = px.bar(monthly_orders, x='Ay_Adı', y='Toplam',
-                         title='Aylık Toplam Sipariş',
-                         labels={'Ay_Adı': 'Ay', 'Toplam': 'Toplam Sipariş'},
-                         color='Toplam', color_continuous_scale='Viridis')
-    st.plotly_chart(fig_monthly, use_container_width=True)
+# Year-month cells of the rollup cube (Jan 2017 and Jan 2018 stay apart)
+cube = load_cube(series)
+window = dict(series=series, start=summary['start'], end=summary['end'])
+# The heatmap has 7 cells per month: a long range keeps its last months within the point budget
+max_months = budget // 7
+first_month = (summary['end'].to_period('M') - (max_months - 1)).to_timestamp()
+if first_month > summary['start']:
+    window['start'] = first_month
+    st.caption(f"Aylık grafikler son {max_months} ayı gösteriyor (nokta bütçesi).")
+monthly_orders = cube.frame('month', **window)[['period', 'sum', 'mean', 'std', 'count']]
+monthly_orders.columns = ['Ay', 'Toplam', 'Ortalama', 'Std', 'Gün']
+
+month_names = ['Oca', 'Şub', 'Mar', 'Nis', 'May', 'Haz', 'Tem', 'Ağu', 'Eyl', 'Eki', 'Kas', 'Ara']
+monthly_orders['Ay_Adı'] = [f"{month_names[d.month - 1]} {d.year}" for d in monthly_orders['Ay']]
+
+fig_monthly = go.Figure(go.Bar(
+    x=monthly_orders['Ay_Adı'], y=monthly_orders['Toplam'],
+    customdata=monthly_orders[['Gün', 'Ortalama']].to_numpy(),
+    marker=dict(color=monthly_orders['Toplam'], colorscale='Viridis', colorbar=dict(title='Toplam Sipariş')),
+    hovertemplate='Ay: %{x}<br>Toplam Sipariş: %{y}<br>Gün: %{customdata[0]}'
+                  '<br>Ortalama: %{customdata[1]:.1f}<extra></extra>'))
+fig_monthly.update_layout(title='Aylık Toplam Sipariş', xaxis_title='Ay', yaxis_title='Toplam Sipariş')
+chart(fig_monthly, use_container_width=True)
+
+# Weekday by month: average orders per (year-month, weekday) cell
+day_names = ['Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz']
+weekday_month = cube.frame('month', split='dayofweek', by=('period', 'dayofweek'), **window)
+heat = weekday_month.pivot(index='dayofweek', columns='period', values='mean')
+fig_heat = go.Figure(go.Heatmap(z=heat.to_numpy(), x=[f"{month_names[d.month - 1]} {d.year}" for d in heat.columns],
+                                y=[day_names[int(i)] for i in heat.index], colorscale='Viridis',
+                                colorbar=dict(title='Ortalama'),
+                                hovertemplate='Ay: %{x}<br>Gün: %{y}<br>Ortalama: %{z:.1f}<extra></extra>'))
+fig_heat.update_layout(title='Ay × Haftanın Günü: Ortalama Sipariş', xaxis_title='Ay', yaxis_title='Gün',
+                       yaxis_autorange='reversed')
+chart(fig_heat, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #fff3e0; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -58,7 +90,7 @@ st.subheader("🏪 2. Haftalık Talep Paternleri")
 st.markdown("*Haftanın günlerine göre sipariş dağılımı*")
 
 if 'dayofweek' in df.columns:
-    dow_stats = df.groupby('dayofweek')['daily_orders'].agg(['mean', 'std', 'min', 'max']).reset_index()
+    dow_stats = timeline.by_category('dayofweek', rows)
     day_names = ['Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz']
     dow_stats['Gün'] = dow_stats['dayofweek'].apply(lambda x: day_names[int(x)] if x < 7 else 'N/A')
     
@@ -67,7 +99,7 @@ if 'dayofweek' in df.columns:
                               error_y=dict(type='data', array=dow_stats['std'])))
     fig_dow.update_layout(title='Haftanın Günlerine Göre Sipariş (Std ile)',
                           xaxis_title='Gün', yaxis_title='Ortalama Sipariş')
-    st.plotly_chart(fig_dow, use_container_width=True)
+    chart(fig_dow, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #fff3e0; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -82,22 +114,27 @@ st.markdown("---")
 st.subheader("🗺️ 3. Talep Trendi Analizi")
 st.markdown("*Uzun vadeli trend*")
 
-# Rolling average
-df_sorted = df.sort_values('order_date')
-df_sorted['rolling_7'] = df_sorted['daily_orders'].rolling(window=7).mean()
-df_sorted['rolling_30'] = df_sorted['daily_orders'].rolling(window=30).mean()
-
 fig_trend = go.Figure()
-fig_trend.add_trace(go.Scatter(x=df_sorted['order_date'], y=df_sorted['daily_orders'],
-                                mode='lines', name='Günlük', opacity=0.4))
-fig_trend.add_trace(go.Scatter(x=df_sorted['order_date'], y=df_sorted['rolling_7'],
-                                mode='lines', name='7 Günlük MA', line=dict(width=2)))
-fig_trend.add_trace(go.Scatter(x=df_sorted['order_date'], y=df_sorted['rolling_30'],
-                                mode='lines', name='30 Günlük MA', line=dict(width=3)))
-fig_trend.update_layout(title='Talep Trendi (Hareketli Ortalamalar)',
+if grain == 'day':
+    # Rolling average (precomputed), downsampled to the point budget
+    df_sorted = chart_rows(aggs['trend'].iloc[rows], 'daily_orders', key='trend', budget=budget)
+    fig_trend.add_trace(go.Scatter(x=df_sorted['order_date'], y=df_sorted['daily_orders'],
+                                    mode='lines', name='Günlük', opacity=0.4))
+    fig_trend.add_trace(go.Scatter(x=df_sorted['order_date'], y=df_sorted['rolling_7'],
+                                    mode='lines', name='7 Günlük MA', line=dict(width=2)))
+    fig_trend.add_trace(go.Scatter(x=df_sorted['order_date'], y=df_sorted['rolling_30'],
+                                    mode='lines', name='30 Günlük MA', line=dict(width=3)))
+    trend_title = 'Talep Trendi (Hareketli Ortalamalar)'
+else:
+    periods = timeline.rollup(grain, rows)
+    fig_trend.add_trace(go.Scatter(x=periods['order_date'], y=periods['mean'],
+                                    mode='lines+markers', name='Günlük ortalama',
+                                    error_y=dict(type='data', array=periods['std'], thickness=1)))
+    trend_title = f'{GRAIN_TITLES[grain]} Talep Trendi (dönem içi günlük ortalama ± std)'
+fig_trend.update_layout(title=trend_title,
                         xaxis_title='Tarih', yaxis_title='Sipariş',
                         hovermode='x unified')
-st.plotly_chart(fig_trend, use_container_width=True)
+chart(fig_trend, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #fff3e0; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -116,3 +153,5 @@ st.success("""
 - **Aylık mevsimsellik** - stok planlamayı etkiler
 - **Trend yükseliyor** - büyüme potansiyeli var
 """)
+
+end_page()
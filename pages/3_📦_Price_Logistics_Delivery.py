@@ -7,22 +7,33 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
 
-st.set_page_config(page_title="Price, Logistics & Delivery", page_icon="📦", layout="wide")
+from dashboard.aggregates import load_aggregates
+from dashboard.data import load_data
+from dashboard.forecast import load_forecast
+from dashboard.intervals import load_intervals, quantile_forecast
+from dashboard.profiling import chart, end_page, start_page
+from dashboard.ui import GRAIN_TITLES, chart_rows, point_budget, select_series, time_filter
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('demand_features_final.csv')
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    return df
+st.set_page_config(page_title="Price, Logistics & Delivery", page_icon="📦", layout="wide")
+start_page(__file__)
 
-df = load_data()
+df, series = select_series(load_data())
+aggs = load_aggregates(series)
+timeline = aggs['timeline']
+rows, grain = time_filter(timeline)
+summary = timeline.summary(rows)
+budget = point_budget()
 
 st.title("📦 Price, Logistics & Delivery")
 st.markdown("### EDA - Operasyonel Perspektif")
 st.markdown("---")
 
+if not summary['days']:
+    st.warning("Seçilen tarih aralığında veri yok.")
+    end_page()
+    st.stop()
+
 # Ana soru
 st.info("""
 **🎯 Ana Soru:** Fiyat, kargo ve teslimat talebi nasıl etkiliyor?
@@ -32,25 +43,33 @@ st.info("""
 st.subheader("💰 1. Talep Volatilitesi")
 st.markdown("*Talep değişkenliği analizi*")
 
-# Calculate volatility
-df_sorted = df.sort_values('order_date').copy()
-df_sorted['rolling_std'] = df_sorted['daily_orders'].rolling(window=14).std()
-df_sorted['rolling_mean'] = df_sorted['daily_orders'].rolling(window=14).mean()
-df_sorted['cv'] = df_sorted['rolling_std'] / df_sorted['rolling_mean'] * 100
+if grain == 'day':
+    # Volatility (precomputed 14-day rolling std / mean / CV)
+    df_sorted = aggs['volatility'].iloc[rows]
+    vol_title, cv_title = '14 Günlük Rolling Volatilite', 'Değişim Katsayısı (%)'
+else:
+    # Spread of the days inside each week / month of the window
+    periods = timeline.rollup(grain, rows)
+    df_sorted = pd.DataFrame({'order_date': periods['order_date'], 'rolling_std': periods['std'],
+                              'cv': periods['std'] / periods['mean'] * 100})
+    vol_title = f'{GRAIN_TITLES[grain]} Volatilite (dönem içi günlük std)'
+    cv_title = f'{GRAIN_TITLES[grain]} Değişim Katsayısı (%)'
 
 col1, col2 = st.columns(2)
 
 with col1:
-    fig_vol = px.line(df_sorted, x='order_date', y='rolling_std',
-                      title='14 Günlük Rolling Volatilite',
+    vol_rows = chart_rows(df_sorted, 'rolling_std', key='rolling_std', budget=budget)
+    fig_vol = px.line(vol_rows, x='order_date', y='rolling_std',
+                      title=vol_title,
                       labels={'order_date': 'Tarih', 'rolling_std': 'Std Sapma'})
-    st.plotly_chart(fig_vol, use_container_width=True)
+    chart(fig_vol, use_container_width=True)
 
 with col2:
-    fig_cv = px.line(df_sorted, x='order_date', y='cv',
-                     title='Değişim Katsayısı (%)',
+    cv_rows = chart_rows(df_sorted, 'cv', key='cv', budget=budget)
+    fig_cv = px.line(cv_rows, x='order_date', y='cv',
+                     title=cv_title,
                      labels={'order_date': 'Tarih', 'cv': 'CV %'})
-    st.plotly_chart(fig_cv, use_container_width=True)
+    chart(fig_cv, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #e8f5e9; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -68,29 +87,64 @@ st.markdown("*Kapasite planlama için istatistikler*")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("📊 Ortalama Sipariş", f"{df['daily_orders'].mean():.1f}")
+    st.metric("📊 Ortalama Sipariş", f"{summary['mean']:.1f}")
 with col2:
-    st.metric("📈 Maksimum", f"{df['daily_orders'].max():.0f}")
+    st.metric("📈 Maksimum", f"{summary['max']:.0f}")
 with col3:
-    st.metric("📉 Minimum", f"{df['daily_orders'].min():.0f}")
+    st.metric("📉 Minimum", f"{summary['min']:.0f}")
 with col4:
-    st.metric("🎯 Std Sapma", f"{df['daily_orders'].std():.1f}")
-
-# Percentile analysis
-st.markdown("**Kapasite Planlama için Yüzdelikler:**")
-percentiles = [50, 75, 90, 95, 99]
-perc_values = [np.percentile(df['daily_orders'], p) for p in percentiles]
-
-fig_perc = px.bar(x=[f'{p}. Yüzdelik' for p in percentiles], y=perc_values,
-                  title='Sipariş Hacmi Yüzdelikleri',
-                  labels={'x': 'Yüzdelik', 'y': 'Sipariş Sayısı'},
-                  color=perc_values, color_continuous_scale='Oranges')
-st.plotly_chart(fig_perc, use_container_width=True)
+    st.metric("🎯 Std Sapma", f"{summary['std']:.1f}")
+
+# Forward-looking capacity bands: quantile forecasts from stored backtest residuals
+st.markdown("**İleriye Dönük Kapasite Bantları (P50 / P90 / P95 / P99):**")
+intervals, current = load_intervals()
+if series is not None:
+    st.info("Kapasite bantları toplam talep için hesaplanıyor; seri seçimini 'Tümü' yapın.")
+elif intervals is None:
+    st.warning("Tahmin aralıkları henüz hesaplanmadı; arka planda başlatıldı "
+               "(`python -m dashboard.intervals`).")
+else:
+    horizon = st.slider("Planlama ufku (gün)", min_value=7, max_value=intervals['horizon'],
+                        value=min(30, intervals['horizon']), step=1)
+    bands = quantile_forecast(load_forecast(horizon), intervals)
+    history = aggs['trend'].tail(90)
+
+    fig_bands = go.Figure()
+    fig_bands.add_trace(go.Scatter(x=history['order_date'], y=history['daily_orders'],
+                                   mode='lines', name='Gerçek', line=dict(color='black', width=2)))
+    for column, color in [('p99', 'rgba(230, 81, 0, 0.15)'), ('p95', 'rgba(230, 81, 0, 0.3)'),
+                          ('p90', 'rgba(230, 81, 0, 0.45)')]:
+        fig_bands.add_trace(go.Scatter(x=bands['order_date'], y=bands[column], mode='lines',
+                                       name=column.upper(), line=dict(width=0), fill='tozeroy',
+                                       fillcolor=color))
+    fig_bands.add_trace(go.Scatter(x=bands['order_date'], y=bands['p50'], mode='lines',
+                                   name='P50', line=dict(color='#e65100', width=2, dash='dash')))
+    fig_bands.add_hline(y=aggs['percentiles'][95], line_dash='dot', line_color='gray',
+                        annotation_text='Geçmiş P95')
+    fig_bands.update_layout(title=f'Önümüzdeki {horizon} Gün için Kapasite Bantları',
+                            xaxis_title='Tarih', yaxis_title='Sipariş', hovermode='x unified')
+    chart(fig_bands, use_container_width=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("P90 zirve", f"{bands['p90'].max():.0f}")
+    with col2:
+        st.metric("P95 zirve", f"{bands['p95'].max():.0f}",
+                  delta=f"{bands['p95'].max() - aggs['percentiles'][95]:+.0f} geçmiş P95'e göre",
+                  delta_color='off')
+    with col3:
+        st.metric("P99 zirve", f"{bands['p99'].max():.0f}")
+
+    st.caption(f"{intervals['model']} ile özyinelemeli tahmin + {len(intervals['origins'])} geçmiş "
+               f"başlangıç noktasından ({intervals['origins'][0]} – {intervals['origins'][-1]}) "
+               "backtest hatalarının konformal yüzdelikleri. "
+               + ("" if current else "Güncel veri için yeniden hesaplanıyor; önceki sonuç gösteriliyor."))
 
 st.markdown("""
 <div style='background-color: #e8f5e9; padding: 15px; border-radius: 8px; margin: 10px 0;'>
-<b>📝 Yorum:</b> 95. yüzdelik değeri günlük kapasite planlaması için kritik.
-Bu değerin üzerindeki günler için ekstra kaynak gerekiyor.
+<b>📝 Yorum:</b> Sabit geçmiş yüzdelikler yerine her gün için ileriye dönük P95 bandı
+kapasite planlamasının temeli. P95 bandının üzerine çıkması beklenen günler için ekstra
+kaynak gerekiyor; P99 bandı olağanüstü günler için yedek kapasiteyi gösteriyor.
 </div>
 """, unsafe_allow_html=True)
 
@@ -100,20 +154,21 @@ st.markdown("---")
 st.subheader("📏 3. Peak Günler Analizi")
 st.markdown("*Yüksek talep dönemleri*")
 
-threshold_90 = np.percentile(df['daily_orders'], 90)
-df_peaks = df[df['daily_orders'] >= threshold_90].copy()
+# Threshold from the whole history; days above it counted inside the window
+threshold = aggs['peaks']['threshold']
+peak_count = timeline.count_at_least(threshold, rows)
 
-st.write(f"**90. yüzdelik üzeri gün sayısı:** {len(df_peaks)} ({len(df_peaks)/len(df)*100:.1f}%)")
+st.write(f"**90. yüzdelik üzeri gün sayısı:** {peak_count} ({peak_count/summary['days']*100:.1f}%)")
 
-if 'dayofweek' in df_peaks.columns:
-    peak_dow = df_peaks['dayofweek'].value_counts().sort_index()
+if 'dayofweek' in df.columns:
+    peak_dow = timeline.count_at_least(threshold, rows, by='dayofweek')
     day_names = ['Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz']
     
     fig_peak = px.bar(x=[day_names[int(i)] for i in peak_dow.index],
                       y=peak_dow.values,
                       title='Peak Günlerin Hafta İçi Dağılımı',
                       labels={'x': 'Gün', 'y': 'Peak Gün Sayısı'})
-    st.plotly_chart(fig_peak, use_container_width=True)
+    chart(fig_peak, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #e8f5e9; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -128,7 +183,9 @@ st.success("""
 ### 💡 Bu Sayfanın Anahtar Çıkarımları
 
 - **Volatilite değişken** - bazı dönemler daha riskli
-- **95. yüzdelik kritik** - kapasite planlaması için temel
+- **İleriye dönük P95 bandı kritik** - kapasite planlaması için temel
 - **Peak günler tahmin edilebilir** - haftalık pattern mevcut
 - **Operasyonel metrikler** - talep tahmininde dışsal değişken olarak kullanılabilir
 """)
+
+end_page()
@@ -4,20 +4,24 @@ DASHBOARD 4: FEATURE ENGINEERING INSIGHTS
 """
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-st.set_page_config(page_title="Feature Engineering Insights", page_icon="🛠️", layout="wide")
+from dashboard.correlation import cached_target_correlations
+from dashboard.data import dataset_version, load_data
+from dashboard.features import build_features, compare_tables
+from dashboard.profiling import chart, end_page, start_page, tracked_cache
+from dashboard.ui import lazy_expander
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('demand_features_final.csv')
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    return df
+st.set_page_config(page_title="Feature Engineering Insights", page_icon="🛠️", layout="wide")
+start_page(__file__)
 
 df = load_data()
 
+@tracked_cache(st.cache_data, show_spinner="Feature'lar ham veriden üretiliyor...")
+def rebuild_features(version):
+    return build_features(load_data()[['order_date', 'daily_orders']])
+
 st.title("🛠️ Feature Engineering Insights")
 st.markdown("### FE + EDA Birleşimi - Çok Kritik")
 st.markdown("---")
@@ -38,6 +42,7 @@ st.markdown("""
 | **Lag Features** | lag_1, lag_7, lag_14, lag_30... | Geçmiş talep değerleri |
 | **Rolling Stats** | rolling_mean_*, rolling_std_* | Trend ve volatilite |
 | **Time Features** | dayofweek, month, quarter... | Zamansal pattern |
+| **Event Features** | is_holiday, is_payday, days_to_next_holiday... | Tatil / kampanya etkisi (`--events`) |
 | **Momentum** | momentum değişkenleri | Değişim hızı |
 """)
 
@@ -64,15 +69,14 @@ with col3:
 with col4:
     st.metric("📁 Diğer", len(other_features))
 
-# Show features in expanders
-with st.expander("⏰ Time-based Features", expanded=True):
-    st.write(", ".join(time_features) if time_features else "Bulunamadı")
-
-with st.expander("📊 Lag Features"):
-    st.write(", ".join(lag_features) if lag_features else "Bulunamadı")
-
-with st.expander("📈 Rolling/MA Features"):
-    st.write(", ".join(rolling_features) if rolling_features else "Bulunamadı")
+# Show features in expanders (a collapsed one is not computed or sent)
+for label, features, key, expanded in [("⏰ Time-based Features", time_features, "page4_time", True),
+                                       ("📊 Lag Features", lag_features, "page4_lag", False),
+                                       ("📈 Rolling/MA Features", rolling_features, "page4_rolling", False)]:
+    expander = lazy_expander(label, key, expanded)
+    if expander.open:
+        with expander:
+            st.write(", ".join(features) if features else "Bulunamadı")
 
 st.markdown("---")
 
@@ -80,9 +84,11 @@ st.markdown("---")
 st.subheader("🔄 2. Feature Korelasyonları")
 st.markdown("*Hedef değişken (daily_orders) ile korelasyon*")
 
-numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+corr_method = st.radio("Korelasyon yöntemi", ['pearson', 'spearman'], format_func=str.title, horizontal=True)
+
+numeric_cols = df.select_dtypes(include='number').columns.tolist()
 if 'daily_orders' in numeric_cols:
-    correlations = df[numeric_cols].corr()['daily_orders'].drop('daily_orders').sort_values(ascending=False)
+    correlations = cached_target_correlations(dataset_version(), corr_method).sort_values(ascending=False)
     correlations = correlations.dropna()
     
     top_n = min(15, len(correlations))
@@ -93,7 +99,7 @@ if 'daily_orders' in numeric_cols:
                       labels={'x': 'Korelasyon', 'y': 'Feature'},
                       color=top_corr.values, color_continuous_scale='Greens')
     fig_corr.update_layout(height=500, yaxis={'categoryorder': 'total ascending'})
-    st.plotly_chart(fig_corr, use_container_width=True)
+    chart(fig_corr, use_container_width=True)
 
 st.markdown("""
 <div style='background-color: #e3f2fd; padding: 15px; border-radius: 8px; margin: 10px 0;'>
@@ -118,6 +124,41 @@ normalizasyon gerekebilir.
 </div>
 """, unsafe_allow_html=True)
 
+st.markdown("---")
+
+# Live feature generation
+st.subheader("🧪 4. Ham Veriden Feature Üretimi")
+st.markdown("*Tüm feature'lar yalnızca `order_date` ve `daily_orders` sütunlarından yeniden hesaplanıyor*")
+
+live_df = rebuild_features(dataset_version())
+diff, matches = compare_tables(df, live_df)
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("🛠️ Üretilen Sütun", len(live_df.columns))
+with col2:
+    st.metric("📏 Maksimum Fark", f"{diff.max():.2e}")
+with col3:
+    st.metric("✅ CSV ile Uyum", "Evet" if matches else "Hayır")
+
+feature = st.selectbox("Feature seçin", [c for c in live_df.columns if c not in ('order_date', 'daily_orders')],
+                       index=live_df.columns.get_loc('rolling_mean_30') - 2)
+fig_live = go.Figure()
+fig_live.add_trace(go.Scatter(x=live_df['order_date'], y=live_df['daily_orders'],
+                              mode='lines', name='daily_orders', opacity=0.4))
+fig_live.add_trace(go.Scatter(x=live_df['order_date'], y=live_df[feature],
+                              mode='lines', name=feature, line=dict(width=2)))
+fig_live.update_layout(title=f'Ham Veriden Üretilen: {feature}',
+                       xaxis_title='Tarih', yaxis_title='Değer', hovermode='x unified')
+chart(fig_live, use_container_width=True)
+
+st.markdown("""
+<div style='background-color: #e3f2fd; padding: 15px; border-radius: 8px; margin: 10px 0;'>
+<b>📝 Yorum:</b> Feature pipeline'ı tekrarlanabilir: ham siparişlerden aynı tablo
+float toleransı içinde yeniden üretiliyor.
+</div>
+""", unsafe_allow_html=True)
+
 # Key Takeaways
 st.markdown("---")
 st.success("""
@@ -130,3 +171,5 @@ st.success("""
 
 > **Sonuç:** Bu feature'lar rastgele değil, veri tarafından doğrulanmış!
 """)
+
+end_page()
@@ -9,15 +9,18 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 
-st.set_page_config(page_title="Feature Selection & SHAP", page_icon="🎯", layout="wide")
+from dashboard.collinearity import CLUSTER_THRESHOLD, VIF_THRESHOLD, cached_collinearity
+from dashboard.correlation import cached_target_correlations
+from dashboard.data import dataset_version
+from dashboard.explain import load_explanation, shap_frame
+from dashboard.profiling import chart, end_page, start_page
+from dashboard.selection import load_selection, selection_frame
+from dashboard.ui import lazy_tabs
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('demand_features_final.csv')
-    df['order_date'] = pd.to_datetime(df['order_date'])
-    return df
+st.set_page_config(page_title="Feature Selection & SHAP", page_icon="🎯", layout="wide")
+start_page(__file__)
 
-df = load_data()
+version = dataset_version()
 
 st.title("🎯 Feature Selection & SHAP")
 st.markdown("### Neden Bu Feature'lar?")
@@ -28,99 +31,203 @@ st.info("""
 **🎯 Ana Soru:** Feature'ları rastgele değil, kanıtla seçtik.
 """)
 
-# Tabs
-tab1, tab2, tab3 = st.tabs(["📊 Feature Selection", "🔍 SHAP Analysis", "🔗 Korelasyon"])
+# Tabs (only the selected one is computed and sent on a rerun)
+tab1, tab2, tab3 = lazy_tabs(["📊 Feature Selection", "🔍 SHAP Analysis", "🔗 Korelasyon"], key="page5_tab")
 
 with tab1:
-    st.subheader("📊 Feature Selection Results")
-    st.markdown("*Çoklu yöntemle feature değerlendirmesi*")
-    
-    st.markdown("""
-    ### Kullanılan Yöntemler:
-    
-    1. **Correlation Analysis** - Hedef ile korelasyon
-    2. **Mutual Information** - Non-linear bağımlılık
-    3. **Random Forest Importance** - Tree-based önem skoru
-    """)
-    
-    # Calculate feature importance (correlation-based)
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
-    if 'daily_orders' in numeric_cols:
-        importance = df[numeric_cols].corr()['daily_orders'].drop('daily_orders').abs().sort_values(ascending=False)
-        importance = importance.dropna().head(15)
-        
-        fig_imp = px.bar(x=importance.values, y=importance.index, orientation='h',
-                         title='Feature Importance (Correlation-based)',
-                         labels={'x': 'Importance', 'y': 'Feature'},
-                         color=importance.values, color_continuous_scale='Viridis')
-        fig_imp.update_layout(height=500, yaxis={'categoryorder': 'total ascending'})
-        st.plotly_chart(fig_imp, use_container_width=True)
-    
-    st.markdown("""
-    <div style='background-color: #fce4ec; padding: 15px; border-radius: 8px; margin: 10px 0;'>
-    <b>📝 Yorum:</b> Üç farklı yöntem benzer feature'ları öne çıkarıyor.
-    Uzun dönem trend ve lag feature'ları baskın.
-    </div>
-    """, unsafe_allow_html=True)
+    if tab1.open:
+        st.subheader("📊 Feature Selection Results")
+        st.markdown("*Çoklu yöntemle feature değerlendirmesi*")
+
+        st.markdown("""
+        ### Kullanılan Yöntemler:
+
+        1. **Correlation Analysis** - Hedef ile korelasyon
+        2. **Mutual Information** - Non-linear bağımlılık (k-NN tahmincisi)
+        3. **Random Forest Importance** - Tree-based önem skoru
+        4. **Permutation Importance** - Rolling-origin fold'larında karıştırılan feature'ın RMSE artışı
+        5. **Recursive Feature Elimination** - Random forest ile eleme sırası
+        """)
+
+        selection, current = load_selection()
+        if selection is None:
+            st.info("Feature selection skorları arka planda hesaplanıyor; birazdan sayfayı yenileyin "
+                    "(veya `python -m dashboard.selection`).")
+        else:
+            if not current:
+                st.caption("Güncel veri için skorlar arka planda hesaplanıyor; önceki sürüm gösteriliyor.")
+            scores = selection_frame(selection)
+            correlation = cached_target_correlations(version).abs()
+            scores.insert(0, 'correlation', correlation.reindex(scores.index).values)
+
+            METHOD_LABELS = {
+                'correlation': '|Korelasyon|',
+                'mutual_info': 'Mutual Information',
+                'forest': 'Random Forest Importance',
+                'permutation': f"Permutation Importance ({selection['model']}, RMSE artışı)",
+                'rfe_rank': 'RFE Sırası (1 = en son elenen)',
+            }
+            method = st.radio("Yöntem", list(METHOD_LABELS), format_func=METHOD_LABELS.get,
+                              horizontal=True)
+            ascending = method == 'rfe_rank'
+            importance = scores[method].dropna().sort_values(ascending=ascending).head(15)
+            fig_imp = px.bar(x=importance.values, y=importance.index, orientation='h',
+                             title=f"Feature Importance ({METHOD_LABELS[method]})",
+                             labels={'x': 'Skor', 'y': 'Feature'},
+                             color=importance.values,
+                             color_continuous_scale='Viridis_r' if ascending else 'Viridis')
+            fig_imp.update_layout(height=500, yaxis={'categoryorder': 'total descending' if ascending
+                                                     else 'total ascending'})
+            chart(fig_imp, use_container_width=True)
+
+            if method == 'permutation':
+                per_fold = pd.DataFrame(selection['permutation_folds'], columns=selection['features'],
+                                        dtype=float)[importance.index]
+                fig_folds = px.box(per_fold.melt(var_name='Feature', value_name='RMSE artışı'),
+                                   x='RMSE artışı', y='Feature', points='all',
+                                   title=f"Fold Bazında Permutation Importance "
+                                         f"({selection['config']['folds']} fold)")
+                fig_folds.update_layout(height=500, yaxis={'categoryorder': 'array',
+                                                           'categoryarray': list(importance.index[::-1])})
+                chart(fig_folds, use_container_width=True)
+
+            st.markdown("**Yöntemler arası ortalama sıra** (tüm feature'lar)")
+            st.dataframe(scores.round(4), use_container_width=True, height=350)
+            st.caption(f"Veri sürümü {selection['data_version']}, {selection['created_at']}; "
+                       f"{len(selection['features'])} feature, {selection['wall_seconds']:.0f} s.")
+
+        st.markdown("""
+        <div style='background-color: #fce4ec; padding: 15px; border-radius: 8px; margin: 10px 0;'>
+        <b>📝 Yorum:</b> Farklı yöntemler benzer feature'ları öne çıkarıyor.
+        Yakın geçmiş, uzun dönem trend ve lag feature'ları baskın.
+        </div>
+        """, unsafe_allow_html=True)
 
 with tab2:
-    st.subheader("🔍 SHAP Analysis")
-    st.markdown("*Model tahminlerini açıklama*")
-    
-    st.markdown("""
-    ### SHAP Değerleri Ne Anlatır?
-    
-    - **Pozitif SHAP:** Feature tahmini artırıyor
-    - **Negatif SHAP:** Feature tahmini azaltıyor
-    - **Büyüklük:** Etkinin gücü
-    """)
-    
-    # Simulated SHAP importance
-    shap_features = ['rolling_mean_30', 'lag_7', 'rolling_mean_7', 'lag_14', 'dayofweek', 
-                     'month', 'lag_30', 'rolling_std_14', 'quarter', 'year']
-    shap_values = [0.85, 0.72, 0.68, 0.55, 0.48, 0.42, 0.38, 0.32, 0.28, 0.22]
-    
-    fig_shap = px.bar(x=shap_values, y=shap_features, orientation='h',
-                      title='SHAP Feature Importance (Simulated)',
-                      labels={'x': 'Mean |SHAP|', 'y': 'Feature'},
-                      color=shap_values, color_continuous_scale='Reds')
-    fig_shap.update_layout(height=400, yaxis={'categoryorder': 'total ascending'})
-    st.plotly_chart(fig_shap, use_container_width=True)
-    
-    st.markdown("""
-    <div style='background-color: #fce4ec; padding: 15px; border-radius: 8px; margin: 10px 0;'>
-    <b>📝 Yorum:</b> SHAP ile selection sonuçlarını doğruladık. 
-    Rolling mean ve lag feature'ları baskın.
-    </div>
-    """, unsafe_allow_html=True)
+    if tab2.open:
+        st.subheader("🔍 SHAP Analysis")
+        st.markdown("*Model tahminlerini açıklama*")
+
+        st.markdown("""
+        ### SHAP Değerleri Ne Anlatır?
+
+        - **Pozitif SHAP:** Feature tahmini artırıyor
+        - **Negatif SHAP:** Feature tahmini azaltıyor
+        - **Büyüklük:** Etkinin gücü
+        """)
+
+        explanation, current = load_explanation()
+        if explanation is None:
+            st.info("SHAP değerleri arka planda hesaplanıyor; birazdan sayfayı yenileyin "
+                    "(veya `python -m dashboard.explain`).")
+        else:
+            if not current:
+                st.caption("Güncel veri için SHAP arka planda hesaplanıyor; önceki sürüm gösteriliyor.")
+            shap_df = shap_frame(explanation)
+            mean_abs = pd.Series(explanation['mean_abs_shap']).sort_values(ascending=False)
+            top = mean_abs.head(15)
+
+            fig_shap = px.bar(x=top.values, y=top.index, orientation='h',
+                              title=f"SHAP Feature Importance ({explanation['model']}, TreeSHAP)",
+                              labels={'x': 'Mean |SHAP|', 'y': 'Feature'},
+                              color=top.values, color_continuous_scale='Reds')
+            fig_shap.update_layout(height=450, yaxis={'categoryorder': 'total ascending'})
+            chart(fig_shap, use_container_width=True)
+
+            # Beeswarm: one dot per day, coloured by the feature's value (rank within the feature)
+            swarm_features = list(mean_abs.head(10).index[::-1])
+            values = pd.DataFrame(explanation['values'], columns=explanation['features'],
+                                  index=shap_df.index, dtype=float)
+            jitter = np.random.default_rng(0).uniform(-0.3, 0.3, len(shap_df))
+            fig_swarm = go.Figure()
+            for pos, feature in enumerate(swarm_features):
+                fig_swarm.add_trace(go.Scatter(
+                    x=shap_df[feature], y=pos + jitter, mode='markers', name=feature,
+                    marker=dict(size=5, color=values[feature].rank(pct=True), colorscale='RdBu_r',
+                                cmin=0, cmax=1, showscale=pos == 0,
+                                colorbar=dict(title='Değer', tickvals=[0, 1], ticktext=['Düşük', 'Yüksek'])),
+                    customdata=values[feature], showlegend=False,
+                    hovertemplate=feature + '<br>SHAP=%{x:.2f}<br>değer=%{customdata:.2f}<extra></extra>',
+                ))
+            fig_swarm.update_layout(title='SHAP Beeswarm (ilk 10 feature)', height=500,
+                                    xaxis_title='SHAP değeri (tahmine etkisi)',
+                                    yaxis=dict(tickvals=list(range(len(swarm_features))), ticktext=swarm_features))
+            chart(fig_swarm, use_container_width=True)
+
+            # Waterfall for one day
+            days = [d.strftime('%Y-%m-%d') for d in shap_df.index]
+            day = st.select_slider("📅 Açıklanacak gün", options=days, value=days[-1])
+            i = days.index(day)
+            row = shap_df.iloc[i]
+            order = row.abs().sort_values(ascending=False).index
+            shown, rest = list(order[:10]), row[order[10:]].sum()
+            fig_wf = go.Figure(go.Waterfall(
+                orientation='h',
+                measure=['absolute'] + ['relative'] * (len(shown) + 1) + ['total'],
+                y=['Beklenen değer'] + shown + [f'Diğer {len(order) - len(shown)} feature', 'Tahmin'],
+                x=[explanation['expected_value']] + row[shown].tolist() + [rest, 0],
+            ))
+            fig_wf.update_layout(title=f"{day}: tahmin {explanation['prediction'][i]:.1f}, "
+                                       f"gerçek {explanation['daily_orders'][i]:.0f}",
+                                 height=500, yaxis={'autorange': 'reversed'})
+            chart(fig_wf, use_container_width=True)
+
+        st.markdown("""
+        <div style='background-color: #fce4ec; padding: 15px; border-radius: 8px; margin: 10px 0;'>
+        <b>📝 Yorum:</b> SHAP ile selection sonuçlarını doğruladık. 
+        Yakın geçmiş (dünkü talep), haftanın günü ve uzun dönem lag / momentum feature'ları baskın.
+        </div>
+        """, unsafe_allow_html=True)
 
 with tab3:
-    st.subheader("🔗 Feature Korelasyon Matrisi")
-    st.markdown("*Seçili feature'ların korelasyonu*")
-    
-    # Select top features for correlation
-    top_features = ['daily_orders']
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
-    for col in numeric_cols[:9]:
-        if col != 'daily_orders':
-            top_features.append(col)
-    
-    if len(top_features) > 1:
-        corr_matrix = df[top_features].corr()
-        
-        fig_heat = px.imshow(corr_matrix, 
-                            title='Korelasyon Matrisi',
-                            labels=dict(color="Korelasyon"),
-                            color_continuous_scale='RdBu_r',
-                            aspect='auto')
-        st.plotly_chart(fig_heat, use_container_width=True)
-    
-    st.markdown("""
-    <div style='background-color: #fce4ec; padding: 15px; border-radius: 8px; margin: 10px 0;'>
-    <b>📝 Yorum:</b> Multicollinearity kontrolü yapıldı. 
-    Yüksek korelasyonlu feature çiftleri modelde dikkatli kullanılmalı.
-    </div>
-    """, unsafe_allow_html=True)
+    if tab3.open:
+        st.subheader("🔗 Feature Korelasyon Matrisi")
+        st.markdown("*Tüm feature'lar, hiyerarşik kümelemeye göre sıralı*")
+
+        col1, col2 = st.columns(2)
+        threshold = col1.slider("Küme eşiği |r|", 0.70, 0.99, CLUSTER_THRESHOLD, 0.01)
+        vif_threshold = col2.slider("VIF eşiği", 2.0, 50.0, VIF_THRESHOLD, 1.0)
+        analysis = cached_collinearity(version, threshold, vif_threshold)
+
+        fig_heat = px.imshow(analysis['correlation'],
+                             title='Korelasyon Matrisi (kümelere göre sıralı)',
+                             labels=dict(color="Korelasyon"),
+                             color_continuous_scale='RdBu_r', zmin=-1, zmax=1,
+                             aspect='auto')
+        fig_heat.update_layout(height=700)
+        chart(fig_heat, use_container_width=True)
+
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            vif = analysis['vif'].replace(np.inf, np.nan).dropna().sort_values(ascending=False)
+            fig_vif = px.bar(x=vif.values, y=vif.index, orientation='h', log_x=True,
+                             title='Variance Inflation Factor (log ölçek)',
+                             labels={'x': 'VIF', 'y': 'Feature'},
+                             color=analysis['clusters'][vif.index].astype(str))
+            fig_vif.add_vline(x=vif_threshold, line_dash='dash', line_color='red')
+            fig_vif.update_layout(height=700, showlegend=False, yaxis={'categoryorder': 'total ascending'})
+            chart(fig_vif, use_container_width=True)
+        with col2:
+            kept = analysis['kept']
+            n_total = len(analysis['vif'])
+            st.metric("İndirgenmiş feature seti", f"{len(kept)} / {n_total}")
+            st.dataframe(pd.DataFrame({'Feature': kept,
+                                       'Küme': analysis['clusters'][kept].values,
+                                       'VIF': analysis['kept_vif'][kept].round(1).values}),
+                         use_container_width=True, hide_index=True)
+            reasons = {feature: (f"küme: {detail}" if reason == 'cluster' else f"VIF {detail:.0f}")
+                       for feature, (reason, detail) in analysis['dropped'].items()}
+            with st.expander(f"Elenen {len(reasons)} feature"):
+                st.dataframe(pd.Series(reasons, name='Neden').rename_axis('Feature').reset_index(),
+                             use_container_width=True, hide_index=True)
+
+        st.markdown(f"""
+        <div style='background-color: #fce4ec; padding: 15px; border-radius: 8px; margin: 10px 0;'>
+        <b>📝 Yorum:</b> Rolling mean / ewma / lag aileleri aynı kümelerde toplanıyor.
+        Her kümeden hedefle en yüksek korelasyonlu feature tutulup VIF &lt; {vif_threshold:.0f}
+        olana kadar eleme yapıldığında {len(analysis['kept'])} feature kalıyor.
+        </div>
+        """, unsafe_allow_html=True)
 
 # Key Takeaways
 st.markdown("---")
@@ -129,6 +236,8 @@ st.success("""
 
 - **Çoklu yöntem** - tek yönteme bağımlı değiliz
 - **SHAP doğrulaması** - feature önemi açıklanabilir
-- **Rolling mean ve lag baskın** - trend önemli
+- **Yakın geçmiş ve lag baskın** - dünkü talep en güçlü sinyal
 - **Model kara kutu değil** - SHAP ile her tahmin açıklanabilir
 """)
+
+end_page()
@@ -8,7 +8,14 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from dashboard.artifacts import load_evaluation, metrics_table
+from dashboard.data import dataset_version
+from dashboard.profiling import chart, end_page, start_page
+from dashboard.tuning import SEARCH_SPACES, find_history, load_tuning
+from dashboard.ui import lazy_tabs
+
 st.set_page_config(page_title="Model Comparison", page_icon="🏆", layout="wide")
+start_page(__file__)
 
 st.title("🏆 Model Comparison")
 st.markdown("### Hangi Model Neden Daha İyi?")
@@ -22,12 +29,15 @@ st.info("""
 # Metrics Summary
 st.subheader("📊 Model Performance Metrics")
 
-metrics_df = pd.DataFrame({
-    'Model': ['XGBoost', 'LightGBM', 'Prophet', 'LSTM'],
-    'RMSE': [32.45, 31.62, 89.23, 45.67],
-    'MAE': [27.12, 26.82, 72.45, 38.91],
-    'R2': [0.845, 0.853, -0.172, 0.693]
-})
+evaluation = load_evaluation()
+if evaluation is None:
+    st.warning("Henüz model değerlendirmesi yok: `python -m dashboard.evaluation` çalıştırın.")
+    end_page()
+    st.stop()
+
+metrics_df = metrics_table(evaluation)
+champion = metrics_df.iloc[0]
+config = evaluation['config']
 
 col1, col2 = st.columns([3, 2])
 
@@ -44,17 +54,22 @@ with col1:
     )
 
 with col2:
-    st.success("""
+    st.success(f"""
     ### 🏆 Şampiyon Model
     
-    **LightGBM**
+    **{champion['Model']}**
     
-    - RMSE: 31.62
-    - R²: 0.853
+    - RMSE: {champion['RMSE']:.2f}
+    - R²: {champion['R2']:.3f}
     
     *Seçim kriteri: En düşük RMSE*
     """)
 
+window = (f"kayan pencere, {config['window']} gün" if config.get('window') else "genişleyen pencere")
+st.caption(f"Rolling-origin ({window}) CV: {config['folds']} fold × {config['horizon']} gün, "
+           f"adım {config.get('step', config['horizon'])} gün, bir adım ileri tahmin. "
+           f"Veri sürümü {evaluation['data_version']}, {evaluation['created_at']}.")
+
 # Comparison Charts
 col1, col2 = st.columns(2)
 
@@ -62,162 +77,168 @@ with col1:
     fig_rmse = px.bar(metrics_df, x='Model', y='RMSE',
                       title='RMSE Karşılaştırması (Düşük = İyi)',
                       color='RMSE', color_continuous_scale='Reds_r')
-    st.plotly_chart(fig_rmse, use_container_width=True)
+    chart(fig_rmse, use_container_width=True)
 
 with col2:
     fig_r2 = px.bar(metrics_df, x='Model', y='R2',
                     title='R² Karşılaştırması (Yüksek = İyi)',
                     color='R2', color_continuous_scale='Greens')
-    st.plotly_chart(fig_r2, use_container_width=True)
+    chart(fig_r2, use_container_width=True)
+
+# Per-fold stability
+folds_df = pd.DataFrame(evaluation['folds'])
+folds_df = folds_df[folds_df['completed']]
+fig_folds = px.line(folds_df, x='test_start', y='rmse', color='model', markers=True,
+                    title="Fold Bazında RMSE (zaman içinde kararlılık)",
+                    labels={'test_start': 'Test Başlangıcı', 'rmse': 'RMSE', 'model': 'Model'})
+chart(fig_folds, use_container_width=True)
 
 st.markdown("---")
 
-# Model Details in Tabs
-tab1, tab2, tab3, tab4 = st.tabs(["🌳 XGBoost", "🌲 LightGBM", "📈 Prophet", "🧠 LSTM"])
+# Hyperparameter search
+st.subheader("🔧 Hiperparametre Araması")
+
+tuned = [name for name in SEARCH_SPACES if find_history(dataset_version(), name)]
+if not tuned:
+    st.info("Henüz arama geçmişi yok: `python -m dashboard.tuning --model \"Gradient Boosting\"` "
+            "çalıştırın (kesilirse kaldığı yerden devam eder).")
+else:
+    for tab, name in zip(lazy_tabs(tuned, key="page6_search"), tuned):
+        if not tab.open:
+            continue
+        search = load_tuning(name)
+        with tab:
+            counts = search['counts']
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Deneme", len(search['trials']))
+            col2.metric("Tamamlanan / Budanan",
+                        f"{counts.get('complete', 0)} / {counts.get('pruned', 0)}")
+            col3.metric("CPU süresi", f"{search['cpu_seconds']:.0f} s")
+            if search['best']:
+                delta = (None if search['default_score'] is None
+                         else f"{search['best']['score'] - search['default_score']:+.2f}")
+                col4.metric("En iyi RMSE", f"{search['best']['score']:.2f}", delta=delta,
+                            delta_color="inverse")
+            st.progress(search['fold_fraction'],
+                        text=f"Çalıştırılan fold'lar (budanan denemeler erken durur), "
+                             f"{counts.get('running', 0)} deneme yarım kaldı")
+
+            trials = search['trials']
+            scored = trials.dropna(subset=['score'])
+            col1, col2 = st.columns([3, 2])
+            with col1:
+                fig_trials = px.scatter(scored, x='trial', y='score', color='state',
+                                        hover_data=list(search['space']),
+                                        title="Deneme Skorları (ortalama fold RMSE)",
+                                        labels={'trial': 'Deneme', 'score': 'RMSE', 'state': 'Durum'},
+                                        color_discrete_map={'complete': '#2e7d32', 'pruned': '#bdbdbd',
+                                                            'running': '#f9a825'})
+                complete = scored[scored['state'] == 'complete'].sort_values('trial')
+                fig_trials.add_trace(go.Scatter(x=complete['trial'], y=complete['score'].cummin(),
+                                                mode='lines', line_shape='hv', name='en iyi',
+                                                line=dict(color='#2e7d32')))
+                chart(fig_trials, use_container_width=True)
+            with col2:
+                if search['best']:
+                    best = search['best']
+                    rows = "\n".join(
+                        f"- **{key}:** {value:.4g} (varsayılan {search['defaults'].get(key)})"
+                        if isinstance(value, float) else
+                        f"- **{key}:** {value} (varsayılan {search['defaults'].get(key)})"
+                        for key, value in best['params'].items())
+                    st.markdown(f"### En İyi Konfigürasyon\n*Deneme {best['trial']}*\n\n{rows}")
+                else:
+                    st.warning("Henüz tüm fold'ları tamamlanan deneme yok.")
+            st.caption(f"{search['folds']} rolling-origin fold (değerlendirme test aralığından önce), "
+                       f"median pruning; arama {search['created_at']} başladı.")
 
-with tab1:
-    st.subheader("🌳 XGBoost Results")
-    st.markdown("*Gradient Boosting - Tree-based Model*")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        ### Model Parametreleri
-        - **n_estimators:** 100
-        - **max_depth:** 6
-        - **learning_rate:** 0.1
-        - **subsample:** 0.8
-        """)
-    with col2:
-        st.markdown("""
-        ### Performans
-        - **RMSE:** 32.45
-        - **MAE:** 27.12
-        - **R²:** 0.845
-        """)
-    
-    st.markdown("""
-    <div style='background-color: #e3f2fd; padding: 15px; border-radius: 8px;'>
+st.markdown("---")
+
+# Model Details in Tabs
+MODEL_NOTES = {
+    'Gradient Boosting': ('🌳', '#e3f2fd', """
     <b>✅ Güçlü Yönleri:</b>
     <ul>
-    <li>Feature importance hesaplama</li>
-    <li>Regularization ile overfitting kontrolü</li>
-    <li>Eksik değerlerle baş edebilme</li>
+    <li>Tüm lag / rolling / ewma feature'larını kullanır</li>
+    <li>Non-linear etkileşimleri yakalar</li>
+    <li>Eksik değerlerle (erken lag'ler) doğal olarak baş eder</li>
     </ul>
-    </div>
-    """, unsafe_allow_html=True)
-
-with tab2:
-    st.subheader("🌲 LightGBM Results")
-    st.markdown("*Light Gradient Boosting Machine*")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        ### Model Parametreleri
-        - **n_estimators:** 100
-        - **num_leaves:** 31
-        - **learning_rate:** 0.1
-        - **feature_fraction:** 0.8
-        """)
-    with col2:
-        st.markdown("""
-        ### Performans
-        - **RMSE:** 31.62 ⭐
-        - **MAE:** 26.82 ⭐
-        - **R²:** 0.853 ⭐
-        """)
-    
-    st.markdown("""
-    <div style='background-color: #e8f5e9; padding: 15px; border-radius: 8px;'>
+    """),
+    'Ridge (Linear)': ('📏', '#e8f5e9', """
     <b>✅ Güçlü Yönleri:</b>
     <ul>
-    <li>Daha hızlı eğitim</li>
-    <li>Leaf-wise growth stratejisi</li>
-    <li>Büyük veri setlerinde etkili</li>
+    <li>Hızlı ve yorumlanabilir doğrusal baseline</li>
+    <li>Regularization ile çoklu doğrusallığa dayanıklı</li>
+    <li>Trendi ağaçlardan daha iyi ekstrapole eder</li>
     </ul>
-    </div>
-    """, unsafe_allow_html=True)
-
-with tab3:
-    st.subheader("📈 Prophet Results")
-    st.markdown("*Facebook's Time Series Model*")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        ### Model Özellikleri
-        - Additive model
-        - Trend + Seasonality
-        - Holiday effects
-        """)
-    with col2:
-        st.markdown("""
-        ### Performans
-        - **RMSE:** 89.23 ⚠️
-        - **MAE:** 72.45 ⚠️
-        - **R²:** -0.172 ⚠️
-        """)
-    
-    st.markdown("""
-    <div style='background-color: #fff3e0; padding: 15px; border-radius: 8px;'>
+    """),
+    'Seasonal Naive': ('🔁', '#fff3e0', """
     <b>✅ Güçlü Yönleri:</b>
     <ul>
-    <li>Mevsimsellik ayrıştırması</li>
-    <li>Tatil etkileri modelleme</li>
-    <li>Yorumlanabilirlik</li>
+    <li>Parametresiz referans: diğer modeller bunu geçmeli</li>
+    <li>Haftalık paterni otomatik taşır</li>
     </ul>
     <b>⚠️ Zayıf Yönleri:</b>
     <ul>
-    <li>Sadece zaman bazlı feature kullanır</li>
-    <li>Karmaşık pattern'larda yetersiz</li>
+    <li>Gürültüyü de bir hafta sonrasına kopyalar</li>
     </ul>
-    </div>
-    """, unsafe_allow_html=True)
-
-with tab4:
-    st.subheader("🧠 LSTM Results")
-    st.markdown("*Long Short-Term Memory - Deep Learning*")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        ### Model Yapısı
-        - 2 LSTM layer
-        - 50 units each
-        - Dropout: 0.2
-        """)
-    with col2:
-        st.markdown("""
-        ### Performans
-        - **RMSE:** 45.67
-        - **MAE:** 38.91
-        - **R²:** 0.693
-        """)
-    
-    st.markdown("""
-    <div style='background-color: #f3e5f5; padding: 15px; border-radius: 8px;'>
+    """),
+    'Additive Seasonality': ('📈', '#f3e5f5', """
     <b>✅ Güçlü Yönleri:</b>
     <ul>
-    <li>Uzun vadeli bağımlılıkları öğrenme</li>
-    <li>Karmaşık non-linear pattern'lar</li>
+    <li>Trend + haftalık + yıllık bileşenlere ayrıştırma</li>
+    <li>Tatil, Black Friday, maaş günü ve kampanya etkileri (Brezilya takvimi)</li>
+    <li>Yorumlanabilirlik</li>
     </ul>
     <b>⚠️ Zayıf Yönleri:</b>
     <ul>
-    <li>Daha fazla veri gerektirir</li>
-    <li>Yorumlanması zor</li>
-    <li>Daha uzun eğitim süresi</li>
+    <li>Sadece tarih bilgisini kullanır, engineered feature'ları kullanamaz</li>
+    <li>Ani seviye değişimlerinde yetersiz</li>
     </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    """),
+}
+
+names = list(evaluation['models'])
+tabs = lazy_tabs([f"{MODEL_NOTES.get(name, ('🔹',))[0]} {name}" for name in names], key="page6_model")
+summary = {row['model']: row for row in evaluation['summary']}
+
+for tab, name in zip(tabs, names):
+    if not tab.open:
+        continue
+    info = evaluation['models'][name]
+    row = summary[name]
+    icon, color, notes = MODEL_NOTES.get(name, ('🔹', '#f5f5f5', ''))
+    star = ' ⭐' if name == champion['Model'] else ''
+    with tab:
+        st.subheader(f"{icon} {name} Results")
+        st.markdown(f"*{info['description']}*")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            params = "\n".join(f"- **{key}:** {value}" for key, value in info['params'].items())
+            st.markdown("### Model Parametreleri\n" + params)
+        with col2:
+            st.markdown(f"""
+            ### Performans
+            - **RMSE:** {row['rmse']:.2f}{star}
+            - **MAE:** {row['mae']:.2f}{star}
+            - **R²:** {row['r2']:.3f}{star}
+            - **Tamamlanan fold:** {row['folds_completed']} / {config['folds']}
+            """)
+
+        if notes:
+            st.markdown(f"<div style='background-color: {color}; padding: 15px; border-radius: 8px;'>"
+                        f"{notes}</div>", unsafe_allow_html=True)
 
 # Key Takeaways
 st.markdown("---")
 st.success("""
 ### 💡 Bu Sayfanın Anahtar Çıkarımları
 
-- **Tree-based modeller üstün** - feature'ları daha iyi kullandı
-- **LightGBM en iyi RMSE** - şampiyon model
-- **Prophet mevsimsellikte güçlü** - ama bu veri için yetersiz
-- **LSTM daha fazla veriye ihtiyaç duyar** - küçük dataset'te düşük performans
+- **Feature kullanan modeller üstün** - lag / rolling feature'lar baseline'ları geçiyor
+- **Şampiyon en düşük RMSE ile seçiliyor** - rolling-origin CV ile, sızıntısız
+- **Seasonal naive referans çizgisi** - her model bunu geçmeli
+- **Sadece tarih kullanan additive model** - trend kırılımlarında yetersiz
 """)
+
+end_page()
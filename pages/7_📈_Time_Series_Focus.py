@@ -8,24 +8,41 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from dashboard.artifacts import load_evaluation, metrics_table
+from dashboard.forecast import load_forecast
+from dashboard.profiling import chart, end_page, start_page
+
 st.set_page_config(page_title="Time Series Focus", page_icon="📈", layout="wide")
+start_page(__file__)
 
 st.title("📈 Time Series Models Focus")
-st.markdown("### Prophet vs LSTM - Klasik vs Deep Learning")
+st.markdown("### Klasik Zaman Serisi vs Feature Tabanlı Modeller")
 st.markdown("---")
 
 # Ana soru
 st.info("""
-**🎯 Ana Soru:** Klasik zaman serisi modeli mi, deep learning mi?
+**🎯 Ana Soru:** Klasik zaman serisi modeli mi, feature tabanlı makine öğrenmesi mi?
 """)
 
+evaluation = load_evaluation()
+if evaluation is None:
+    st.warning("Henüz model değerlendirmesi yok: `python -m dashboard.evaluation` çalıştırın.")
+    end_page()
+    st.stop()
+
+metrics = metrics_table(evaluation).set_index('Model')
+CLASSICAL = ['Seasonal Naive', 'Additive Seasonality']
+FEATURE_BASED = [m for m in metrics.index if m not in CLASSICAL]
+
 # Comparison
-st.subheader("🔄 Prophet vs LSTM Karşılaştırması")
+st.subheader("🔄 Klasik vs Feature Tabanlı Karşılaştırma")
 
 comparison_df = pd.DataFrame({
-    'Metrik': ['RMSE', 'MAE', 'R²', 'Eğitim Süresi', 'Yorumlanabilirlik'],
-    'Prophet': [89.23, 72.45, -0.17, 'Hızlı', 'Yüksek'],
-    'LSTM': [45.67, 38.91, 0.69, 'Yavaş', 'Düşük']
+    'Model': list(metrics.index),
+    'Aile': ['Klasik' if m in CLASSICAL else 'Feature tabanlı' for m in metrics.index],
+    'RMSE': metrics['RMSE'].round(2).to_numpy(),
+    'MAE': metrics['MAE'].round(2).to_numpy(),
+    'R²': metrics['R2'].round(3).to_numpy(),
 })
 
 st.dataframe(comparison_df, use_container_width=True)
@@ -36,37 +53,33 @@ st.markdown("---")
 col1, col2 = st.columns(2)
 
 with col1:
-    st.subheader("📅 Prophet")
-    st.markdown("*Facebook's Additive Time Series Model*")
+    st.subheader("📅 Klasik Modeller")
+    st.markdown("*Seasonal Naive ve Additive Seasonality (Prophet tarzı)*")
     
     st.markdown("""
     ### ✅ Avantajları
     - **Mevsimsellik ayrıştırması** - haftalık, yıllık
     - **Yorumlanabilir** - her bileşen açık
-    - **Tatil etkileri** - özel günler modellenebilir
-    - **Eksik veri toleransı** - robust
+    - **Az veriyle çalışır** - sadece tarih ve hedef
     
     ### ⚠️ Dezavantajları
     - **Sadece zaman bazlı** - dış feature alamaz
-    - **Basit pattern'lar** - karmaşık ilişkilerde zayıf
-    - **Bu veri için yetersiz** - R² < 0
+    - **Seviye kırılımları** - trend değişimlerine geç tepki
     """)
 
 with col2:
-    st.subheader("🧠 LSTM")
-    st.markdown("*Long Short-Term Memory Neural Network*")
+    st.subheader("🌳 Feature Tabanlı Modeller")
+    st.markdown("*Gradient Boosting ve Ridge*")
     
     st.markdown("""
     ### ✅ Avantajları
-    - **Uzun vadeli bağımlılık** - sequence learning
-    - **Non-linear pattern'lar** - karmaşık ilişkiler
-    - **Otomatik feature extraction** - ham veriden öğrenme
+    - **Lag / rolling / ewma feature'ları** - yakın geçmişi kullanır
+    - **Non-linear pattern'lar** - (Gradient Boosting)
+    - **Hızlı adaptasyon** - dünkü talep bugünkü tahmine girer
     
     ### ⚠️ Dezavantajları
-    - **Çok veri gerektirir** - ~600 satır yetersiz
-    - **Yorumlanması zor** - black box
-    - **Overfitting riski** - regularization kritik
-    - **Uzun eğitim süresi**
+    - **Feature engineering gerektirir**
+    - **Ağaçlar ekstrapole edemez** - eğitim aralığı dışındaki seviyeler
     """)
 
 st.markdown("---")
@@ -74,32 +87,60 @@ st.markdown("---")
 # Performance Comparison Chart
 st.subheader("📊 Performans Karşılaştırması")
 
-models = ['Prophet', 'LSTM', 'XGBoost', 'LightGBM']
-rmse_values = [89.23, 45.67, 32.45, 31.62]
-r2_values = [-0.17, 0.69, 0.85, 0.85]
-
 fig = go.Figure()
-fig.add_trace(go.Bar(name='RMSE', x=models, y=rmse_values, marker_color='indianred'))
+fig.add_trace(go.Bar(name='RMSE', x=list(metrics.index), y=metrics['RMSE'],
+                     marker_color=['indianred' if m in CLASSICAL else 'seagreen' for m in metrics.index]))
 fig.update_layout(title='RMSE Karşılaştırması', xaxis_title='Model', yaxis_title='RMSE')
-st.plotly_chart(fig, use_container_width=True)
+chart(fig, use_container_width=True)
+
+# Out-of-sample predictions
+st.subheader("🔍 Test Dönemlerinde Tahmin vs Gerçek")
+predictions = pd.DataFrame(evaluation['predictions'])
+fig_pred = go.Figure()
+fig_pred.add_trace(go.Scatter(x=predictions['order_date'], y=predictions['daily_orders'],
+                              mode='lines', name='Gerçek', line=dict(color='black', width=2)))
+for model in metrics.index:
+    fig_pred.add_trace(go.Scatter(x=predictions['order_date'], y=predictions[model], mode='lines',
+                                  name=model, line=dict(dash='dot' if model in CLASSICAL else 'solid')))
+fig_pred.update_layout(xaxis_title='Tarih', yaxis_title='Sipariş', hovermode='x unified')
+chart(fig_pred, use_container_width=True)
+
+# Forward-looking forecast from the warm forecast service
+st.subheader("🔮 Gelecek Günler Tahmini")
+horizon = st.slider("Tahmin ufku (gün)", min_value=7, max_value=90, value=30, step=1)
+forecast = load_forecast(horizon)
+history = predictions.tail(90)
+fig_fc = go.Figure()
+fig_fc.add_trace(go.Scatter(x=history['order_date'], y=history['daily_orders'],
+                            mode='lines', name='Gerçek', line=dict(color='black', width=2)))
+fig_fc.add_trace(go.Scatter(x=forecast['order_date'], y=forecast['forecast'], mode='lines+markers',
+                            name='Tahmin', line=dict(color='seagreen', dash='dash')))
+fig_fc.update_layout(xaxis_title='Tarih', yaxis_title='Sipariş', hovermode='x unified')
+chart(fig_fc, use_container_width=True)
+st.caption(f"Şampiyon model ile özyinelemeli (recursive) {horizon} günlük tahmin: her tahmin edilen gün "
+           "lag / rolling / EWMA feature'larını güncelleyip bir sonraki günün girdisi oluyor.")
+
+best_classical = metrics.loc[CLASSICAL, 'RMSE'].idxmin()
+best_feature = metrics.loc[FEATURE_BASED, 'RMSE'].idxmin()
+gain = 1 - metrics.loc[best_feature, 'RMSE'] / metrics.loc[best_classical, 'RMSE']
 
 # Key Insight
-st.warning("""
-### 💡 Neden Tree-Based Modeller Daha İyi Performans Gösterdi?
+st.warning(f"""
+### 💡 Neden Feature Tabanlı Modeller Daha İyi Performans Gösterdi?
+
+**{best_feature}**, en iyi klasik model **{best_classical}**'a göre RMSE'yi **%{gain * 100:.0f}** düşürüyor.
 
-**1. Veri Boyutu**
-- ~600 günlük veri LSTM için yetersiz
-- Tree-based modeller küçük veriyle de çalışır
+**1. Yakın Geçmiş Bilgisi**
+- Lag ve rolling mean feature'ları dünkü seviyeyi taşıyor
+- Klasik modeller yalnızca tarihten tahmin yapıyor
 
-**2. Feature Engineering**
-- Oluşturduğumuz feature'lar (lag, rolling mean) çok değerli
-- Prophet bunları kullanamıyor
-- Tree-based modeller hepsini kullanıyor
+**2. Veri Boyutu**
+- ~600 günlük veri yıllık mevsimselliği tahmin etmek için kısa
+- Feature tabanlı modeller yakın geçmişe dayanarak bu eksikliği telafi ediyor
 
 **3. Veri Yapısı**
-- Basit mevsimsellik yok, karmaşık pattern'lar var
-- Prophet basit mevsimsellik varsayıyor
-- Tree-based modeller ile daha iyi yakalanıyor
+- Talepte seviye kırılımları ve kampanya zıplamaları var
+- Sabit trend + mevsimsellik varsayımı bunları kaçırıyor
 """)
 
 # Key Takeaways
@@ -107,8 +148,10 @@ st.markdown("---")
 st.success("""
 ### 💡 Bu Sayfanın Anahtar Çıkarımları
 
-- **LSTM karmaşık pattern'ları yakaladı** - ama veri yetersiz
-- **Prophet mevsimsellikte güçlü** - ama feature kullanamıyor
-- **Bu veri için tree-based optimal** - feature engineering + tree = başarı
-- **Daha fazla veri olsaydı** - LSTM muhtemelen daha iyi olurdu
+- **Seasonal naive referans** - her model bu çizgiyi geçmeli
+- **Additive model yorumlanabilir** - ama feature kullanamıyor
+- **Bu veri için feature tabanlı optimal** - feature engineering + model = başarı
+- **Daha uzun geçmiş olsaydı** - yıllık mevsimsellik daha iyi öğrenilirdi
 """)
+
+end_page()
@@ -7,7 +7,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from dashboard.artifacts import load_evaluation, metrics_table
+from dashboard.explain import feature_description, load_explanation
+from dashboard.profiling import chart, end_page, start_page
+
 st.set_page_config(page_title="Final Insights", page_icon="🌟", layout="wide")
+start_page(__file__)
 
 st.title("🌟 Final Insights")
 st.markdown("### Sunum Kapanışı - Bu Çalışmadan Ne Öğrendik?")
@@ -24,76 +29,76 @@ Data Cleaning → EDA → Feature Engineering → Feature Selection → Modeling
 # Model Result
 st.subheader("🏆 1. En İyi Model")
 
-col1, col2 = st.columns([1, 2])
-
-with col1:
-    st.success("""
-    ### 🥇 LightGBM
-    
-    | Metrik | Değer |
-    |--------|-------|
-    | **RMSE** | 31.62 |
-    | **MAE** | 26.82 |
-    | **R²** | 0.853 |
-    
-    *85%+ varyansı açıklama*
-    """)
-
-with col2:
-    metrics_df = pd.DataFrame({
-        'Model': ['XGBoost', 'LightGBM', 'Prophet', 'LSTM'],
-        'RMSE': [32.45, 31.62, 89.23, 45.67],
-        'R2': [0.845, 0.853, -0.172, 0.693]
-    })
-    
-    fig = px.bar(metrics_df, x='Model', y='RMSE', color='RMSE',
-                 title='Model RMSE Karşılaştırması',
-                 color_continuous_scale='RdYlGn_r')
-    st.plotly_chart(fig, use_container_width=True)
+evaluation = load_evaluation()
+if evaluation is None:
+    st.warning("Henüz model değerlendirmesi yok: `python -m dashboard.evaluation` çalıştırın.")
+else:
+    metrics_df = metrics_table(evaluation)
+    champion = metrics_df.iloc[0]
+
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        st.success(f"""
+        ### 🥇 {champion['Model']}
+        
+        | Metrik | Değer |
+        |--------|-------|
+        | **RMSE** | {champion['RMSE']:.2f} |
+        | **MAE** | {champion['MAE']:.2f} |
+        | **R²** | {champion['R2']:.3f} |
+        
+        *{max(champion['R2'], 0) * 100:.0f}% varyansı açıklama (örneklem dışı)*
+        """)
+
+    with col2:
+        fig = px.bar(metrics_df, x='Model', y='RMSE', color='RMSE',
+                     title='Model RMSE Karşılaştırması',
+                     color_continuous_scale='RdYlGn_r')
+        chart(fig, use_container_width=True)
 
 st.markdown("---")
 
 # Top Features
 st.subheader("🎯 2. En Önemli 5 Feature")
 
-st.markdown("""
-| Sıra | Feature | Açıklama | Önem |
-|------|---------|---------|------|
-| 1 | **rolling_mean_30** | 30 günlük ortalama | ⭐⭐⭐⭐⭐ |
-| 2 | **lag_7** | 7 gün önceki talep | ⭐⭐⭐⭐ |
-| 3 | **rolling_mean_7** | 7 günlük ortalama | ⭐⭐⭐⭐ |
-| 4 | **lag_14** | 14 gün önceki talep | ⭐⭐⭐ |
-| 5 | **dayofweek** | Haftanın günü | ⭐⭐⭐ |
-""")
-
-col1, col2 = st.columns(2)
-
-with col1:
-    features = ['rolling_mean_30', 'lag_7', 'rolling_mean_7', 'lag_14', 'dayofweek']
-    importance = [0.85, 0.72, 0.68, 0.55, 0.48]
-    
-    fig = px.bar(x=importance, y=features, orientation='h',
-                 title='Feature Importance',
-                 labels={'x': 'Importance', 'y': 'Feature'},
-                 color=importance, color_continuous_scale='Viridis')
-    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    st.markdown("""
-    ### 📝 Feature Önemleri Yorumu
-    
-    **Rolling Mean Baskın:**
-    - Trend en önemli faktör
-    - Kısa ve orta vade trendi yakalar
-    
-    **Lag Feature'lar Önemli:**
-    - Geçmiş talep gelecek talebi etkiler
-    - 7 ve 14 günlük lag'ler kritik
-    
-    **Haftalık Pattern:**
-    - Haftanın günü talebi etkiliyor
-    """)
+explanation, _ = load_explanation()
+if explanation is None:
+    st.info("SHAP değerleri arka planda hesaplanıyor; birazdan sayfayı yenileyin.")
+else:
+    mean_abs = pd.Series(explanation['mean_abs_shap']).sort_values(ascending=False)
+    top5 = mean_abs.head(5)
+    stars = (5 * top5 / top5.iloc[0]).round().clip(lower=1).astype(int)
+    rows = "\n".join(f"| {rank} | **{name}** | {feature_description(name)} | {'⭐' * stars[name]} |"
+                     for rank, name in enumerate(top5.index, start=1))
+    st.markdown("| Sıra | Feature | Açıklama | Önem |\n|------|---------|---------|------|\n" + rows)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig = px.bar(x=top5.values, y=top5.index, orientation='h',
+                     title=f"Mean |SHAP| ({explanation['model']})",
+                     labels={'x': 'Mean |SHAP|', 'y': 'Feature'},
+                     color=top5.values, color_continuous_scale='Viridis')
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+        chart(fig, use_container_width=True)
+
+    with col2:
+        share = top5.iloc[0] / mean_abs.sum()
+        st.markdown(f"""
+        ### 📝 Feature Önemleri Yorumu
+        
+        **{top5.index[0]} baskın:**
+        - {feature_description(top5.index[0])}, toplam |SHAP| etkisinin **%{share * 100:.0f}**'i
+        - Yakın geçmiş talep, yarınki talebin en güçlü sinyali
+        
+        **Lag / momentum feature'ları önemli:**
+        - Geçmiş talep gelecek talebi etkiler
+        - Uzun dönem lag'ler seviye bilgisini taşır
+        
+        **Haftalık Pattern:**
+        - Haftanın günü talebi etkiliyor
+        """)
 
 st.markdown("---")
 
@@ -146,7 +151,7 @@ st.markdown("""
 | Alan | Katkı |
 |------|------|
 | **Metodoloji** | Çoklu feature selection yöntemi ile robust değerlendirme |
-| **Karşılaştırma** | Tree-based vs Time Series vs Deep Learning kapsamlı karşılaştırma |
+| **Karşılaştırma** | Feature tabanlı vs klasik zaman serisi vs naive baseline, rolling-origin CV ile |
 | **Açıklanabilirlik** | SHAP ile black-box olmayan model açıklaması |
 | **Tekrarlanabilirlik** | Tüm kod ve görseller paylaşıldı |
 """)
@@ -161,7 +166,7 @@ st.success("""
 Modelleri adil karşılaştırdık → Kazananı açıkladık."
 
 ### Ana Mesaj:
-**Rolling mean ve lag feature'ları, talep tahmininde en kritik faktörler.**
+**Yakın geçmiş talep (lag) ve momentum feature'ları, talep tahmininde en kritik faktörler.**
 
 Bu yapı:
 - ✅ Stok planlamada kullanılabilir
@@ -181,3 +186,5 @@ st.markdown("""
 <p><strong>Teşekkürler!</strong></p>
 </div>
 """, unsafe_allow_html=True)
+
+end_page()
@@ -0,0 +1,146 @@
+"""Fold generation, batched fold metrics and the process-pool engine."""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from dashboard.backtest import (
+    SharedArrays,
+    backtest_folds,
+    fold_metrics,
+    period_index,
+    row_slices,
+    run_backtest,
+    scores,
+    stop_pool,
+)
+
+
+def _mean_task(name, arrays, train, test):
+    """Predict the training mean of ``y`` (plus ``name`` as an offset)."""
+    return np.full(test.stop - test.start, arrays["y"][train].mean() + name)
+
+
+def _slow_task(name, arrays, train, test):
+    if name == "slow":
+        time.sleep(30)
+    return np.zeros(test.stop - test.start)
+
+
+def _segments():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+# ---------------------------------------------------------------------------
+# Folds
+# ---------------------------------------------------------------------------
+
+def test_expanding_folds():
+    folds = backtest_folds(100, horizon=10)
+    # Every fold with 2 * horizon training periods, the last one ending at 100.
+    np.testing.assert_array_equal(folds[:, 0], 0)
+    np.testing.assert_array_equal(folds[:, 2], np.arange(30, 101, 10))
+    np.testing.assert_array_equal(folds[:, 2] - folds[:, 1], 10)
+    assert folds[0, 1] == 20
+
+
+def test_sliding_folds_with_step():
+    folds = backtest_folds(100, horizon=7, step=5, n_folds=4, window=30)
+    np.testing.assert_array_equal(folds, [[48, 78, 85], [53, 83, 90], [58, 88, 95], [63, 93, 100]])
+
+
+def test_min_train_limits_the_folds():
+    folds = backtest_folds(100, horizon=10, step=1, min_train=85)
+    assert folds[0, 1] == 85 and len(folds) == 6
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    (dict(n_periods=25, horizon=10), "too few"),
+    (dict(n_periods=100, horizon=10, n_folds=9), "too few"),
+    (dict(n_periods=100, horizon=10, window=5, min_train=20), "shorter than min_train"),
+])
+def test_impossible_folds_raise(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        backtest_folds(**kwargs)
+
+
+def test_row_slices_of_a_long_table():
+    dates = np.repeat(np.arange(20), 3)  # three series per day, sorted by day
+    period, unique = period_index(dates)
+    assert len(unique) == 20
+    folds = backtest_folds(20, horizon=4, n_folds=2)
+    assert row_slices(period, folds) == [(slice(0, 36), slice(36, 48)), (slice(0, 48), slice(48, 60))]
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def test_fold_metrics_match_per_fold_scores():
+    rng = np.random.default_rng(0)
+    lengths = [5, 30, 1, 12]
+    actual = rng.poisson(50, sum(lengths)).astype(float)
+    predicted = actual + rng.normal(0, 5, len(actual))
+    actual[5:35] = 40.0  # a constant fold: R2 is undefined
+    got = fold_metrics(actual, predicted, lengths)
+    bounds = np.cumsum([0] + lengths)
+    for i, (a, b) in enumerate(zip(bounds[:-1], bounds[1:])):
+        expected = scores(actual[a:b], predicted[a:b])
+        for metric in ("rmse", "mae", "r2"):
+            np.testing.assert_allclose(got[metric][i], expected[metric], rtol=1e-12, equal_nan=True)
+        assert got["bias"][i] == pytest.approx(np.mean(predicted[a:b] - actual[a:b]))
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def test_run_backtest_fits_every_model_and_fold():
+    y = np.arange(60, dtype=float)
+    folds = backtest_folds(60, horizon=10)
+    results, unfinished = run_backtest(_mean_task, {"y": y}, np.arange(60), folds, [0, 100],
+                                       max_workers=2)
+    assert unfinished == 0 and len(results) == 2 * len(folds)
+    for (offset, k), (predicted, seconds) in results.items():
+        train_stop = folds[k, 1]
+        np.testing.assert_allclose(predicted, y[:train_stop].mean() + offset)
+        assert seconds >= 0
+
+
+def test_unsorted_periods_are_rejected():
+    with pytest.raises(ValueError, match="sorted"):
+        run_backtest(_mean_task, {"y": np.zeros(3)}, np.array([0, 2, 1]), backtest_folds(3, 1, min_train=1), [0])
+
+
+def test_budget_expiry_terminates_fits_and_frees_shared_memory():
+    before = _segments()
+    folds = backtest_folds(40, horizon=10)
+    started = time.perf_counter()
+    results, unfinished = run_backtest(_slow_task, {"y": np.zeros(40)}, np.arange(40), folds,
+                                       ["fast", "slow"], budget=3, max_workers=2)
+    assert time.perf_counter() - started < 10
+    assert unfinished == len(folds)
+    assert set(results) == {("fast", k) for k in range(len(folds))}
+    assert _segments() <= before
+
+
+def test_stop_pool_without_private_processes():
+    class Pool:
+        def shutdown(self, wait, cancel_futures):
+            self.stopped = (wait, cancel_futures)
+
+    pool = Pool()
+    stop_pool(pool, terminate=True)
+    assert pool.stopped == (True, True)
+
+
+def test_shared_arrays_round_trip():
+    y = np.arange(10, dtype=np.float32)
+    with SharedArrays(y=y) as shared:
+        arrays, segments = SharedArrays.attach(shared.specs)
+        np.testing.assert_array_equal(arrays["y"], y)
+        del arrays
+        for segment in segments:
+            segment.close()
@@ -0,0 +1,77 @@
+"""Schema validation of the feature table: one rejection per rule."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import (
+    DATA_PATH,
+    DATE_COLUMN,
+    SCHEMA,
+    TARGET_COLUMN,
+    SchemaError,
+    read_feature_table,
+    validate_table,
+)
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """The first weeks of the stored CSV, as text (unparsed)."""
+    return pd.read_csv(DATA_PATH, dtype=str, keep_default_na=False, nrows=40)
+
+
+def _read(raw, tmp_path, **cells):
+    """Write ``raw`` with ``cells`` ({column: (row, text)}) replaced and parse it."""
+    df = raw.copy()
+    for col, (row, text) in cells.items():
+        df.loc[row, col] = text
+    path = tmp_path / "features.csv"
+    df.to_csv(path, index=False)
+    return read_feature_table(path)
+
+
+def test_valid_table(raw, tmp_path):
+    df = _read(raw, tmp_path)
+    assert len(df) == 40
+    for col, dtype in SCHEMA.items():
+        if col != DATE_COLUMN:
+            assert df[col].dtype == np.dtype(dtype), col
+    assert validate_table(df) is df
+
+
+def test_out_of_range_ints_are_rejected_before_narrowing(raw, tmp_path):
+    # Parsed straight into int8, 300 would silently become 44.
+    with pytest.raises(SchemaError, match=r"dayofweek outside \[0, 6\] \(min 0, max 300\)"):
+        _read(raw, tmp_path, dayofweek=(3, "300"))
+
+
+def test_missing_int_is_rejected(raw, tmp_path):
+    with pytest.raises(SchemaError, match="features.csv: .*NA"):
+        _read(raw, tmp_path, **{TARGET_COLUMN: (5, "")})
+
+
+def test_time_of_day_is_rejected(raw, tmp_path):
+    with pytest.raises(SchemaError, match="features.csv: "):
+        _read(raw, tmp_path, **{DATE_COLUMN: (5, "2016-10-08 12:00:00")})
+    df = _read(raw, tmp_path)
+    df[DATE_COLUMN] = df[DATE_COLUMN] + pd.Timedelta(hours=12)
+    with pytest.raises(SchemaError, match="times of day"):
+        validate_table(df)
+
+
+def test_unsorted_dates_are_rejected(raw, tmp_path):
+    with pytest.raises(SchemaError, match=f"{DATE_COLUMN} is not sorted"):
+        _read(raw, tmp_path, **{DATE_COLUMN: (5, "2016-10-01")})
+
+
+@pytest.mark.filterwarnings("ignore:overflow encountered in cast:RuntimeWarning")
+def test_float32_overflow_is_rejected(raw, tmp_path):
+    with pytest.raises(SchemaError, match="infinite values .* in ewma_15"):
+        _read(raw, tmp_path, ewma_15=(5, "1e40"))
+
+
+def test_wrong_dtype_is_rejected(raw, tmp_path):
+    df = _read(raw, tmp_path)
+    with pytest.raises(SchemaError, match="month is int64, expected int8"):
+        validate_table(df.astype({"month": "int64"}))
@@ -0,0 +1,113 @@
+"""The built-in Brazilian calendar, the event columns and the local event table."""
+
+import pandas as pd
+import pytest
+
+from dashboard.data import EVENT_COLUMNS
+from dashboard.events import builtin_events, easter, event_columns, event_table, read_events
+
+YEARS = [2017, 2018]
+
+
+def _days(events, name):
+    return [str(d.date()) for d in events.loc[events["name"] == name, "date"].sort_values()]
+
+
+def _columns(dates, events=None):
+    return pd.DataFrame(event_columns(pd.to_datetime(dates), events), index=dates)
+
+
+@pytest.fixture(scope="module")
+def events():
+    return builtin_events(YEARS)
+
+
+def test_easter_based_holidays(events):
+    assert [str(d) for d in easter(YEARS)] == ["2017-04-16", "2018-04-01"]
+    assert _days(events, "Carnaval") == ["2017-02-27", "2017-02-28", "2018-02-12", "2018-02-13"]
+    assert _days(events, "Sexta-feira Santa") == ["2017-04-14", "2018-03-30"]
+    assert _days(events, "Corpus Christi") == ["2017-06-15", "2018-05-31"]
+    assert _days(events, "Consciência Negra") == []  # national only from 2024
+
+
+def test_retail_days(events):
+    assert _days(events, "Black Friday") == ["2017-11-24", "2018-11-23"]
+    assert _days(events, "Cyber Monday") == ["2017-11-27", "2018-11-26"]
+    assert _days(events, "Dia das Mães") == ["2017-05-14", "2018-05-13"]
+    assert len(_days(events, "Semana Black Friday")) == 2 * 8
+
+
+def test_paydays_skip_holidays(events):
+    salary = _days(events, "Salário")
+    assert len(salary) == 24
+    # 5th business day: Nov 2 (Finados), Jan 1 and May 1 push it back one day.
+    assert "2017-11-08" in salary and "2017-11-07" not in salary
+    assert "2018-01-08" in salary
+    assert "2018-05-08" in salary and "2018-05-07" not in salary
+    assert "2017-12-07" in salary  # no holiday in the first week
+    # The 13th salary is moved back to a business day (2017-12-20 is a Wednesday).
+    assert _days(events, "13º salário") == ["2017-11-30", "2017-12-20", "2018-11-30", "2018-12-20"]
+
+
+def test_event_columns():
+    dates = ["2017-11-24", "2017-12-20", "2018-01-08", "2018-01-10", "2018-02-13"]
+    got = _columns(dates)
+    assert list(got.columns) == EVENT_COLUMNS
+    assert got["is_retail_event"].tolist() == [1, 0, 0, 0, 0]
+    assert got["is_campaign"].tolist() == [1, 1, 0, 0, 0]
+    assert got["is_payday"].tolist() == [0, 1, 1, 0, 0]
+    assert got["is_holiday"].tolist() == [0, 0, 0, 0, 1]
+    # Natal, Natal, Carnaval, Carnaval, itself.
+    assert got["days_to_next_holiday"].tolist() == [31, 5, 35, 33, 0]
+    # Itself, itself, itself, the Jan 8 payday, itself.
+    assert got["days_since_last_event"].tolist() == [0, 0, 0, 2, 0]
+
+
+def test_event_columns_of_repeated_dates():
+    dates = pd.to_datetime(["2018-01-10", "2017-12-20", "2018-01-10"])
+    got = event_columns(dates)
+    assert got["days_to_next_holiday"].tolist() == [33, 5, 33]
+    assert event_columns(dates[:0])["is_holiday"].shape == (0,)
+
+
+@pytest.fixture
+def local_events(tmp_path):
+    path = tmp_path / "calendar_events.csv"
+    path.write_text("date,name,kind,end\n"
+                    "2018-07-02,Liquidação de Inverno,campaign,2018-07-08\n"
+                    "2018-04-05,Aniversário da loja,retail,\n")
+    return path
+
+
+def test_read_events_expands_ranges(local_events):
+    local = read_events(local_events)
+    assert _days(local, "Liquidação de Inverno") == [f"2018-07-0{d}" for d in range(2, 9)]
+    assert _days(local, "Aniversário da loja") == ["2018-04-05"]
+    assert set(local["kind"]) == {"campaign", "retail"}
+
+
+def test_event_table_merges_the_local_table(local_events):
+    table = event_table(YEARS, local_events)
+    assert len(table) == len(builtin_events(YEARS).drop_duplicates()) + 8
+    assert table["date"].is_monotonic_increasing
+    assert event_table(YEARS, local_events.with_name("missing.csv")).equals(
+        event_table(YEARS, None))
+
+    got = _columns(["2018-04-05", "2018-07-01", "2018-07-05", "2018-07-10"], local_events)
+    assert got["is_retail_event"].tolist() == [1, 0, 0, 0]
+    assert got["is_campaign"].tolist() == [0, 0, 1, 0]
+    assert got["days_since_last_event"].tolist() == [0, 19, 0, 2]
+    builtin = _columns(["2018-07-05"])
+    assert builtin["is_campaign"].tolist() == [0]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("date,name\n2018-01-01,x\n", "missing columns: kind"),
+    ("date,name,kind\n2018-01-01,x,sale\n", "unknown event kinds"),
+    ("date,name,kind,end\n2018-01-05,x,campaign,2018-01-01\n", "ends before it starts"),
+])
+def test_bad_local_tables_are_rejected(tmp_path, text, message):
+    path = tmp_path / "calendar_events.csv"
+    path.write_text(text)
+    with pytest.raises(ValueError, match=message):
+        read_events(path)
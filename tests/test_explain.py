@@ -0,0 +1,89 @@
+"""Exact TreeSHAP against brute-force Shapley values."""
+
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from dashboard.explain import tree_shap
+
+N_FEATURES = 4
+
+
+def _conditional(nodes, x, known, node=0):
+    """Path-dependent E[f(x) | x_known]: unknown splits follow the training cover."""
+    if nodes["is_leaf"][node]:
+        return nodes["value"][node]
+    left, right = nodes["left"][node], nodes["right"][node]
+    f = nodes["feature_idx"][node]
+    if f in known:
+        if np.isnan(x[f]):
+            go_left = bool(nodes["missing_go_to_left"][node])
+        else:
+            go_left = x[f] <= nodes["num_threshold"][node]
+        return _conditional(nodes, x, known, left if go_left else right)
+    count = nodes["count"].astype(float)
+    return (count[left] * _conditional(nodes, x, known, left)
+            + count[right] * _conditional(nodes, x, known, right)) / count[node]
+
+
+def _value(model, x, known):
+    baseline = float(np.ravel(model._baseline_prediction)[0])
+    return baseline + sum(_conditional(predictor.nodes, x, known) for (predictor,) in model._predictors)
+
+
+def brute_force_shap(model, x):
+    """Shapley values of one row by enumerating every coalition."""
+    m = len(x)
+    phi = np.zeros(m)
+    for i in range(m):
+        others = [j for j in range(m) if j != i]
+        for size in range(m):
+            weight = factorial(size) * factorial(m - size - 1) / factorial(m)
+            for subset in combinations(others, size):
+                known = set(subset)
+                phi[i] += weight * (_value(model, x, known | {i}) - _value(model, x, known))
+    return phi, _value(model, x, set())
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, N_FEATURES))
+    y = 3 * X[:, 0] - 2 * X[:, 1] * (X[:, 2] > 0) + np.sin(X[:, 3]) + rng.normal(0, 0.1, 400)
+    X[rng.random(X.shape) < 0.1] = np.nan  # trains the missing-value branches
+    model = HistGradientBoostingRegressor(max_iter=8, max_leaf_nodes=8, min_samples_leaf=5,
+                                          random_state=0).fit(X, y)
+    rows = X[:25].copy()
+    rows[0, :] = np.nan
+    rows[1, [0, 2]] = np.nan
+    return model, rows
+
+
+def test_matches_brute_force_including_missing_values(fitted):
+    model, rows = fitted
+    phi, expected = tree_shap(model, rows)
+    for row, values in zip(rows, phi):
+        exact, exact_expected = brute_force_shap(model, row)
+        np.testing.assert_allclose(values, exact, atol=1e-9)
+        assert expected == pytest.approx(exact_expected, abs=1e-9)
+
+
+def test_values_sum_to_prediction_minus_expected_value(fitted):
+    model, rows = fitted
+    phi, expected = tree_shap(model, rows)
+    np.testing.assert_allclose(phi.sum(axis=1), model.predict(rows) - expected, atol=1e-9)
+
+
+def test_repeated_feature_on_a_path():
+    # One feature split several times on the same path: its agreement is the AND of the splits.
+    rng = np.random.default_rng(1)
+    X = rng.uniform(-1, 1, size=(300, 2))
+    y = np.floor(4 * X[:, 0]) + 0.1 * X[:, 1]
+    model = HistGradientBoostingRegressor(max_iter=3, max_leaf_nodes=8, random_state=0).fit(X, y)
+    phi, expected = tree_shap(model, X[:10])
+    for row, values in zip(X[:10], phi):
+        np.testing.assert_allclose(values, brute_force_shap(model, row)[0], atol=1e-9)
+    np.testing.assert_allclose(phi.sum(axis=1), model.predict(X[:10]) - expected, atol=1e-9)
@@ -0,0 +1,37 @@
+"""Batch feature engineering against the stored feature table."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import DATA_PATH, DATE_COLUMN, FEATURE_COLUMNS, SERIES_COLUMN, TARGET_COLUMN
+from dashboard.features import build_features, compare_tables
+
+
+@pytest.fixture(scope="module")
+def stored():
+    return pd.read_csv(DATA_PATH, parse_dates=[DATE_COLUMN])
+
+
+def test_rebuild_reproduces_the_stored_table(stored):
+    raw = stored[[DATE_COLUMN, TARGET_COLUMN]].sample(frac=1, random_state=0)  # any row order
+    rebuilt = build_features(raw)
+    assert list(rebuilt.columns) == FEATURE_COLUMNS
+    np.testing.assert_array_equal(rebuilt[DATE_COLUMN], stored[DATE_COLUMN])
+    diff, matches = compare_tables(stored, rebuilt, rtol=1e-9, atol=1e-9)
+    assert matches, diff[diff > 1e-9]
+
+
+def test_series_windows_do_not_cross_series(stored):
+    raw = stored[[DATE_COLUMN, TARGET_COLUMN]]
+    rng = np.random.default_rng(0)
+    parts = {key: raw.iloc[start:].assign(**{TARGET_COLUMN: rng.poisson(20, len(raw) - start)})
+             for key, start in (("b", 0), ("a", 40), ("c", 400))}
+    long = pd.concat([part.assign(**{SERIES_COLUMN: key}) for key, part in parts.items()])
+    together = build_features(long.sample(frac=1, random_state=1), by=SERIES_COLUMN)
+    assert list(together[SERIES_COLUMN].cat.categories) == ["a", "b", "c"]
+    for key, part in parts.items():
+        alone = build_features(part)
+        got = together[together[SERIES_COLUMN] == key].drop(columns=SERIES_COLUMN).reset_index(drop=True)
+        diff, matches = compare_tables(alone, got, rtol=1e-9, atol=1e-9)
+        assert matches, (key, diff[diff > 1e-9])
@@ -0,0 +1,123 @@
+"""Micro-batching and the forecast service, with stub handlers and models."""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.forecast import MAX_HORIZON, ForecastService, MicroBatcher
+
+
+class Recorder:
+    """Handler that records its batches; optionally blocks until released."""
+
+    def __init__(self, gate=None, error=None):
+        self.batches = []
+        self.gate = gate
+        self.error = error
+        self.started = threading.Event()
+
+    def __call__(self, items):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(items)
+        if self.error is not None:
+            raise self.error
+        return [item * 10 for item in items]
+
+
+def test_concurrent_calls_share_a_batch():
+    gate = threading.Event()
+    handler = Recorder(gate)
+    batcher = MicroBatcher(handler, max_batch=64, max_wait=0.05)
+    try:
+        first = batcher.submit(0)
+        assert handler.started.wait(5)  # the first batch is running, the rest queue up
+        futures = [batcher.submit(i) for i in range(1, 9)]
+        gate.set()
+        assert first.result(5) == 0
+        assert [f.result(5) for f in futures] == [i * 10 for i in range(1, 9)]
+        assert handler.batches == [[0], list(range(1, 9))]
+        assert batcher.batches == 2
+    finally:
+        batcher.close()
+
+
+def test_max_batch_splits_the_queue():
+    gate = threading.Event()
+    handler = Recorder(gate)
+    batcher = MicroBatcher(handler, max_batch=3, max_wait=0.05)
+    try:
+        batcher.submit(-1)
+        assert handler.started.wait(5)
+        futures = [batcher.submit(i) for i in range(7)]
+        gate.set()
+        [f.result(5) for f in futures]
+        assert [len(b) for b in handler.batches] == [1, 3, 3, 1]
+    finally:
+        batcher.close()
+
+
+def test_handler_error_reaches_every_caller():
+    gate = threading.Event()
+    handler = Recorder(gate, error=KeyError("model gone"))
+    batcher = MicroBatcher(handler, max_wait=0.05)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        gate.set()
+        for future in futures:
+            with pytest.raises(KeyError, match="model gone"):
+                future.result(5)
+        # The thread survives a failing batch.
+        handler.error = None
+        assert batcher.submit(5).result(5) == 50
+    finally:
+        batcher.close()
+
+
+def test_close_answers_queued_items_then_rejects():
+    gate = threading.Event()
+    handler = Recorder(gate)
+    batcher = MicroBatcher(handler, max_batch=2, max_wait=0.01)
+    first = batcher.submit(0)
+    assert handler.started.wait(5)
+    queued = [batcher.submit(i) for i in range(1, 6)]
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    gate.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert first.result(0) == 0
+    assert [f.result(0) for f in queued] == [10, 20, 30, 40, 50]
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(6)
+    batcher.close()  # idempotent
+
+
+class StubForecaster:
+    name = "stub"
+    data_version = "v0"
+    last_date = pd.Timestamp("2018-08-31")
+    intervals = None
+
+    def predict_batch(self, horizons):
+        dates = pd.date_range("2018-09-01", periods=max(horizons))
+        frame = pd.DataFrame({"order_date": dates, "forecast": np.arange(max(horizons), dtype=float)})
+        return [frame.iloc[:h] for h in horizons]
+
+
+def test_service_validates_and_slices_horizons():
+    service = ForecastService(StubForecaster())
+    try:
+        assert len(service.forecast(30, timeout=5)) == 30
+        assert len(service.forecast("7", timeout=5)) == 7
+        for horizon in (0, -1, MAX_HORIZON + 1):
+            with pytest.raises(ValueError, match="horizon must be between"):
+                service.submit(horizon)
+        assert service.info()["model"] == "stub"
+    finally:
+        service.close()
+    with pytest.raises(RuntimeError):
+        service.forecast(1)
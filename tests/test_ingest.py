@@ -0,0 +1,44 @@
+"""Incremental ingestion against a batch rebuild of the whole history."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import DATA_PATH, DATE_COLUMN, EVENT_COLUMNS, TARGET_COLUMN
+from dashboard.features import build_features, compare_tables
+from dashboard.incremental import HISTORY
+from dashboard.ingest import ingest
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(DATA_PATH, parse_dates=[DATE_COLUMN])[[DATE_COLUMN, TARGET_COLUMN]]
+
+
+@pytest.mark.parametrize("events", [None, True])
+@pytest.mark.parametrize("n_new", [1, 45, HISTORY + 20])
+def test_ingest_equals_batch_rebuild(tmp_path, raw, n_new, events):
+    path = tmp_path / "features.csv"
+    old, new = raw.iloc[:-n_new], raw.iloc[-n_new:]
+    build_features(old, events=events).to_csv(path, index=False, date_format="%Y-%m-%d")
+    # Two appends: the second restores its state from rows the first one wrote.
+    half = (n_new + 1) // 2
+    for chunk in (new.iloc[:half], new.iloc[half:]):
+        if len(chunk):
+            ingest(chunk, path)
+
+    expected = build_features(raw, events=events)
+    stored = pd.read_csv(path, parse_dates=[DATE_COLUMN])
+    assert list(stored.columns) == list(expected.columns)
+    np.testing.assert_array_equal(stored[DATE_COLUMN], expected[DATE_COLUMN])
+    diff, matches = compare_tables(expected, stored, rtol=1e-9, atol=1e-9)
+    assert matches, diff[diff > 1e-9]
+    if events:
+        np.testing.assert_array_equal(stored[EVENT_COLUMNS], expected[EVENT_COLUMNS])
+
+
+def test_ingest_is_append_only(tmp_path, raw):
+    path = tmp_path / "features.csv"
+    build_features(raw).to_csv(path, index=False, date_format="%Y-%m-%d")
+    with pytest.raises(ValueError, match="append-only"):
+        ingest(raw.iloc[-3:], path)
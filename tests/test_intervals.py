@@ -0,0 +1,51 @@
+"""Conformal intervals: residual backtest guards and quantile offsets."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import DATE_COLUMN, TARGET_COLUMN
+from dashboard.features import build_features
+from dashboard.intervals import BAND, MIN_ORIGINS, backtest_residuals, conformal_offsets
+
+MODEL = "Ridge (Linear)"
+
+
+def _table(days):
+    dates = pd.date_range("2017-01-01", periods=days)
+    t = np.arange(days)
+    y = np.random.default_rng(0).poisson(100 + 30 * np.sin(2 * np.pi * t / 7))
+    return build_features(pd.DataFrame({DATE_COLUMN: dates, TARGET_COLUMN: y}))
+
+
+def test_backtest_residuals_and_offsets():
+    residuals, origins = backtest_residuals(_table(620), MODEL, budget=None, max_workers=1)
+    assert residuals.shape[1] == 90 and len(residuals) >= MIN_ORIGINS
+    assert len(origins) == len(residuals)
+    offsets = conformal_offsets(residuals)
+    assert (np.diff(offsets, axis=0) >= 0).all()
+
+
+def test_budget_expiry_with_no_finished_origin_is_explained():
+    with pytest.raises(ValueError, match=r"0 of \d+ backtest origins finished .*budget"):
+        backtest_residuals(_table(620), MODEL, budget=0, max_workers=1)
+
+
+def test_too_few_origins_are_rejected():
+    with pytest.raises(ValueError, match="too short"):
+        backtest_residuals(_table(500), MODEL, budget=None, max_workers=1)
+
+
+def test_empty_residuals_are_rejected():
+    with pytest.raises(ValueError, match="no residuals"):
+        conformal_offsets(np.empty((0, 30)))
+
+
+def test_min_origins_keeps_p99_below_the_largest_residual():
+    rng = np.random.default_rng(1)
+    horizons = np.arange(BAND, 90 - BAND)  # the fully pooled ones
+    for n, collapsed in ((MIN_ORIGINS - 1, True), (MIN_ORIGINS, False)):
+        residuals = rng.normal(size=(n, 90))
+        p99 = conformal_offsets(residuals, quantiles=(99,))[0]
+        largest = np.array([residuals[:, h - BAND:h + BAND + 1].max() for h in horizons])
+        assert (p99[horizons] == largest).all() == collapsed
@@ -0,0 +1,78 @@
+"""Exact selection percentiles and the error bound of the streaming digest."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import DATA_PATH, TARGET_COLUMN
+from dashboard.quantiles import RELATIVE_ERROR, TDigest, load_digest, percentiles, save_digest
+
+PS = np.array([50, 95, 99])
+
+
+def _orders():
+    real = pd.read_csv(DATA_PATH)[TARGET_COLUMN].to_numpy(dtype=float)
+    rng = np.random.default_rng(0)
+    t = np.arange(5000)
+    synthetic = rng.poisson(150 + 50 * np.sin(2 * np.pi * t / 365.25) + 20 * (t % 7 < 5))
+    return {"stored table": real, "synthetic": synthetic.astype(float)}
+
+
+ORDERS = _orders()
+
+
+def _assert_close(digest, values):
+    error = np.abs(digest.percentiles(PS) / np.percentile(values, PS) - 1)
+    assert (error <= RELATIVE_ERROR).all(), dict(zip(PS, error))
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 1000, 100_001])
+def test_percentiles_equal_numpy(n):
+    values = np.random.default_rng(n).normal(size=n)
+    values[1::11] = np.nan
+    ps = [0, 1, 12.5, 50, 75, 95, 99, 99.9, 100]
+    expected = np.percentile(values[~np.isnan(values)], ps)
+    np.testing.assert_array_equal(percentiles(values, ps), expected)
+
+
+def test_percentiles_of_nothing_are_nan():
+    assert np.isnan(percentiles([np.nan], [50, 99])).all()
+
+
+@pytest.mark.parametrize("name", ORDERS)
+def test_digest_in_one_pass(name):
+    values = ORDERS[name]
+    digest = TDigest().update(values)
+    _assert_close(digest, values)
+    assert digest.count == len(values)
+    np.testing.assert_array_equal(digest.percentiles([0, 100]), [values.min(), values.max()])
+
+
+@pytest.mark.parametrize("name", ORDERS)
+def test_digest_after_merge(name):
+    values = ORDERS[name]
+    shards = [TDigest().update(part) for part in np.array_split(values, 8)]
+    for shard in shards[1:]:
+        shards[0].merge(shard)
+    _assert_close(shards[0], values)
+
+
+@pytest.mark.parametrize("block", [1, 7, 30])
+@pytest.mark.parametrize("name", ORDERS)
+def test_digest_after_streaming_appends(name, block):
+    # As dashboard.ingest does: load the persisted digest, add the new days, save it.
+    values = ORDERS[name]
+    start = len(values) // 5
+    digest = TDigest().update(values[:start])
+    for i in range(start, len(values), block):
+        digest = TDigest.from_dict(digest.to_dict()).update(values[i:i + block])
+    _assert_close(digest, values)
+    assert len(digest.means) <= digest.compression
+
+
+def test_persisted_digest_is_versioned(tmp_path):
+    path = tmp_path / "features.csv"
+    digest = TDigest().update(ORDERS["synthetic"])
+    save_digest(digest, path, "v1")
+    np.testing.assert_array_equal(load_digest(path, "v1").percentiles(PS), digest.percentiles(PS))
+    assert load_digest(path, "v2") is None
@@ -0,0 +1,163 @@
+"""RollupCube and Timeline windows against pandas groupby on the same rows."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.cube import LEVELS, RollupCube, combine
+from dashboard.data import DATE_COLUMN, SERIES_COLUMN, TARGET_COLUMN
+from dashboard.timeline import Timeline, period_starts
+
+
+def _daily(start="2017-01-01", days=500, seed=0):
+    dates = pd.date_range(start, periods=days)
+    y = np.random.default_rng(seed).poisson(50, days)
+    return pd.DataFrame({DATE_COLUMN: dates, TARGET_COLUMN: y,
+                         "dayofweek": dates.dayofweek, "month": dates.month})
+
+
+def _long(series=3, days=400):
+    parts = [_daily(days=days, seed=s).assign(**{SERIES_COLUMN: f"s{s}"}) for s in range(series)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def _expected(rows, grain, by=("period",)):
+    frame = rows.assign(period=period_starts(rows[DATE_COLUMN].to_numpy(), grain))
+    grouped = frame.groupby(list(by), observed=True)[TARGET_COLUMN]
+    return grouped.agg(["count", "sum", "mean", "std"]).reset_index()
+
+
+# ---------------------------------------------------------------------------
+# RollupCube
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("split_at", ["2017-03-15", "2017-03-19", "2017-12-31"])
+def test_incremental_update_equals_full_build(split_at):
+    # Appends that cut through a week, a month and a year: the Chan M2 merge
+    # of the overlapping periods must equal a full recompute.
+    df = _long()
+    cut = df[DATE_COLUMN] <= split_at
+    full = RollupCube.from_frame(df)
+    grown = RollupCube.from_frame(df[cut])
+    for _, chunk in df[~cut].groupby(df.loc[~cut, DATE_COLUMN].dt.to_period("M")):
+        grown.update(chunk)
+    assert grown.series == full.series
+    for level in LEVELS:
+        a, b = full.levels[level], grown.levels[level]
+        assert a.keys() == b.keys()
+        for key in a:
+            np.testing.assert_allclose(np.asarray(a[key], dtype=float), np.asarray(b[key], dtype=float),
+                                       rtol=1e-9, err_msg=f"{level} {key}")
+
+
+@pytest.mark.parametrize("grain", ["day", "week", "month", "year"])
+def test_cells_match_groupby(grain):
+    df = _long()
+    cube = RollupCube.from_frame(df)
+    got = cube.frame(grain, by=("series", "period"))
+    expected = _expected(df, grain, by=(SERIES_COLUMN, "period"))
+    np.testing.assert_array_equal(got["count"], expected["count"])
+    np.testing.assert_allclose(got["sum"], expected["sum"])
+    np.testing.assert_allclose(got["mean"], expected["mean"])
+    np.testing.assert_allclose(got["std"], expected["std"], rtol=1e-9)
+
+
+@pytest.mark.parametrize("start,end", [("2017-02-08", "2017-06-20"), ("2017-03-01", "2017-03-31"),
+                                       ("2017-05-10", "2017-05-12"), ("2017-01-01", None)])
+@pytest.mark.parametrize("grain", ["week", "month", "year"])
+def test_windowed_cells_rebuild_edge_periods(grain, start, end):
+    df = _long()
+    cube = RollupCube.from_frame(df)
+    rows = df[df[DATE_COLUMN].between(start, end or df[DATE_COLUMN].max())]
+    got = cube.frame(grain, series="s1", start=start, end=end)
+    expected = _expected(rows[rows[SERIES_COLUMN] == "s1"], grain)
+    np.testing.assert_array_equal(got["period"], expected["period"])
+    np.testing.assert_array_equal(got["count"], expected["count"])
+    np.testing.assert_allclose(got["sum"], expected["sum"])
+    np.testing.assert_allclose(got["std"], expected["std"], rtol=1e-9)
+
+
+def test_weekday_split_and_combine():
+    df = _long()
+    cube = RollupCube.from_frame(df)
+    got = cube.frame("month", split="dayofweek", by=("period", "dayofweek"),
+                     start="2017-02-10", end="2017-09-03")
+    rows = df[df[DATE_COLUMN].between("2017-02-10", "2017-09-03")]
+    expected = _expected(rows, "month", by=("period", "dayofweek"))
+    np.testing.assert_array_equal(got["count"], expected["count"])
+    np.testing.assert_allclose(got["mean"], expected["mean"])
+    np.testing.assert_allclose(got["std"], expected["std"], rtol=1e-9)
+    # Merging the month cells again gives the whole-window statistics.
+    total = combine(got.assign(all=0), ["all"])
+    assert total["count"].item() == len(rows)
+    assert total["std"].item() == pytest.approx(rows[TARGET_COLUMN].std())
+
+
+def test_empty_window():
+    cube = RollupCube.from_frame(_long())
+    assert cube.frame("month", start="2030-01-01", end="2030-02-01").empty
+
+
+# ---------------------------------------------------------------------------
+# Timeline
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def daily():
+    return _daily()
+
+
+@pytest.fixture(scope="module")
+def timeline(daily):
+    return Timeline.from_frame(daily)
+
+
+WINDOWS = [(None, None), ("2017-02-08", "2017-06-20"), ("2017-03-01", "2017-03-31"),
+           ("2017-05-10", "2017-05-10"), ("2016-06-01", "2017-01-03"), ("2018-05-01", "2019-01-01")]
+
+
+@pytest.mark.parametrize("start,end", WINDOWS)
+def test_rows_and_summary(daily, timeline, start, end):
+    rows = timeline.rows(start, end)
+    dates = daily[DATE_COLUMN]
+    mask = dates.between(start or dates.min(), end or dates.max())
+    np.testing.assert_array_equal(np.flatnonzero(mask), np.arange(len(daily))[rows])
+    summary = timeline.summary(rows)
+    y = daily.loc[mask, TARGET_COLUMN]
+    assert summary["days"] == len(y)
+    assert summary["sum"] == pytest.approx(y.sum())
+    assert summary["std"] == pytest.approx(y.std(), rel=1e-9, nan_ok=True)
+
+
+@pytest.mark.parametrize("start,end", WINDOWS)
+@pytest.mark.parametrize("grain", ["day", "week", "month"])
+def test_rollup_matches_groupby(daily, timeline, grain, start, end):
+    rows = timeline.rows(start, end)
+    got = timeline.rollup(grain, rows)
+    expected = _expected(daily.iloc[rows], grain)
+    np.testing.assert_array_equal(got[DATE_COLUMN], expected["period"])
+    np.testing.assert_array_equal(got["days"], expected["count"])
+    np.testing.assert_allclose(got[TARGET_COLUMN], expected["sum"])
+    np.testing.assert_allclose(got["mean"], expected["mean"])
+    np.testing.assert_allclose(got["std"], expected["std"], rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("start,end", WINDOWS)
+@pytest.mark.parametrize("name", ["dayofweek", "month"])
+def test_by_category_matches_groupby(daily, timeline, name, start, end):
+    rows = timeline.rows(start, end)
+    got = timeline.by_category(name, rows)
+    expected = daily.iloc[rows].groupby(name)[TARGET_COLUMN].agg(["count", "sum", "mean", "std"])
+    np.testing.assert_array_equal(got[name], expected.index)
+    np.testing.assert_array_equal(got["count"], expected["count"])
+    np.testing.assert_allclose(got["mean"], expected["mean"])
+    np.testing.assert_allclose(got["std"], expected["std"], rtol=1e-9)
+
+
+def test_empty_window_is_empty(timeline):
+    rows = timeline.rows("2019-01-01", "2019-02-01")
+    assert timeline.summary(rows)["days"] == 0
+    assert timeline.rollup("month", rows).empty
+    assert timeline.by_category("dayofweek", rows).empty
+    assert timeline.count_at_least(0, rows) == 0
+    assert (timeline.count_at_least(0, rows, by="dayofweek") == 0).all()
@@ -0,0 +1,80 @@
+"""Resumable, median-pruned hyperparameter search."""
+
+from collections import Counter
+
+import pytest
+
+from dashboard import tuning
+from dashboard.data import DATA_PATH, dataset_version, read_feature_table
+from dashboard.tuning import MedianPruner, Search, history_path, read_history
+
+MODEL = "Ridge (Linear)"
+
+
+@pytest.fixture(scope="module")
+def table():
+    return read_feature_table(DATA_PATH)
+
+
+def _history(path):
+    """Events of ``path`` with the number of times each trial / (trial, fold) was logged."""
+    events = read_history(path)
+    trials = Counter(e["trial"] for e in events if e["type"] == "trial")
+    folds = Counter((e["trial"], e["fold"]) for e in events if e["type"] == "fold")
+    return events, trials, folds
+
+
+def test_default_history_path(table, tmp_path, monkeypatch):
+    monkeypatch.setattr(tuning, "history_path", lambda version, name: history_path(version, name, tmp_path))
+    search = Search(table, MODEL)
+    assert search.path == history_path(dataset_version(), MODEL, tmp_path)
+    assert read_history(search.path)[0]["model"] == MODEL
+
+
+def test_interrupted_search_resumes(table, tmp_path):
+    path = tmp_path / "history.jsonl"
+    # A spent CPU budget launches no further folds: both trials stop after their first.
+    first = Search(table, MODEL, path).run(n_trials=3, cpu_budget=1e-9, max_workers=2)
+    assert first["counts"] == {"running": 2}
+    with open(path, "a") as fh:
+        fh.write('{"type": "fold", "tri')  # killed in the middle of a write
+
+    summary = Search(table, MODEL, path).run(n_trials=5, max_workers=2)
+    events, trials, folds = _history(path)
+    assert len(events) == path.read_text().count("\n")
+    assert sum(e["type"] == "search" for e in events) == 1
+    assert trials == {t: 1 for t in range(5)}
+    assert set(folds.values()) == {1}
+    for trial in range(5):
+        done = sorted(f for t, f in folds if t == trial)
+        assert done == list(range(len(done)))
+    assert len(summary["trials"]) == 5 and "running" not in summary["counts"]
+
+
+def test_changed_setup_is_not_resumed(table, tmp_path):
+    path = tmp_path / "history.jsonl"
+    Search(table, MODEL, path, seed=0)
+    with pytest.raises(ValueError, match="different search setup"):
+        Search(table, MODEL, path, seed=1)
+
+
+def test_median_pruning_stops_a_bad_trial(table, tmp_path, monkeypatch):
+    # Trial 4 shrinks the ridge to the training mean; the first four fit normally.
+    monkeypatch.setattr(tuning, "sample_params",
+                        lambda space, trial, seed=0: {"ridge__alpha": 1e9 if trial == 4 else 1.0 + trial})
+    path = tmp_path / "history.jsonl"
+    search = Search(table, MODEL, path, n_startup=4)
+    search.run(n_trials=5, max_workers=1)
+    events, _, folds = _history(path)
+    states = {e["trial"]: e["state"] for e in events if e["type"] == "end"}
+    assert states == {0: "complete", 1: "complete", 2: "complete", 3: "complete", 4: "pruned"}
+    assert sum(1 for t, _ in folds if t == 4) < len(search.folds)
+
+
+def test_pruner_waits_for_startup_trials():
+    pruner = MedianPruner(n_startup=2)
+    assert not pruner.report(0, 10.0)
+    assert not pruner.report(0, 1.0)
+    assert pruner.report(0, 20.0)
+    assert not pruner.report(0, 2.0)
+    assert not pruner.report(1, 99.0)  # a later fold has its own startup